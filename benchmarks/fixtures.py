@@ -0,0 +1,52 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+FIXTURE_DIR = Path(tempfile.gettempdir()) / "psqlomni-bench"
+FIXTURE_VERSION = 1
+ROWS_PER_TABLE = 5
+LARGE_RESULT_ROWS = 100_000
+
+
+def table_name(index: int) -> str:
+    return f"t_{index:05d}"
+
+
+def _create(path: Path, table_count: int) -> None:
+    statements = []
+    for index in range(table_count):
+        # Foreign keys form a shallow tree: a 10,000-long chain would exceed
+        # Python's recursion limit inside SQLAlchemy's reflection.
+        parent = f", parent_id INTEGER REFERENCES {table_name((index - 1) // 4)}(id)" if index else ""
+        statements.append(
+            f"CREATE TABLE {table_name(index)} (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+            f"amount REAL, created_at TEXT{parent})"
+        )
+        values = ", ".join(
+            f"({row}, 'row {row}', {row * 1.5}, '2024-01-0{row + 1}'{', ' + str(row) if index else ''})"
+            for row in range(ROWS_PER_TABLE)
+        )
+        statements.append(f"INSERT INTO {table_name(index)} VALUES {values}")
+    statements.append("CREATE TABLE big_results (id INTEGER PRIMARY KEY, label TEXT, value REAL)")
+    statements.append(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < "
+        f"{LARGE_RESULT_ROWS}) INSERT INTO big_results SELECT i, 'label ' || i, i * 0.5 FROM n"
+    )
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript("BEGIN;\n" + ";\n".join(statements) + ";\nCOMMIT;")
+    finally:
+        conn.close()
+
+
+def sqlite_fixture(table_count: int) -> Path:
+    """Return a generated SQLite database with ``table_count`` tables, building it once."""
+    path = FIXTURE_DIR / f"tables-{table_count}-v{FIXTURE_VERSION}.sqlite"
+    if path.exists():
+        return path
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+    _create(tmp_path, table_count)
+    tmp_path.replace(path)
+    return path
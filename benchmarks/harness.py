@@ -0,0 +1,144 @@
+import contextlib
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from uuid import uuid4
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.scripted_llm import ScriptedLLM
+from psqlomni.app import PSqlomni
+from psqlomni.config import AppConfig
+from psqlomni.tracing import Tracer
+from psqlomni.ui.renderer import ConsoleRenderer
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Accumulates wall time per LangGraph node from chain callbacks."""
+
+    def __init__(self) -> None:
+        self.seconds: defaultdict[str, float] = defaultdict(float)
+        self.calls: Counter = Counter()
+        self._started: dict = {}
+
+    def reset(self) -> None:
+        self.seconds.clear()
+        self.calls.clear()
+        self._started.clear()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        # Interrupts surface as errors; the node still ran until that point.
+        self._finish(run_id)
+
+    def _finish(self, run_id) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        node, started_at = started
+        self.seconds[node] += time.perf_counter() - started_at
+        self.calls[node] += 1
+
+
+@dataclass
+class Recorder:
+    timer: NodeTimer = field(default_factory=NodeTimer)
+    phases: dict[str, float] = field(default_factory=dict)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def reset(self) -> None:
+        self.timer.reset()
+        self.phases.clear()
+
+
+def bench_config(db_path: Path, **overrides) -> AppConfig:
+    config = AppConfig(
+        db_uri=f"sqlite:///{db_path}",
+        db_dialect="sqlite",
+        db_host="",
+        db_port=0,
+        db_name=db_path.stem,
+        db_user="",
+        db_password=None,
+        model_provider="openai",
+        openai_api_key=None,
+        anthropic_api_key=None,
+        google_api_key=None,
+        ollama_base_url="",
+        model="scripted",
+        sample_rows_in_table_info=3,
+        db_host_source="bench",
+        db_port_source="bench",
+        db_name_source="bench",
+        db_user_source="bench",
+        db_password_source="bench",
+        db_uri_source="bench",
+        db_port_mode="bench",
+        db_password_mode="missing",
+        schema_cache=False,
+        answer_cache=False,
+        stream_tokens=False,
+    )
+    return replace(config, **overrides)
+
+
+def build_app(config: AppConfig, db, llm: ScriptedLLM, recorder: Recorder) -> PSqlomni:
+    """Assemble a PSqlomni the way __init__ does, minus argv parsing and config files."""
+    app = PSqlomni.__new__(PSqlomni)
+    app.config = config
+    app.tracer = Tracer()
+    app.db = db
+    app.table_indexes = {}
+    app.answer_cache = None
+    app.checkpointer = app._build_checkpointer()
+    app.llm = llm
+    app.tools = app._build_tools()
+    app.graph = app._build_graph().with_config(callbacks=[recorder.timer])
+    app.thread_id = str(uuid4())
+    app.known_thread_ids = {app.thread_id}
+    app.renderer = ConsoleRenderer(mode="verbose", color_enabled=False)
+    app._prompt_query_decision = lambda _payload: {"action": "accept"}
+    return app
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextlib.contextmanager
+def traced_allocations(result: dict):
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["alloc_retained_mb"] = current / (1024 * 1024)
+        result["alloc_peak_mb"] = peak / (1024 * 1024)
@@ -0,0 +1,155 @@
+"""Offline benchmarks for the full psqlomni agent loop.
+
+Each scenario runs in its own process against a generated SQLite database,
+with a scripted model instead of a provider, and reports wall time per phase
+and per graph node, peak RSS and (with --allocations) traced allocations.
+
+    python -m benchmarks.run --tables 10,100,1000
+    python -m benchmarks.run --scenario large_result --execution-mode stream
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import FIXTURE_DIR, sqlite_fixture
+
+DEFAULT_TABLES = "10,100,1000"
+SCENARIO_NAMES = ["cold_start", "warm_turn", "long_thread", "large_result"]
+
+
+def _options(args: argparse.Namespace) -> dict:
+    return {
+        "turns": args.turns,
+        "config": {
+            "query_execution_mode": args.execution_mode,
+            "schema_cache": args.schema_cache,
+            "history_token_budget": args.history_token_budget,
+        },
+    }
+
+
+def run_child(args: argparse.Namespace) -> None:
+    # Imported here so the parent process stays light and every scenario pays
+    # its own import and reflection costs.
+    from benchmarks.harness import Recorder, peak_rss_mb, quiet, traced_allocations
+    from benchmarks.scenarios import SCENARIOS
+
+    scenario = SCENARIOS[args.scenario]
+    options = _options(args)
+    stdout = sys.stdout
+    recorder = Recorder()
+    with quiet():
+        started = time.perf_counter()
+        scenario(recorder, args.tables, options)
+        wall = time.perf_counter() - started
+    result = {
+        "scenario": args.scenario,
+        "tables": args.tables,
+        "wall_ms": wall * 1000,
+        "phases_ms": {name: seconds * 1000 for name, seconds in recorder.phases.items()},
+        "nodes": {
+            node: {"ms": seconds * 1000, "calls": recorder.timer.calls[node]}
+            for node, seconds in sorted(recorder.timer.seconds.items(), key=lambda item: -item[1])
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if args.allocations:
+        with quiet(), traced_allocations(result):
+            scenario(Recorder(), args.tables, options)
+    stdout.write(json.dumps(result) + "\n")
+
+
+def _child_command(args: argparse.Namespace, scenario: str, tables: int) -> list[str]:
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.run",
+        "--child",
+        "--scenario",
+        scenario,
+        "--tables",
+        str(tables),
+        "--turns",
+        str(args.turns),
+        "--execution-mode",
+        args.execution_mode,
+        "--history-token-budget",
+        str(args.history_token_budget),
+    ]
+    if args.schema_cache:
+        command.append("--schema-cache")
+    if args.allocations:
+        command.append("--allocations")
+    return command
+
+
+def _print_result(result: dict) -> None:
+    alloc = f"{result['alloc_peak_mb']:>9.1f}" if "alloc_peak_mb" in result else f"{'-':>9}"
+    print(
+        f"{result['scenario']:<13} {result['tables']:>6} {result['wall_ms']:>10.1f} "
+        f"{result['peak_rss_mb']:>8.1f} {alloc}"
+    )
+    phases = "  ".join(f"{name}={ms:.1f}" for name, ms in result["phases_ms"].items())
+    print(f"    phases ms: {phases}")
+    nodes = "  ".join(f"{node}={data['ms']:.1f}/{data['calls']}" for node, data in result["nodes"].items())
+    print(f"    nodes ms/calls: {nodes}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=SCENARIO_NAMES)
+    parser.add_argument("--tables", default=DEFAULT_TABLES, help="comma-separated table counts, e.g. 10,10000")
+    parser.add_argument("--turns", type=int, default=200, help="turns in the long_thread scenario")
+    parser.add_argument("--execution-mode", choices=["buffered", "stream"], default="buffered")
+    parser.add_argument("--history-token-budget", type=int, default=6000)
+    parser.add_argument("--schema-cache", action="store_true", help="reuse the on-disk schema cache between runs")
+    parser.add_argument("--allocations", action="store_true", help="re-run each scenario under tracemalloc")
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON lines to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.scenario = args.scenario[0]
+        args.tables = int(args.tables)
+        run_child(args)
+        return
+
+    scenarios = args.scenario or SCENARIO_NAMES
+    table_counts = [int(value) for value in args.tables.split(",") if value.strip()]
+    for tables in table_counts:
+        sqlite_fixture(tables)
+
+    print(f"{'scenario':<13} {'tables':>6} {'wall ms':>10} {'rss MB':>8} {'alloc MB':>9}")
+    results = []
+    for tables in table_counts:
+        for scenario in scenarios:
+            with tempfile.TemporaryDirectory() as cache_home:
+                env = dict(os.environ)
+                env["XDG_CACHE_HOME"] = str(FIXTURE_DIR / "cache") if args.schema_cache else cache_home
+                completed = subprocess.run(
+                    _child_command(args, scenario, tables),
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                )
+            if completed.returncode != 0:
+                print(f"{scenario:<13} {tables:>6} failed:\n{completed.stderr.strip()}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            _print_result(result)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            for result in results:
+                handle.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
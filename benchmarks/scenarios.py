@@ -0,0 +1,59 @@
+from benchmarks.fixtures import sqlite_fixture, table_name
+from benchmarks.harness import Recorder, bench_config, build_app
+from benchmarks.scripted_llm import ScriptedLLM
+from psqlomni.db import build_sql_database
+
+QUESTION = "How many rows are in the first table?"
+
+
+def _scripted_llm(query: str | None = None) -> ScriptedLLM:
+    first = table_name(0)
+    return ScriptedLLM(
+        table_names=first,
+        query=query or f"SELECT count(*) FROM {first}",
+        answer=f"There are rows in {first}.",
+    )
+
+
+def cold_start(recorder: Recorder, tables: int, options: dict) -> None:
+    config = bench_config(sqlite_fixture(tables), **options.get("config", {}))
+    with recorder.phase("connect"):
+        db = build_sql_database(config)
+    with recorder.phase("build_graph"):
+        app = build_app(config, db, _scripted_llm(), recorder)
+    with recorder.phase("first_turn"):
+        app.process_command(QUESTION)
+
+
+def warm_turn(recorder: Recorder, tables: int, options: dict) -> None:
+    config = bench_config(sqlite_fixture(tables), **options.get("config", {}))
+    app = build_app(config, build_sql_database(config), _scripted_llm(), recorder)
+    app.process_command(QUESTION)
+    recorder.reset()
+    with recorder.phase("turn"):
+        app.process_command("And how many are there now?")
+
+
+def long_thread(recorder: Recorder, tables: int, options: dict) -> None:
+    config = bench_config(sqlite_fixture(tables), **options.get("config", {}))
+    app = build_app(config, build_sql_database(config), _scripted_llm(), recorder)
+    turns = options.get("turns", 200)
+    for turn in range(1, turns + 1):
+        name = "first_turn" if turn == 1 else "last_turn" if turn == turns else "other_turns"
+        with recorder.phase(name):
+            app.process_command(f"Question number {turn}: how many rows now?")
+
+
+def large_result(recorder: Recorder, tables: int, options: dict) -> None:
+    config = bench_config(sqlite_fixture(tables), **options.get("config", {}))
+    app = build_app(config, build_sql_database(config), _scripted_llm("SELECT * FROM big_results"), recorder)
+    with recorder.phase("turn"):
+        app.process_command("Show me every row of big_results.")
+
+
+SCENARIOS = {
+    "cold_start": cold_start,
+    "warm_turn": warm_turn,
+    "long_thread": long_thread,
+    "large_result": large_result,
+}
@@ -0,0 +1,86 @@
+"""Token counts and latency of the sql_db_schema output formats.
+
+Runs the same scripted turns against the generated SQLite fixtures once per
+SCHEMA_FORMAT (``ddl`` and ``compact``) and reports the estimated tokens of
+the schema tool output, the estimated tokens of the thread the model reads
+when it writes the query, and wall time per turn. Tokens use the same
+characters-per-token estimate as HISTORY_TOKEN_BUDGET. No model or network
+is used.
+
+    python -m benchmarks.schema_format --tables 10,100,1000 [--described 10] [--max-columns 4]
+"""
+
+import argparse
+import time
+
+from langchain_core.messages import ToolMessage
+
+from benchmarks.fixtures import sqlite_fixture, table_name
+from benchmarks.harness import Recorder, bench_config, build_app, quiet
+from benchmarks.scripted_llm import ScriptedLLM
+from psqlomni.db import build_sql_database
+from psqlomni.graph.compaction import estimate_tokens
+
+FORMATS = ["ddl", "compact"]
+
+
+def run(tables: int, described: int, turns: int, max_columns: int = 0) -> list[dict]:
+    names = ", ".join(table_name(index) for index in range(min(described, tables)))
+    results = []
+    for schema_format in FORMATS:
+        config = bench_config(
+            sqlite_fixture(tables),
+            checkpoint_backend="memory",
+            schema_format=schema_format,
+            schema_max_columns=max_columns,
+        )
+        llm = ScriptedLLM(table_names=names, query=f"SELECT count(*) FROM {table_name(0)}", answer="Counted.")
+        app = build_app(config, build_sql_database(config), llm, Recorder())
+        turn_ms = []
+        with quiet():
+            for turn in range(turns):
+                started = time.perf_counter()
+                app.process_command(f"Question {turn}: how many rows are in {table_name(0)}?")
+                turn_ms.append((time.perf_counter() - started) * 1000)
+        messages = app.graph.get_state({"configurable": {"thread_id": app.thread_id}}).values["messages"]
+        schema_output = next(
+            message
+            for message in reversed(messages)
+            if isinstance(message, ToolMessage) and message.name == "sql_db_schema"
+        )
+        results.append(
+            {
+                "format": schema_format,
+                "tables": tables,
+                "described": min(described, tables),
+                "schema_tokens": estimate_tokens(schema_output),
+                "thread_tokens": sum(estimate_tokens(message) for message in messages) // turns,
+                "first_turn_ms": turn_ms[0],
+                "turn_ms": sum(turn_ms[1:]) / max(1, turns - 1),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", default="10,100,1000", help="comma-separated table counts, e.g. 10,10000")
+    parser.add_argument("--described", type=int, default=10, help="tables the scripted model fetches schema for")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--max-columns", type=int, default=0, help="SCHEMA_MAX_COLUMNS for the compact format")
+    args = parser.parse_args()
+
+    print(
+        f"{'format':>8} {'tables':>6} {'described':>9} {'schema tok':>10} "
+        f"{'tok/turn':>9} {'first ms':>9} {'turn ms':>8}"
+    )
+    for tables in [int(value) for value in args.tables.split(",") if value.strip()]:
+        for result in run(tables, args.described, args.turns, args.max_columns):
+            print(
+                f"{result['format']:>8} {result['tables']:>6} {result['described']:>9} {result['schema_tokens']:>10} "
+                f"{result['thread_tokens']:>9} {result['first_turn_ms']:>9.1f} {result['turn_ms']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class ScriptedBoundLLM:
+    """Answers like a well-behaved model: fetch schema, optionally run one query, then answer."""
+
+    def __init__(self, tool_names: list[str], table_names: str, query: str | None, answer: str) -> None:
+        self.tool_names = tool_names
+        self.table_names = table_names
+        self.query = query
+        self.answer = answer
+
+    def invoke(self, messages):
+        if "sql_db_schema" in self.tool_names:
+            return AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "sql_db_schema", "args": {"table_names": self.table_names}, "id": "schema"}
+                ],
+            )
+        last = messages[-1] if messages else None
+        answered = isinstance(last, ToolMessage) and last.name == "sql_db_query"
+        if self.query and "sql_db_query" in self.tool_names and not answered:
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": "sql_db_query", "args": {"query": self.query}, "id": "query"}],
+            )
+        return AIMessage(content=self.answer)
+
+
+class ScriptedLLM(BaseChatModel):
+    """Chat model stand-in with no network calls, so benchmarks time only psqlomni."""
+
+    table_names: str = "users"
+    query: str | None = None
+    answer: str = "done"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    def bind_tools(self, tools, **kwargs):
+        tool_names = [getattr(tool, "name", "") for tool in tools]
+        return ScriptedBoundLLM(tool_names, self.table_names, self.query, self.answer)
@@ -0,0 +1,166 @@
+"""Per-step cost of the process_command streaming loop as a thread grows.
+
+Runs the same scripted conversation twice: once consumed the old way
+(``stream_mode="values"`` with content-keyed dedupe) and once the current way
+(``stream_mode="updates"`` with id-only dedupe). No model or network is used.
+Time spent writing checkpoints is reported separately, since it is the part of
+each step that still scales with history (see HISTORY_TOKEN_BUDGET). Each mode
+runs in a fresh interpreter, and per-step figures average every turn since the
+previous report row.
+
+    python -m benchmarks.stream_loop --turns 200 [--history-token-budget 6000]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from langchain_community.utilities import SQLDatabase
+
+from benchmarks.scripted_llm import ScriptedLLM
+from psqlomni.app import PSqlomni
+from psqlomni.graph.builder import InMemorySaver, build_sql_graph
+from psqlomni.tools.sql_tools import build_sql_tools
+from psqlomni.ui.renderer import ConsoleRenderer
+
+REPORT_EVERY = 50
+
+
+class TimedSaver(InMemorySaver):
+    def __init__(self) -> None:
+        super().__init__()
+        self.seconds = 0.0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        started = time.perf_counter()
+        try:
+            return super().put(config, checkpoint, metadata, new_versions)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def _database(directory: Path) -> SQLDatabase:
+    uri = f"sqlite:///{directory / 'bench.db'}"
+    db = SQLDatabase.from_uri(uri)
+    db.run("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, bio TEXT)")
+    db.run(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 200) "
+        "INSERT INTO users SELECT i, 'user ' || i, printf('%.500c', 'x') FROM n"
+    )
+    return SQLDatabase.from_uri(uri, sample_rows_in_table_info=3)
+
+
+def _legacy_key(message) -> str:
+    if message.id is not None:
+        return message.id
+    return (
+        f"{type(message).__name__}|{getattr(message, 'name', '')}|"
+        f"{getattr(message, 'tool_call_id', '')}|{message.content}|"
+        f"{getattr(message, 'tool_calls', '')}"
+    )
+
+
+def consume_values(graph, stream_input, config, renderer, seen) -> tuple[int, float]:
+    steps, loop_seconds = 0, 0.0
+    for step in graph.stream(stream_input, config=config, stream_mode="values"):
+        started = time.perf_counter()
+        messages = step.get("messages", [])
+        if messages:
+            message = messages[-1]
+            key = _legacy_key(message)
+            if key not in seen:
+                seen.add(key)
+                renderer.render_message(message, set())
+        steps += 1
+        loop_seconds += time.perf_counter() - started
+    return steps, loop_seconds
+
+
+def consume_updates(graph, stream_input, config, renderer, seen) -> tuple[int, float]:
+    steps, loop_seconds = 0, 0.0
+    for step in graph.stream(stream_input, config=config, stream_mode="updates"):
+        started = time.perf_counter()
+        for message in PSqlomni._updated_messages(step):
+            renderer.render_message(message, seen)
+        steps += 1
+        loop_seconds += time.perf_counter() - started
+    return steps, loop_seconds
+
+
+def run(consume, db: SQLDatabase, turns: int, history_token_budget: int) -> list[tuple]:
+    llm = ScriptedLLM()
+    saver = TimedSaver()
+    graph = build_sql_graph(
+        llm,
+        build_sql_tools(db, llm),
+        db_dialect="sqlite",
+        db_name="bench",
+        checkpointer=saver,
+        history_token_budget=history_token_budget,
+    )
+    renderer = ConsoleRenderer(mode="verbose", color_enabled=False)
+    config = {"configurable": {"thread_id": consume.__name__}}
+    seen: set[str] = set()
+    rows = []
+    # Per-step figures are averaged over every turn since the previous report.
+    window_steps, window_seconds, window_loop_seconds = 0, 0.0, 0.0
+    saver.seconds = 0.0
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        for turn in range(1, turns + 1):
+            # process_command keeps one seen set per turn.
+            seen.clear()
+            started = time.perf_counter()
+            steps, loop_seconds = consume(graph, {"messages": [("user", f"question {turn}")]}, config, renderer, seen)
+            window_seconds += time.perf_counter() - started
+            window_steps += steps
+            window_loop_seconds += loop_seconds
+            if turn == 1 or turn % REPORT_EVERY == 0:
+                history = len(graph.get_state(config).values["messages"])
+                rows.append(
+                    (
+                        turn,
+                        history,
+                        window_seconds / window_steps * 1000,
+                        saver.seconds / window_steps * 1000,
+                        window_loop_seconds / window_steps * 1_000_000,
+                    )
+                )
+                window_steps, window_seconds, window_loop_seconds = 0, 0.0, 0.0
+                saver.seconds = 0.0
+            sink.seek(0)
+            sink.truncate()
+    return rows
+
+
+def run_in_fresh_process(consume_name: str, turns: int, history_token_budget: int) -> list[tuple]:
+    with tempfile.TemporaryDirectory() as directory:
+        return run(globals()[consume_name], _database(Path(directory)), turns, history_token_budget)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--history-token-budget", type=int, default=0)
+    args = parser.parse_args()
+
+    # Each mode gets its own interpreter: in a shared one, whichever mode runs
+    # second inherits the first run's heap and measures slower.
+    results = {}
+    for name in ("consume_values", "consume_updates"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results[name] = pool.submit(run_in_fresh_process, name, args.turns, args.history_token_budget).result()
+
+    print(f"{'mode':>8} {'turn':>6} {'messages':>9} {'ms/step':>9} {'checkpoint ms':>14} {'loop us/step':>13}")
+    for name, rows in results.items():
+        mode = name.removeprefix("consume_")
+        for turn, history, step_ms, checkpoint_ms, loop_us in rows:
+            print(f"{mode:>8} {turn:>6} {history:>9} {step_ms:>9.3f} {checkpoint_ms:>14.3f} {loop_us:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
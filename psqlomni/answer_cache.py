@@ -0,0 +1,162 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from psqlomni.schema.retrieval import HashingEmbeddings
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+_WORD = re.compile(r"[\w']+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# Words that flip a question's meaning while barely moving its embedding.
+_NEGATIONS = frozenset({"not", "no", "never", "none", "nor", "neither", "without", "except", "excluding", "unless"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    connection TEXT NOT NULL,
+    question_hash TEXT NOT NULL,
+    question TEXT NOT NULL,
+    schema_version TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    vector TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (connection, question_hash)
+);
+CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used_at);
+"""
+
+
+def normalize_question(question: str) -> str:
+    lowered = _PUNCTUATION.sub(" ", (question or "").lower())
+    return _WHITESPACE.sub(" ", lowered).strip()
+
+
+def _exact_terms(question: str) -> tuple[str, ...]:
+    """Numbers and negations in a question, which a fuzzy match must reproduce exactly."""
+    terms = []
+    for word in _WORD.findall((question or "").lower().replace("\u2019", "'")):
+        word = word.strip("'")
+        if word in _NEGATIONS or word.endswith("n't"):
+            terms.append("not" if word.endswith("n't") else word)
+        else:
+            terms.extend(number.lstrip("0") or "0" for number in _NUMBER.findall(word))
+    return tuple(sorted(terms))
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    sql: str
+    similarity: float
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 500,
+        similarity_threshold: float = 0.92,
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embeddings = HashingEmbeddings()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _vector(self, normalized: str) -> dict[int, float]:
+        dense = self.embeddings.embed_query(normalized)
+        return {index: value for index, value in enumerate(dense) if value}
+
+    def lookup(self, connection: str, question: str, schema_version: str | None) -> CachedAnswer | None:
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        question_hash = hashlib.sha256(normalized.encode()).hexdigest()
+        now = time.time()
+        with self._lock, self._conn:
+            # A changed catalog invalidates every answer recorded for this connection.
+            self._conn.execute(
+                "DELETE FROM answers WHERE connection = ? AND schema_version != ?",
+                (connection, schema_version or ""),
+            )
+            row = self._conn.execute(
+                "SELECT question_hash, question, sql FROM answers WHERE connection = ? AND question_hash = ?",
+                (connection, question_hash),
+            ).fetchone()
+            similarity = 1.0
+            if row is None:
+                row, similarity = self._nearest(connection, normalized, _exact_terms(question))
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE answers SET last_used_at = ?, hits = hits + 1 WHERE connection = ? AND question_hash = ?",
+                (now, connection, row[0]),
+            )
+        return CachedAnswer(question=row[1], sql=row[2], similarity=similarity)
+
+    def _nearest(self, connection: str, normalized: str, terms: tuple[str, ...]):
+        query_vector = self._vector(normalized)
+        best_row = None
+        best_score = 0.0
+        rows = self._conn.execute(
+            "SELECT question_hash, question, sql, vector FROM answers WHERE connection = ?",
+            (connection,),
+        )
+        for question_hash, question, sql, vector_json in rows:
+            # "orders in 2023" must not answer "orders in 2024", nor "placed" answer "not placed".
+            if _exact_terms(question) != terms:
+                continue
+            stored = json.loads(vector_json)
+            score = sum(value * stored.get(str(index), 0.0) for index, value in query_vector.items())
+            if score > best_score:
+                best_row, best_score = (question_hash, question, sql), score
+        if best_score < self.similarity_threshold:
+            return None, 0.0
+        return best_row, best_score
+
+    def store(self, connection: str, question: str, schema_version: str | None, sql: str) -> None:
+        normalized = normalize_question(question)
+        if not normalized or not sql.strip():
+            return
+        question_hash = hashlib.sha256(normalized.encode()).hexdigest()
+        vector = json.dumps({str(index): round(value, 6) for index, value in self._vector(normalized).items()})
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO answers (connection, question_hash, question, schema_version, sql, vector, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (connection, question_hash) DO UPDATE SET
+                    question = excluded.question,
+                    schema_version = excluded.schema_version,
+                    sql = excluded.sql,
+                    last_used_at = excluded.last_used_at
+                """,
+                (connection, question_hash, question.strip(), schema_version or "", sql.strip(), vector, now, now),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM answers WHERE rowid IN (
+                    SELECT rowid FROM answers ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM answers").fetchone()[0]
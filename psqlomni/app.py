@@ -0,0 +1,948 @@
+import argparse
+import asyncio
+import contextlib
+import signal
+import threading
+from dataclasses import replace
+from pathlib import Path
+from uuid import uuid4
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+from langgraph.types import Command
+from prompt_toolkit import PromptSession, prompt
+from prompt_toolkit.application.current import get_app
+from prompt_toolkit.completion import ConditionalCompleter, WordCompleter
+from prompt_toolkit.filters import Condition
+from prompt_toolkit.shortcuts import radiolist_dialog
+from sqlalchemy.engine import make_url
+
+from psqlomni.answer_cache import AnswerCache
+from psqlomni.config import (
+    CACHE_DIR,
+    DEFAULT_DB_PORT,
+    DEFAULT_DB_PORT_BY_DIALECT,
+    DEFAULT_MODELS_BY_PROVIDER,
+    DEFAULT_OLLAMA_BASE_URL,
+    MODEL_CATALOG_BY_PROVIDER,
+    PROVIDER_ALIASES,
+    get_version,
+    parse_args,
+    resolve_app_config,
+    save_connection_config,
+    save_model_config,
+)
+from psqlomni.db import build_connection_string, build_sql_database, get_catalog_version
+from psqlomni.engines import ENGINES
+from psqlomni.graph.builder import build_sql_graph
+from psqlomni.graph.checkpoint import SqliteCheckpointSaver
+from psqlomni.llm import build_llm, check_provider_dependency
+from psqlomni.result_cache import ResultCache
+from psqlomni.schema.cache import connection_fingerprint
+from psqlomni.schema.descriptions import TableDescriptionCache
+from psqlomni.schema.retrieval import (
+    TableRetrievalIndex,
+    build_embeddings,
+    table_documents,
+)
+from psqlomni.schema.samples import SampleRowStore
+from psqlomni.schema.stats import TableStatsCache
+from psqlomni.tools.sql_tools import (
+    _is_failed_result,
+    _is_mutating_query,
+    build_sql_tools,
+)
+from psqlomni.tools.streaming import build_row_sink
+from psqlomni.tracing import build_tracer, instrument_database
+from psqlomni.ui.renderer import ConsoleRenderer
+
+
+class PSqlomni:
+    _warmup: threading.Thread | None = None
+    _warmup_error: Exception | None = None
+    _loop: asyncio.AbstractEventLoop | None = None
+    result_cache: ResultCache | None = None
+    table_descriptions: TableDescriptionCache | None = None
+    sample_store: SampleRowStore | None = None
+    table_stats: TableStatsCache | None = None
+
+    def __init__(self, args: argparse.Namespace | None = None) -> None:
+        self.config = resolve_app_config(args if args is not None else parse_args())
+        check_provider_dependency(self.config.model_provider)
+        self.tracer = build_tracer(self.config.trace_file, self.config.trace_format)
+        self.db = None
+        self.table_indexes = {}
+        # Rendered sql_db_schema output; outlives the tools rebuilt on /provider and /model.
+        self.table_descriptions = (
+            TableDescriptionCache(max_bytes=self.config.schema_description_cache_bytes)
+            if self.config.schema_description_cache_bytes > 0
+            else None
+        )
+        self.sample_store = (
+            SampleRowStore(ttl_seconds=self.config.sample_rows_ttl_seconds, on_refresh=self._forget_description)
+            if self.config.sample_rows_ttl_seconds > 0
+            else None
+        )
+        self.table_stats = (
+            TableStatsCache(ttl_seconds=self.config.table_stats_ttl_seconds)
+            if self.config.table_stats_ttl_seconds > 0
+            else None
+        )
+        self.answer_cache = None
+        self.checkpointer = None
+        self.llm = None
+        self.tools = None
+        self.graph = None
+        self._start_warmup()
+        self.thread_id = str(uuid4())
+        self.known_thread_ids = {self.thread_id}
+        self.renderer = ConsoleRenderer(mode="verbose")
+        self.slash_commands = [
+            "/help",
+            "/connection",
+            "/disconnect",
+            "/connect",
+            "/mode",
+            "/provider",
+            "/model",
+            "/new",
+            "/resume",
+            "/stats",
+            "/exit",
+        ]
+        self.slash_completer = WordCompleter(self.slash_commands, ignore_case=True)
+        self.command_menu_items = [
+            ("/help", "show commands"),
+            ("/connection", "show current db connection + provider + model + mode + thread"),
+            ("/disconnect", "disconnect current database session"),
+            ("/connect", "connect to a different database"),
+            ("/mode normal", "set compact output"),
+            ("/mode verbose", "set full process output"),
+            ("/provider", "show provider"),
+            ("/provider <name>", "set provider: openai|anthropic|google_gemini|ollama"),
+            ("/model", "show current model"),
+            ("/model list", "show built-in model list for provider"),
+            ("/new", "start a new chat thread"),
+            ("/resume", "resume a prior thread"),
+            ("/stats", "show timing, token and row stats"),
+            ("/exit", "quit"),
+        ]
+
+    def _start_warmup(self) -> None:
+        # Reflection, pool connections, the LLM client and the graph are built
+        # while the user types the first question.
+        self._warmup = threading.Thread(target=self._warm_up, name="psqlomni-warmup", daemon=True)
+        self._warmup.start()
+
+    def _warm_up(self) -> None:
+        try:
+            with self.tracer.span("startup", "warm_up"):
+                self.db = build_sql_database(self.config)
+                self.answer_cache = (
+                    AnswerCache(
+                        CACHE_DIR / "answers.sqlite",
+                        max_entries=self.config.answer_cache_max_entries,
+                        similarity_threshold=self.config.answer_cache_similarity,
+                    )
+                    if self.config.answer_cache
+                    else None
+                )
+                self.result_cache = (
+                    ResultCache(
+                        ttl_seconds=self.config.result_cache_ttl_seconds,
+                        max_bytes=self.config.result_cache_max_bytes,
+                        path=CACHE_DIR / "results.sqlite" if self.config.result_cache_disk else None,
+                    )
+                    if self.config.result_cache
+                    else None
+                )
+                self.checkpointer = self._build_checkpointer()
+                self.llm = build_llm(self.config)
+                self.tools = self._build_tools()
+                self.graph = self._build_graph()
+        except Exception as exc:
+            self._warmup_error = exc
+
+    def _await_warmup(self) -> None:
+        warmup, self._warmup = self._warmup, None
+        if warmup is None:
+            return
+        if warmup.is_alive():
+            print("Finishing startup...")
+            warmup.join()
+        if self._warmup_error is not None:
+            print(f"Startup failed: {self._warmup_error}")
+            self._warmup_error = None
+
+    def chat_loop(self) -> None:
+        slash_only_completer = ConditionalCompleter(
+            self.slash_completer,
+            filter=Condition(lambda: get_app().current_buffer.document.text.lstrip().startswith("/")),
+        )
+        session = PromptSession(completer=slash_only_completer, complete_while_typing=True)
+
+        print(
+            """
+Welcome to PSQLOMNI (SQL Agent).
+Commands:
+  /                   Show slash commands
+  /help               Show slash commands
+  /connection         Show current DB connection + provider + model
+  /disconnect         Disconnect current database session
+  /connect            Connect to a different database
+  /mode <value>       Output level: normal|verbose
+  /provider [name]    Show or set provider
+  /model              Show model + open model picker
+  /model list         Show known models for provider
+  /model [name]       Set model for this session
+  /new                Start a new chat thread
+  /resume <thread_id> Resume a previous thread
+  /stats              Show timing, token and row stats
+  /exit               Quit
+            """.strip()
+        )
+        if self.config.db_uri:
+            print(
+                "Using connection "
+                f"{self.config.db_uri} "
+                f"(dialect={self.config.db_dialect}, password={self.config.db_password_mode})"
+            )
+        else:
+            print(
+                "Using connection "
+                f"{self.config.db_dialect}://{self.config.db_host}:{self.config.db_port}/{self.config.db_name} as {self.config.db_user} "
+                f"(port={self.config.db_port_mode}, password={self.config.db_password_mode})"
+            )
+
+        while True:
+            try:
+                cmd = session.prompt("\n> ").strip()
+                if not cmd:
+                    continue
+                if cmd == "/":
+                    picked = self._pick_slash_command()
+                    if not picked:
+                        continue
+                    cmd = picked
+                if self._handle_slash_or_legacy_command(cmd):
+                    continue
+                if cmd in {"/exit", "exit"}:
+                    return
+
+                self.process_command(cmd)
+            except (KeyboardInterrupt, EOFError):
+                return
+
+    def _show_slash_help(self) -> None:
+        print(
+            """
+/
+  /help               show commands
+  /connection         show current db connection + provider + model + mode + thread
+  /disconnect         disconnect current database session
+  /connect            connect to a different database
+  /mode <value>       set output mode: normal|verbose
+  /provider [name]    show provider, or set provider
+  /model              show model + open model picker for this provider
+  /model list         show known models for this provider
+  /model <name>       set model for this session
+  /new                start a new chat thread
+  /resume <thread_id> resume a prior thread
+  /stats              show timing, token and row stats for the last turn and session
+  /exit               quit
+            """.strip()
+        )
+
+    def _pick_slash_command(self) -> str | None:
+        values = [(value, f"{value:<14} {desc}") for value, desc in self.command_menu_items]
+        selection = radiolist_dialog(
+            title="PSQLOMNI Commands",
+            text="Use arrow keys, then Enter to select a command.",
+            values=values,
+            ok_text="Select",
+            cancel_text="Cancel",
+        ).run()
+        if not selection:
+            return None
+        return selection
+
+    def _handle_slash_or_legacy_command(self, cmd: str) -> bool:
+        if cmd in {"/", "/help", "help"}:
+            self._show_slash_help()
+            return True
+
+        if cmd in {"/connection", "connection"}:
+            self._await_warmup()
+            connected = self.graph is not None
+            if connected:
+                if self.config.db_uri:
+                    print(f"URI: {self.config.db_uri}")
+                    print(f"URI Source: {self.config.db_uri_source}")
+                print(f"Dialect: {self.config.db_dialect}")
+                print(
+                    f"Host: {self.config.db_host}, Database: {self.config.db_name}, User: {self.config.db_user}"
+                )
+                print(
+                    f"Port: {self.config.db_port_mode} [{self.config.db_port_source}]"
+                )
+                print(
+                    f"Password: {self.config.db_password_mode} [{self.config.db_password_source}]"
+                )
+            else:
+                print("Database: DISCONNECTED")
+            print(f"Provider: {self.config.model_provider}")
+            print(f"Model: {self.config.model}")
+            print(f"Version: {get_version()}")
+            print(f"Output mode: {self.renderer.mode}")
+            print(f"Thread: {self.thread_id}")
+            return True
+
+        if cmd in {"/disconnect", "disconnect"}:
+            self._disconnect_database()
+            return True
+
+        if cmd in {"/connect", "connect"}:
+            self._connect_database_interactive()
+            return True
+
+        if cmd.startswith("/mode ") or cmd.startswith("mode "):
+            mode = cmd.split(" ", 1)[1].strip().lower()
+            if mode not in {"normal", "verbose"}:
+                print("Invalid mode. Use: /mode normal|verbose")
+                return True
+            self.renderer.set_mode(mode)
+            print(f"Output mode set to: {mode}")
+            return True
+
+        if cmd in {"/provider", "provider"}:
+            print(f"Current provider: {self.config.model_provider}")
+            print("Usage: /provider <openai|anthropic|google_gemini|ollama>")
+            return True
+
+        if cmd.startswith("/provider "):
+            raw_provider = cmd.split(" ", 1)[1].strip().lower()
+            if not raw_provider:
+                print("Provider cannot be empty. Usage: /provider <name>")
+                return True
+            if raw_provider not in PROVIDER_ALIASES:
+                print("Unsupported provider. Use: openai|anthropic|google_gemini|ollama")
+                return True
+
+            self._await_warmup()
+            provider = PROVIDER_ALIASES[raw_provider]
+            previous_provider = self.config.model_provider
+            previous_model = self.config.model
+            previous_runtime = (self.llm, self.tools, self.graph)
+            self.config.model_provider = provider
+            self.config.model = DEFAULT_MODELS_BY_PROVIDER.get(provider, self.config.model)
+
+            if provider == "openai" and not self.config.openai_api_key:
+                self.config.openai_api_key = prompt("Enter your OpenAI API key: ", is_password=True)
+            if provider == "anthropic" and not self.config.anthropic_api_key:
+                self.config.anthropic_api_key = prompt("Enter your Anthropic API key: ", is_password=True)
+            if provider == "google_gemini" and not self.config.google_api_key:
+                self.config.google_api_key = prompt("Enter your Google API key: ", is_password=True)
+            if provider == "ollama" and not self.config.ollama_base_url:
+                self.config.ollama_base_url = (
+                    prompt(f"Ollama base URL ({DEFAULT_OLLAMA_BASE_URL}): ") or DEFAULT_OLLAMA_BASE_URL
+                )
+
+            try:
+                self._rebuild_model_runtime()
+            except Exception as exc:
+                self.config.model_provider = previous_provider
+                self.config.model = previous_model
+                self.llm, self.tools, self.graph = previous_runtime
+                print(f"Unable to switch provider: {exc}")
+                return True
+
+            picked_model = self._pick_model_interactive()
+            if picked_model:
+                self.config.model = picked_model
+                try:
+                    self._rebuild_model_runtime()
+                except Exception as exc:
+                    print(f"Provider switched, but model '{picked_model}' failed to load: {exc}")
+                    self.config.model = DEFAULT_MODELS_BY_PROVIDER.get(provider, self.config.model)
+                    try:
+                        self._rebuild_model_runtime()
+                    except Exception as default_exc:
+                        self.config.model_provider = previous_provider
+                        self.config.model = previous_model
+                        self.llm, self.tools, self.graph = previous_runtime
+                        print(f"Reverted provider/model due to error: {default_exc}")
+            save_model_config(self.config)
+            print(f"Provider set for this session: {provider}")
+            print(f"Model set for this session: {self.config.model}")
+            return True
+
+        if cmd in {"/model", "model"}:
+            print(f"Current provider: {self.config.model_provider}")
+            print(f"Current model: {self.config.model}")
+            print("Usage: /model | /model list | /model <model_name>")
+            picked_model = self._pick_model_interactive()
+            if picked_model:
+                self._await_warmup()
+                previous_model = self.config.model
+                previous_runtime = (self.llm, self.tools, self.graph)
+                self.config.model = picked_model
+                try:
+                    self._rebuild_model_runtime()
+                    save_model_config(self.config)
+                    print(f"Model set for this session: {self.config.model}")
+                except Exception as exc:
+                    self.config.model = previous_model
+                    self.llm, self.tools, self.graph = previous_runtime
+                    print(f"Unable to set model: {exc}")
+            return True
+
+        if cmd in {"/model list", "model list"}:
+            self._print_model_catalog(self.config.model_provider)
+            return True
+
+        if cmd.startswith("/model "):
+            model = cmd.split(" ", 1)[1].strip()
+            if not model:
+                print("Model cannot be empty. Usage: /model <model_name>")
+                return True
+            self._await_warmup()
+            previous_model = self.config.model
+            previous_runtime = (self.llm, self.tools, self.graph)
+            self.config.model = model
+            try:
+                self._rebuild_model_runtime()
+            except Exception as exc:
+                self.config.model = previous_model
+                self.llm, self.tools, self.graph = previous_runtime
+                print(f"Unable to set model: {exc}")
+                return True
+            save_model_config(self.config)
+            print(f"Model set for this session: {model}")
+            return True
+
+        if cmd in {"/new", "new"}:
+            self.thread_id = str(uuid4())
+            self.known_thread_ids.add(self.thread_id)
+            print(f"Started new thread: {self.thread_id}")
+            return True
+
+        if cmd.startswith("/resume "):
+            thread_id = cmd.split(" ", 1)[1].strip()
+            if not thread_id:
+                print("Usage: /resume <thread_id>")
+                return True
+            self._await_warmup()
+            if not self._is_known_thread(thread_id):
+                print("Unknown thread id for this session.")
+                print("Use /connection to see current thread or /new to start one.")
+                return True
+            self.thread_id = thread_id
+            self.known_thread_ids.add(thread_id)
+            print(f"Resumed thread: {thread_id}")
+            return True
+
+        if cmd in {"/stats", "stats"}:
+            self.renderer.print_stats(
+                self.tracer.turn,
+                self.tracer.session,
+                result_cache=self.result_cache.stats if self.result_cache is not None else None,
+            )
+            return True
+
+        if cmd in {"/exit", "exit"}:
+            return False
+
+        return False
+
+    def _disconnect_database(self) -> None:
+        self._await_warmup()
+        self.db = None
+        self.tools = None
+        self.graph = None
+        self.thread_id = str(uuid4())
+        self.known_thread_ids.add(self.thread_id)
+        print("Disconnected from database.")
+        print("Use /connect to connect to another database.")
+
+    def _rebuild_model_runtime(self) -> None:
+        self.llm = build_llm(self.config)
+        if self.db is None:
+            self.tools = None
+            self.graph = None
+            return
+        self.tools = self._build_tools()
+        self.graph = self._build_graph()
+
+    def _build_tools(self):
+        instrument_database(self.db, self.tracer)
+        sink_target = self.config.query_stream_sink
+        return build_sql_tools(
+            self.db,
+            self.llm,
+            execution_mode=self.config.query_execution_mode,
+            preview_rows=self.config.query_preview_rows,
+            row_sink_factory=lambda: build_row_sink(sink_target),
+            explain_action=self.config.explain_action.strip().lower(),
+            explain_row_threshold=self.config.explain_row_threshold,
+            row_cap=self.config.result_row_cap,
+            byte_cap=self.config.result_byte_cap,
+            result_cache=self.result_cache,
+            table_descriptions=self.table_descriptions,
+            sample_store=self.sample_store,
+            schema_format=self.config.schema_format.strip().lower(),
+            schema_max_columns=self.config.schema_max_columns,
+        )
+
+    def _forget_description(self, connection: str, table: str) -> None:
+        # Refreshed sample rows replace the ones baked into the rendered description.
+        if self.table_descriptions is not None:
+            self.table_descriptions.invalidate(connection, [table])
+
+    def _build_graph(self):
+        db = self.db
+        return build_sql_graph(
+            self.llm,
+            self.tools,
+            db_dialect=self.config.db_dialect,
+            db_name=self.config.db_name,
+            catalog_version=lambda: get_catalog_version(db),
+            table_list_ttl=self.config.table_list_ttl_seconds,
+            table_retriever=self._build_table_retriever(),
+            answer_lookup=self._build_answer_lookup(),
+            table_stats=self._build_table_stats(),
+            checkpointer=self.checkpointer,
+            history_token_budget=self.config.history_token_budget,
+            asynchronous=self.config.async_mode,
+        )
+
+    def _build_checkpointer(self):
+        # The memory backend is the same saver on an in-memory database, so
+        # retention and the thread cap keep long sessions flat there too.
+        memory = self.config.checkpoint_backend.strip().lower() == "memory"
+        return SqliteCheckpointSaver(
+            Path(":memory:") if memory else CACHE_DIR / "checkpoints.sqlite",
+            retention=self.config.checkpoint_retention,
+            max_threads=self.config.checkpoint_max_threads,
+        )
+
+    def _is_known_thread(self, thread_id: str) -> bool:
+        if thread_id in self.known_thread_ids:
+            return True
+        return isinstance(self.checkpointer, SqliteCheckpointSaver) and self.checkpointer.has_thread(thread_id)
+
+    def _answer_cache_key(self) -> str:
+        return connection_fingerprint(build_connection_string(self.config))
+
+    def _build_answer_lookup(self):
+        if self.answer_cache is None or self.db is None:
+            return None
+        cache = self.answer_cache
+        key = self._answer_cache_key()
+        return lambda question, catalog_version: cache.lookup(key, question, catalog_version)
+
+    def _build_table_stats(self):
+        if self.table_stats is None or self.db is None:
+            return None
+        db = self.db
+        cache = self.table_stats
+        key = connection_fingerprint(build_connection_string(self.config))
+        return lambda table_names: cache.summaries(db._engine, key, table_names, db._schema)
+
+    def _remember_answer(self, question: str, sql: str) -> None:
+        if self.answer_cache is None or self.db is None or _is_mutating_query(sql):
+            return
+        self.answer_cache.store(self._answer_cache_key(), question, get_catalog_version(self.db), sql)
+
+    def _is_new_thread(self, runtime_config: dict) -> bool:
+        try:
+            snapshot = self.graph.get_state(runtime_config)
+        except Exception:
+            return False
+        return not (snapshot.values or {}).get("messages")
+
+    def _build_table_retriever(self):
+        top_k = self.config.table_retrieval_top_k
+        if self.db is None or top_k <= 0:
+            return None
+        table_names = self.db.get_usable_table_names()
+        if len(table_names) <= 2 * top_k:
+            # A list this short costs little more than the candidates, and
+            # ranking it would hide tables the model can still pick from.
+            return None
+        key = build_connection_string(self.config)
+        index = self.table_indexes.get(key)
+        if index is None:
+            index = TableRetrievalIndex(build_embeddings(self.config.table_retrieval_backend))
+            self.table_indexes[key] = index
+        index.refresh(table_documents(table_names, getattr(self.db, "_metadata", None)))
+        return lambda question: index.search(question, top_k)
+
+    def _print_model_catalog(self, provider: str) -> None:
+        models = MODEL_CATALOG_BY_PROVIDER.get(provider, [])
+        if not models:
+            print(f"No built-in models listed for provider: {provider}")
+            return
+        print(f"Known models for {provider}:")
+        for model in models:
+            marker = "*" if model == self.config.model else "-"
+            print(f"  {marker} {model}")
+
+    def _pick_model_interactive(self) -> str | None:
+        provider = self.config.model_provider
+        models = MODEL_CATALOG_BY_PROVIDER.get(provider, [])
+        if not models:
+            return None
+
+        current = self.config.model if self.config.model in models else models[0]
+        values = []
+        for model in models:
+            label = f"{model}"
+            if model == self.config.model:
+                label = f"{model} (current)"
+            values.append((model, label))
+        values.append(("__custom__", "Custom model name..."))
+
+        selected = radiolist_dialog(
+            title=f"Models ({provider})",
+            text="Select a model for this provider.",
+            values=values,
+            default=current,
+            ok_text="Select",
+            cancel_text="Cancel",
+        ).run()
+        if not selected:
+            return None
+        if selected == "__custom__":
+            custom = prompt("Enter model name: ").strip()
+            if not custom:
+                print("Model unchanged.")
+                return None
+            return custom
+        return selected
+
+    def _connect_database_interactive(self) -> None:
+        self._await_warmup()
+        current_port = self.config.db_port or 5432
+        current_dialect = self.config.db_dialect or "postgresql"
+        current_uri = self.config.db_uri or ""
+
+        uri_raw = (prompt(f"DB URI [{current_uri or 'none'}]: ") or current_uri).strip()
+        if uri_raw:
+            candidate_config = replace(self.config, db_uri=uri_raw, db_uri_source="prompt")
+            try:
+                db = build_sql_database(candidate_config)
+                db.run_no_throw("SELECT 1")
+                parsed = make_url(uri_raw)
+            except Exception as exc:
+                ENGINES.discard(uri_raw)
+                print(f"Connection failed: {exc}")
+                return
+
+            candidate_config.db_dialect = parsed.get_backend_name() or candidate_config.db_dialect
+            default_port = DEFAULT_DB_PORT_BY_DIALECT.get(candidate_config.db_dialect, DEFAULT_DB_PORT)
+            candidate_config.db_host = parsed.host or ""
+            candidate_config.db_name = parsed.database or ""
+            candidate_config.db_user = parsed.username or ""
+            candidate_config.db_password = parsed.password
+            candidate_config.db_port = int(parsed.port or default_port)
+            candidate_config.db_host_source = "uri" if candidate_config.db_host else "missing"
+            candidate_config.db_name_source = "uri" if candidate_config.db_name else "missing"
+            candidate_config.db_user_source = "uri" if candidate_config.db_user else "missing"
+            candidate_config.db_password_source = "uri" if parsed.password is not None else "missing"
+            candidate_config.db_port_source = "uri" if parsed.port else "default"
+            candidate_config.db_port_mode = (
+                f"default({default_port})" if parsed.port is None else f"custom({candidate_config.db_port})"
+            )
+            if candidate_config.db_password is None:
+                candidate_config.db_password_mode = "missing"
+            elif candidate_config.db_password == "":
+                candidate_config.db_password_mode = "blank"
+            else:
+                candidate_config.db_password_mode = "set"
+            self.config = candidate_config
+            self.db = db
+        else:
+            dialect = (prompt(f"DB dialect [{current_dialect}]: ") or current_dialect).strip().lower()
+            host = (prompt(f"DB host [{self.config.db_host}]: ") or self.config.db_host).strip()
+            dbname = (prompt("DB name [current_db]: ") or self.config.db_name).strip()
+            user = (prompt(f"DB user [{self.config.db_user}]: ") or self.config.db_user).strip()
+            port_raw = (prompt(f"DB port [{current_port}]: ") or str(current_port)).strip()
+            password_input = prompt("DB password (leave blank to reuse current): ", is_password=True)
+            password = password_input
+            password_source = "prompt"
+            if not password:
+                password = self.config.db_password
+                password_source = self.config.db_password_source
+
+            try:
+                port = int(port_raw)
+            except ValueError:
+                print("Invalid port. Connection aborted.")
+                return
+
+            if not host or not dbname or not user:
+                print("Host, database, and user are required. Connection aborted.")
+                return
+
+            candidate_config = replace(
+                self.config,
+                db_uri=None,
+                db_uri_source="missing",
+                db_dialect=dialect,
+                db_host=host,
+                db_name=dbname,
+                db_user=user,
+                db_port=port,
+                db_password=password,
+                db_host_source="prompt",
+                db_name_source="prompt",
+                db_user_source="prompt",
+                db_port_source="prompt",
+                db_password_source=password_source,
+                db_port_mode=(
+                    f"default({DEFAULT_DB_PORT_BY_DIALECT.get(dialect, DEFAULT_DB_PORT)})"
+                    if port == DEFAULT_DB_PORT_BY_DIALECT.get(dialect, DEFAULT_DB_PORT)
+                    else f"custom({port})"
+                ),
+                db_password_mode="missing" if password is None else ("blank" if password == "" else "set"),
+            )
+
+            try:
+                db = build_sql_database(candidate_config)
+                db.run_no_throw("SELECT 1")
+            except Exception as exc:
+                ENGINES.discard(build_connection_string(candidate_config))
+                print(f"Connection failed: {exc}")
+                return
+
+            self.config = candidate_config
+            self.db = db
+
+        self.tools = self._build_tools()
+        self.graph = self._build_graph()
+        save_connection_config(self.config)
+        self.thread_id = str(uuid4())
+        self.known_thread_ids.add(self.thread_id)
+        target = self.config.db_uri or (
+            f"{self.config.db_dialect}://{self.config.db_host}:{self.config.db_port}/{self.config.db_name}"
+        )
+        print(f"Connected to {target}")
+        print(f"Started new thread: {self.thread_id}")
+
+    def process_command(self, cmd: str) -> None:
+        self._await_warmup()
+        if self.graph is None:
+            print("No active database connection. Use /connect first.")
+            return
+
+        self.tracer.begin_turn()
+        with self.tracer.span("turn", "process_command"), self._cancel_queries_on_interrupt():
+            try:
+                self._run_turn(cmd)
+            except asyncio.CancelledError:
+                self.renderer.end_stream()
+                print("Turn cancelled.")
+
+    @contextlib.contextmanager
+    def _cancel_queries_on_interrupt(self):
+        # Ctrl-C while a query runs cancels it on the server; the tool reports
+        # the cancellation to the model and the turn carries on. With nothing
+        # running it interrupts as before.
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        def on_interrupt(signum, frame):
+            if not self._cancel_running_queries():
+                raise KeyboardInterrupt
+
+        previous = signal.signal(signal.SIGINT, on_interrupt)
+        try:
+            yield
+        finally:
+            signal.signal(signal.SIGINT, previous if previous is not None else signal.default_int_handler)
+
+    def _cancel_running_queries(self) -> bool:
+        if not ENGINES.cancel_running():
+            return False
+        print("\nCancelling the running query...")
+        return True
+
+    def _run_turn(self, cmd: str) -> None:
+        runtime_config = {
+            "configurable": {"thread_id": self.thread_id},
+            "callbacks": [self.tracer.callback_handler()],
+        }
+        stream_input = {"messages": [("user", cmd)]}
+        seen_messages: set[str] = set()
+        self.renderer.start_turn()
+        self.renderer.print_user(cmd)
+
+        tool_call_count = 0
+        tool_result_count = 0
+        approval_count = 0
+        standalone_question = self._is_new_thread(runtime_config)
+        approved_sql = None
+
+        while True:
+            interrupted = False
+            payload = None
+
+            for mode, step in self._stream_graph(stream_input, runtime_config):
+                if mode == "messages":
+                    self._render_token(*step)
+                    continue
+                if "__interrupt__" in step:
+                    interrupted = True
+                    interrupt_obj = step["__interrupt__"][0]
+                    payload = getattr(interrupt_obj, "value", interrupt_obj)
+                    break
+
+                for message in self._updated_messages(step):
+                    if isinstance(message, AIMessage) and message.tool_calls:
+                        tool_call_count += len(message.tool_calls)
+                    if isinstance(message, ToolMessage):
+                        tool_result_count += 1
+                        if message.name == "sql_db_query" and approved_sql:
+                            if standalone_question and not _is_failed_result(str(message.content)):
+                                self._remember_answer(cmd, approved_sql)
+                            approved_sql = None
+                    self.renderer.render_message(message, seen_messages)
+
+            if not interrupted:
+                self.renderer.print_turn_summary(
+                    tool_calls=tool_call_count,
+                    tool_results=tool_result_count,
+                    approvals=approval_count,
+                )
+                return
+
+            approval_count += 1
+            # Time spent deciding is the user's, not the agent's; keep it separate.
+            with self.tracer.span("approval", "prompt_query_decision"):
+                decision = self._prompt_query_decision(payload)
+            if decision.get("action") == "accept":
+                approved_sql = payload.get("query") if isinstance(payload, dict) else None
+            elif decision.get("action") == "edit":
+                approved_sql = decision.get("query")
+            stream_input = Command(resume=decision)
+
+    def _stream_graph(self, stream_input, runtime_config: dict):
+        # "updates" yields only what each node returned, so per-step work does
+        # not grow with the length of the thread history.
+        stream_mode = ["updates", "messages"] if self.config.stream_tokens else "updates"
+        if self.config.async_mode:
+            steps = self._iterate_async(
+                self.graph.astream(stream_input, config=runtime_config, stream_mode=stream_mode)
+            )
+        else:
+            steps = self.graph.stream(stream_input, config=runtime_config, stream_mode=stream_mode)
+        for step in steps:
+            yield step if isinstance(step, tuple) else ("updates", step)
+
+    def _iterate_async(self, steps):
+        # The loop only runs while a step is pending, so approval prompts and
+        # rendering between steps stay ordinary synchronous code.
+        try:
+            while True:
+                try:
+                    yield self._run_async(steps.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run_async(steps.aclose())
+
+    def _run_async(self, awaitable):
+        # One loop for the whole session: async engines and HTTP clients are
+        # bound to the loop they were first used on.
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        task = asyncio.ensure_future(awaitable, loop=self._loop)
+        # remove_signal_handler resets SIGINT to the default handler; put back
+        # whatever process_command installed once the step is done.
+        previous = signal.getsignal(signal.SIGINT)
+        try:
+            # Ctrl-C cancels a running blocking query, or else the running step
+            # (and any async query or LLM call it is awaiting), instead of
+            # tearing down the session.
+            self._loop.add_signal_handler(signal.SIGINT, lambda: self._cancel_running_queries() or task.cancel())
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
+        try:
+            return self._loop.run_until_complete(task)
+        finally:
+            with contextlib.suppress(NotImplementedError, RuntimeError, ValueError):
+                if self._loop.remove_signal_handler(signal.SIGINT) and previous is not None:
+                    signal.signal(signal.SIGINT, previous)
+
+    @staticmethod
+    def _updated_messages(step: dict):
+        for node, update in step.items():
+            # Compaction rewrites earlier messages in place; they were shown already.
+            if node == "compact_history" or not isinstance(update, dict):
+                continue
+            messages = update.get("messages") or []
+            for message in messages if isinstance(messages, list) else [messages]:
+                if isinstance(message, BaseMessage) and not isinstance(message, RemoveMessage):
+                    yield message
+
+    def _render_token(self, chunk, metadata: dict) -> None:
+        # Only the query/answer node produces text meant for the user; schema
+        # selection replies are tool calls the renderer shows separately.
+        if (metadata or {}).get("langgraph_node") != "generate_query":
+            return
+        if not isinstance(chunk, AIMessageChunk) or chunk.tool_call_chunks:
+            return
+        content = chunk.content
+        if isinstance(content, list):
+            content = "".join(
+                item.get("text", "") if isinstance(item, dict) else str(item) for item in content
+            )
+        self.renderer.stream_token(chunk.id, content)
+
+    def _prompt_query_decision(self, payload):
+        query = payload.get("query", "") if isinstance(payload, dict) else ""
+        is_mutating = bool(payload.get("is_mutating")) if isinstance(payload, dict) else False
+        plan = payload.get("plan") if isinstance(payload, dict) else None
+
+        self.renderer.print_approval_prompt(query=query, is_mutating=is_mutating, plan=plan)
+
+        while True:
+            raw_choice = (prompt("Decision (a/e/f/x/c): ") or "").strip()
+            choice = raw_choice.lower()
+
+            if choice.startswith("/export") or choice in {"x", "export"}:
+                path = raw_choice.split(" ", 1)[1].strip() if " " in raw_choice else ""
+                if not path:
+                    path = prompt("Export to file (.parquet, .arrow or .csv): ").strip()
+                if path:
+                    return {"action": "export", "path": path}
+                print("Export path cannot be empty.")
+                continue
+
+            if choice in {"a", "accept"}:
+                return {"action": "accept"}
+
+            if choice in {"e", "edit"}:
+                edited = prompt("Edited SQL: ").strip()
+                if edited:
+                    return {"action": "edit", "query": edited}
+                print("Edited SQL cannot be empty.")
+                continue
+
+            if choice in {"f", "feedback"}:
+                message = prompt("Feedback to assistant (no execution): ").strip()
+                if message:
+                    return {"action": "feedback", "message": message}
+                print("Feedback cannot be empty.")
+                continue
+
+            if choice in {"c", "cancel", "reject"}:
+                return {"action": "cancel"}
+
+            print("Invalid choice. Use a/e/f/x/c.")
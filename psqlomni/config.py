@@ -10,14 +10,14 @@ from urllib.parse import quote_plus
 
 import toml
 from prompt_toolkit import prompt
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.engine import make_url
+
+from psqlomni.engines import ENGINES
 
 DEFAULT_MODEL = "gpt-4.1-mini"
 DEFAULT_DB_PORT = 5432
 DEFAULT_DB_DIALECT = "postgresql"
 CONFIG_FILE = Path(os.path.expanduser("~/.psqlomni"))
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")) / "psqlomni"
 _MISSING = object()
 PROVIDER_ALIASES = {
     "openai": "openai",
@@ -128,6 +128,41 @@ class AppConfig:
     db_uri_source: str
     db_port_mode: str
     db_password_mode: str
+    schema_cache: bool = True
+    table_list_ttl_seconds: float = 300.0
+    table_retrieval_top_k: int = 8
+    table_retrieval_backend: str = "tfidf"
+    query_execution_mode: str = "buffered"
+    query_preview_rows: int = 20
+    query_stream_sink: str = "console"
+    answer_cache: bool = True
+    answer_cache_max_entries: int = 500
+    answer_cache_similarity: float = 0.92
+    checkpoint_backend: str = "memory"
+    checkpoint_retention: int = 20
+    checkpoint_max_threads: int = 50
+    history_token_budget: int = 6000
+    stream_tokens: bool = True
+    trace_file: str = ""
+    trace_format: str = "jsonl"
+    db_pool_size: int = 5
+    db_pool_recycle_seconds: int = 1800
+    async_mode: bool = False
+    explain_action: str = "warn"
+    explain_row_threshold: int = 1_000_000
+    result_row_cap: int = 200
+    result_byte_cap: int = 16_000
+    query_timeout_seconds: int = 0
+    result_cache: bool = False
+    result_cache_ttl_seconds: int = 300
+    result_cache_max_bytes: int = 8_000_000
+    result_cache_disk: bool = False
+    schema_loading: str = "eager"
+    schema_description_cache_bytes: int = 4_000_000
+    sample_rows_ttl_seconds: int = 600
+    table_stats_ttl_seconds: int = 3600
+    schema_format: str = "ddl"
+    schema_max_columns: int = 0
 
 
 def parse_args() -> argparse.Namespace:
@@ -183,6 +218,34 @@ def _resolve_value(
     return None, "missing"
 
 
+def _resolve_setting(
+    *,
+    config: dict[str, Any],
+    config_key: str,
+    env_key: str,
+    default: Any,
+    cast=str,
+) -> Any:
+    value, _ = _resolve_value(config=config, config_key=config_key, cli_value=None, env_key=env_key, default=default)
+    if value is None or value == "":
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in {"1", "true", "yes", "on"}:
+        return True
+    if normalized in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+
 def _password_mode(password: str | None) -> str:
     if password is None:
         return "missing"
@@ -235,16 +298,154 @@ def normalize_model_provider(raw_provider: str | None) -> str:
 
 
 def _validate_connection(db_uri: str) -> None:
-    engine = create_engine(db_uri)
+    from sqlalchemy import text
+
     try:
-        with engine.connect() as conn:
+        with ENGINES.get(db_uri).connect() as conn:
             conn.execute(text("SELECT 1"))
-    finally:
-        engine.dispose()
+    except Exception:
+        ENGINES.discard(db_uri)
+        raise
 
 
 def resolve_app_config(args: argparse.Namespace) -> AppConfig:
+    # SQLAlchemy is imported here rather than at module level so that
+    # `psqlomni --help` stays fast.
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.exc import SQLAlchemyError
+
     config = _load_config_file()
+    # Pool settings come first: connection validation below already opens
+    # the shared engine that the rest of the session reuses.
+    db_pool_size = _resolve_setting(
+        config=config,
+        config_key="db_pool_size",
+        env_key="DB_POOL_SIZE",
+        default=5,
+        cast=int,
+    )
+    db_pool_recycle_seconds = _resolve_setting(
+        config=config,
+        config_key="db_pool_recycle_seconds",
+        env_key="DB_POOL_RECYCLE_SECONDS",
+        default=1800,
+        cast=int,
+    )
+    async_mode = _resolve_setting(
+        config=config,
+        config_key="async_mode",
+        env_key="ASYNC_MODE",
+        default=False,
+        cast=_to_bool,
+    )
+    explain_action = _resolve_setting(
+        config=config,
+        config_key="explain_action",
+        env_key="EXPLAIN_ACTION",
+        default="warn",
+    )
+    explain_row_threshold = _resolve_setting(
+        config=config,
+        config_key="explain_row_threshold",
+        env_key="EXPLAIN_ROW_THRESHOLD",
+        default=1_000_000,
+        cast=int,
+    )
+    result_row_cap = _resolve_setting(
+        config=config,
+        config_key="result_row_cap",
+        env_key="RESULT_ROW_CAP",
+        default=200,
+        cast=int,
+    )
+    result_byte_cap = _resolve_setting(
+        config=config,
+        config_key="result_byte_cap",
+        env_key="RESULT_BYTE_CAP",
+        default=16_000,
+        cast=int,
+    )
+    query_timeout_seconds = _resolve_setting(
+        config=config,
+        config_key="query_timeout_seconds",
+        env_key="QUERY_TIMEOUT_SECONDS",
+        default=0,
+        cast=int,
+    )
+    result_cache = _resolve_setting(
+        config=config,
+        config_key="result_cache",
+        env_key="RESULT_CACHE",
+        default=False,
+        cast=_to_bool,
+    )
+    result_cache_ttl_seconds = _resolve_setting(
+        config=config,
+        config_key="result_cache_ttl_seconds",
+        env_key="RESULT_CACHE_TTL_SECONDS",
+        default=300,
+        cast=int,
+    )
+    result_cache_max_bytes = _resolve_setting(
+        config=config,
+        config_key="result_cache_max_bytes",
+        env_key="RESULT_CACHE_MAX_BYTES",
+        default=8_000_000,
+        cast=int,
+    )
+    result_cache_disk = _resolve_setting(
+        config=config,
+        config_key="result_cache_disk",
+        env_key="RESULT_CACHE_DISK",
+        default=False,
+        cast=_to_bool,
+    )
+    schema_loading = _resolve_setting(
+        config=config,
+        config_key="schema_loading",
+        env_key="SCHEMA_LOADING",
+        default="eager",
+    )
+    schema_description_cache_bytes = _resolve_setting(
+        config=config,
+        config_key="schema_description_cache_bytes",
+        env_key="SCHEMA_DESCRIPTION_CACHE_BYTES",
+        default=4_000_000,
+        cast=int,
+    )
+    sample_rows_ttl_seconds = _resolve_setting(
+        config=config,
+        config_key="sample_rows_ttl_seconds",
+        env_key="SAMPLE_ROWS_TTL_SECONDS",
+        default=600,
+        cast=int,
+    )
+    table_stats_ttl_seconds = _resolve_setting(
+        config=config,
+        config_key="table_stats_ttl_seconds",
+        env_key="TABLE_STATS_TTL_SECONDS",
+        default=3600,
+        cast=int,
+    )
+    schema_format = _resolve_setting(
+        config=config,
+        config_key="schema_format",
+        env_key="SCHEMA_FORMAT",
+        default="ddl",
+    )
+    schema_max_columns = _resolve_setting(
+        config=config,
+        config_key="schema_max_columns",
+        env_key="SCHEMA_MAX_COLUMNS",
+        default=0,
+        cast=int,
+    )
+    ENGINES.configure(
+        pool_size=db_pool_size,
+        pool_recycle=db_pool_recycle_seconds,
+        statement_timeout=query_timeout_seconds,
+    )
+
     db_uri, db_uri_source = _resolve_value(
         config=config,
         config_key="DB_URI",
@@ -416,6 +617,121 @@ def resolve_app_config(args: argparse.Namespace) -> AppConfig:
         sample_rows = prompt("Number of sample rows to pass to model (Default 3): ") or 3
     sample_rows_int = int(sample_rows)
 
+    schema_cache = _resolve_setting(
+        config=config,
+        config_key="schema_cache",
+        env_key="SCHEMA_CACHE",
+        default=True,
+        cast=_to_bool,
+    )
+    table_list_ttl_seconds = _resolve_setting(
+        config=config,
+        config_key="table_list_ttl_seconds",
+        env_key="TABLE_LIST_TTL_SECONDS",
+        default=300.0,
+        cast=float,
+    )
+    table_retrieval_top_k = _resolve_setting(
+        config=config,
+        config_key="table_retrieval_top_k",
+        env_key="TABLE_RETRIEVAL_TOP_K",
+        default=8,
+        cast=int,
+    )
+    table_retrieval_backend = _resolve_setting(
+        config=config,
+        config_key="table_retrieval_backend",
+        env_key="TABLE_RETRIEVAL_BACKEND",
+        default="tfidf",
+    )
+    query_execution_mode = _resolve_setting(
+        config=config,
+        config_key="query_execution_mode",
+        env_key="QUERY_EXECUTION_MODE",
+        default="buffered",
+        cast=lambda value: str(value).strip().lower(),
+    )
+    query_preview_rows = _resolve_setting(
+        config=config,
+        config_key="query_preview_rows",
+        env_key="QUERY_PREVIEW_ROWS",
+        default=20,
+        cast=int,
+    )
+    query_stream_sink = _resolve_setting(
+        config=config,
+        config_key="query_stream_sink",
+        env_key="QUERY_STREAM_SINK",
+        default="console",
+    )
+    answer_cache = _resolve_setting(
+        config=config,
+        config_key="answer_cache",
+        env_key="ANSWER_CACHE",
+        default=True,
+        cast=_to_bool,
+    )
+    answer_cache_max_entries = _resolve_setting(
+        config=config,
+        config_key="answer_cache_max_entries",
+        env_key="ANSWER_CACHE_MAX_ENTRIES",
+        default=500,
+        cast=int,
+    )
+    answer_cache_similarity = _resolve_setting(
+        config=config,
+        config_key="answer_cache_similarity",
+        env_key="ANSWER_CACHE_SIMILARITY",
+        default=0.92,
+        cast=float,
+    )
+    checkpoint_backend = _resolve_setting(
+        config=config,
+        config_key="checkpoint_backend",
+        env_key="CHECKPOINT_BACKEND",
+        default="memory",
+    )
+    checkpoint_retention = _resolve_setting(
+        config=config,
+        config_key="checkpoint_retention",
+        env_key="CHECKPOINT_RETENTION",
+        default=20,
+        cast=int,
+    )
+    checkpoint_max_threads = _resolve_setting(
+        config=config,
+        config_key="checkpoint_max_threads",
+        env_key="CHECKPOINT_MAX_THREADS",
+        default=50,
+        cast=int,
+    )
+    history_token_budget = _resolve_setting(
+        config=config,
+        config_key="history_token_budget",
+        env_key="HISTORY_TOKEN_BUDGET",
+        default=6000,
+        cast=int,
+    )
+    stream_tokens = _resolve_setting(
+        config=config,
+        config_key="stream_tokens",
+        env_key="STREAM_TOKENS",
+        default=True,
+        cast=_to_bool,
+    )
+    trace_file = _resolve_setting(
+        config=config,
+        config_key="trace_file",
+        env_key="TRACE_FILE",
+        default="",
+    )
+    trace_format = _resolve_setting(
+        config=config,
+        config_key="trace_format",
+        env_key="TRACE_FORMAT",
+        default="jsonl",
+    )
+
     merged = {
         "DB_URI": db_uri or "",
         "DBDIALECT": db_dialect,
@@ -432,6 +748,48 @@ def resolve_app_config(args: argparse.Namespace) -> AppConfig:
         "model": model,
         "sample_rows_in_table_info": sample_rows_int,
     }
+    settings = {
+        "schema_cache": schema_cache,
+        "table_list_ttl_seconds": table_list_ttl_seconds,
+        "table_retrieval_top_k": table_retrieval_top_k,
+        "table_retrieval_backend": table_retrieval_backend,
+        "query_execution_mode": query_execution_mode,
+        "query_preview_rows": query_preview_rows,
+        "query_stream_sink": query_stream_sink,
+        "answer_cache": answer_cache,
+        "answer_cache_max_entries": answer_cache_max_entries,
+        "answer_cache_similarity": answer_cache_similarity,
+        "checkpoint_backend": checkpoint_backend,
+        "checkpoint_retention": checkpoint_retention,
+        "checkpoint_max_threads": checkpoint_max_threads,
+        "history_token_budget": history_token_budget,
+        "stream_tokens": stream_tokens,
+        "trace_file": trace_file,
+        "trace_format": trace_format,
+        "db_pool_size": db_pool_size,
+        "db_pool_recycle_seconds": db_pool_recycle_seconds,
+        "async_mode": async_mode,
+        "explain_action": explain_action,
+        "explain_row_threshold": explain_row_threshold,
+        "result_row_cap": result_row_cap,
+        "result_byte_cap": result_byte_cap,
+        "query_timeout_seconds": query_timeout_seconds,
+        "result_cache": result_cache,
+        "result_cache_ttl_seconds": result_cache_ttl_seconds,
+        "result_cache_max_bytes": result_cache_max_bytes,
+        "result_cache_disk": result_cache_disk,
+        "schema_loading": schema_loading,
+        "schema_description_cache_bytes": schema_description_cache_bytes,
+        "sample_rows_ttl_seconds": sample_rows_ttl_seconds,
+        "table_stats_ttl_seconds": table_stats_ttl_seconds,
+        "schema_format": schema_format,
+        "schema_max_columns": schema_max_columns,
+    }
+    # Tuning settings are written back only when the user set them, so a
+    # default changed in a later release still reaches existing installs.
+    merged.update(
+        {key: value for key, value in settings.items() if key in config or key.upper() in os.environ}
+    )
     _save_config_file(merged)
 
     return AppConfig(
@@ -457,6 +815,41 @@ def resolve_app_config(args: argparse.Namespace) -> AppConfig:
         db_uri_source=db_uri_source if db_uri else "missing",
         db_port_mode=_port_mode(db_port, db_dialect),
         db_password_mode=_password_mode(db_password),
+        schema_cache=schema_cache,
+        table_list_ttl_seconds=table_list_ttl_seconds,
+        table_retrieval_top_k=table_retrieval_top_k,
+        table_retrieval_backend=table_retrieval_backend,
+        query_execution_mode=query_execution_mode,
+        query_preview_rows=query_preview_rows,
+        query_stream_sink=query_stream_sink,
+        answer_cache=answer_cache,
+        answer_cache_max_entries=answer_cache_max_entries,
+        answer_cache_similarity=answer_cache_similarity,
+        checkpoint_backend=checkpoint_backend,
+        checkpoint_retention=checkpoint_retention,
+        checkpoint_max_threads=checkpoint_max_threads,
+        history_token_budget=history_token_budget,
+        stream_tokens=stream_tokens,
+        trace_file=trace_file,
+        trace_format=trace_format,
+        db_pool_size=db_pool_size,
+        db_pool_recycle_seconds=db_pool_recycle_seconds,
+        async_mode=async_mode,
+        explain_action=explain_action,
+        explain_row_threshold=explain_row_threshold,
+        result_row_cap=result_row_cap,
+        result_byte_cap=result_byte_cap,
+        query_timeout_seconds=query_timeout_seconds,
+        result_cache=result_cache,
+        result_cache_ttl_seconds=result_cache_ttl_seconds,
+        result_cache_max_bytes=result_cache_max_bytes,
+        result_cache_disk=result_cache_disk,
+        schema_loading=schema_loading,
+        schema_description_cache_bytes=schema_description_cache_bytes,
+        sample_rows_ttl_seconds=sample_rows_ttl_seconds,
+        table_stats_ttl_seconds=table_stats_ttl_seconds,
+        schema_format=schema_format,
+        schema_max_columns=schema_max_columns,
     )
 
 
@@ -1,9 +1,16 @@
 from urllib.parse import quote_plus
 
-from sqlalchemy import create_engine
 from langchain_community.utilities import SQLDatabase
+from sqlalchemy import MetaData
 
-from psqlomni.config import AppConfig
+from psqlomni.config import CACHE_DIR, AppConfig
+from psqlomni.engines import ENGINES
+from psqlomni.schema.cache import (
+    SchemaCatalogCache,
+    catalog_marker,
+    connection_fingerprint,
+)
+from psqlomni.schema.introspection import introspect_metadata
 
 
 def build_connection_string(config: AppConfig) -> str:
@@ -29,11 +36,59 @@ def build_connection_string(config: AppConfig) -> str:
 
 
 def build_engine(config: AppConfig):
-    return create_engine(build_connection_string(config))
+    return ENGINES.get(build_connection_string(config))
 
 
 def build_sql_database(config: AppConfig) -> SQLDatabase:
-    return SQLDatabase.from_uri(
-        build_connection_string(config),
+    connection_string = build_connection_string(config)
+    engine = ENGINES.get(connection_string)
+    if not config.schema_cache:
+        return _reflect_database(engine, config)
+
+    cache = SchemaCatalogCache(CACHE_DIR / "schema")
+    fingerprint = connection_fingerprint(connection_string)
+    marker = catalog_marker(engine)
+    metadata = cache.load(fingerprint, marker) if marker else None
+    if metadata is not None:
+        return SQLDatabase(
+            engine,
+            metadata=metadata,
+            lazy_table_reflection=True,
+            sample_rows_in_table_info=config.sample_rows_in_table_info,
+        )
+
+    db = _reflect_database(engine, config)
+    if marker and not _lazy_schema(config):
+        cache.store(fingerprint, marker, db._metadata)
+    return db
+
+
+def _lazy_schema(config: AppConfig) -> bool:
+    return config.schema_loading.strip().lower() == "lazy"
+
+
+def _reflect_database(engine, config: AppConfig) -> SQLDatabase:
+    # Lazy loading reflects nothing here: sql_db_schema loads tables the
+    # first time the model asks for them.
+    if _lazy_schema(config):
+        return SQLDatabase(
+            engine,
+            metadata=MetaData(),
+            lazy_table_reflection=True,
+            sample_rows_in_table_info=config.sample_rows_in_table_info,
+        )
+    # Bulk catalog queries where the dialect has them; SQLDatabase reflects
+    # table by table otherwise.
+    metadata = introspect_metadata(engine)
+    if metadata is None:
+        return SQLDatabase(engine, sample_rows_in_table_info=config.sample_rows_in_table_info)
+    return SQLDatabase(
+        engine,
+        metadata=metadata,
+        lazy_table_reflection=True,
         sample_rows_in_table_info=config.sample_rows_in_table_info,
     )
+
+
+def get_catalog_version(db: SQLDatabase) -> str | None:
+    return catalog_marker(db._engine)
@@ -0,0 +1,269 @@
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 5
+DEFAULT_POOL_RECYCLE_SECONDS = 1800
+# Backend -> driver for SQLAlchemy's asyncio extension; the driver name is
+# also the module that has to be importable.
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+    "mysql": "aiomysql",
+}
+# SQLite checks its statement deadline every this many VM instructions.
+SQLITE_PROGRESS_STEPS = 10_000
+
+
+class EngineManager:
+    """Owns one pooled SQLAlchemy engine per database URI.
+
+    Connection validation, schema introspection and query execution all go
+    through the same engine, so a session pays for the TCP/TLS/auth handshake
+    once per pooled connection instead of once per step. Engines stay cached
+    after ``/connect`` switches away, which makes switching back free.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_overflow: int = DEFAULT_MAX_OVERFLOW,
+        pool_recycle: int = DEFAULT_POOL_RECYCLE_SECONDS,
+        pool_pre_ping: bool = True,
+        statement_timeout: int = 0,
+    ) -> None:
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+        # Seconds; 0 means no limit.
+        self.statement_timeout = statement_timeout
+        self._engines = {}
+        self._async_engines = {}
+        self._running = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, **options) -> None:
+        """Change pool settings for engines created from now on."""
+        for key, value in options.items():
+            if not hasattr(self, key):
+                raise TypeError(f"Unknown engine option: {key}")
+            setattr(self, key, value)
+
+    def engine_options(self, uri: str) -> dict:
+        from sqlalchemy.engine import make_url
+        from sqlalchemy.pool import QueuePool
+
+        url = make_url(uri)
+        if url.get_backend_name() == "sqlite":
+            # SQLite has no handshake to amortize; keep SQLAlchemy's default
+            # pool, which also handles in-memory databases correctly. Its
+            # statement timeout is a progress handler, see _sqlite_connect.
+            return {}
+        options = {
+            "poolclass": QueuePool,
+            "pool_size": max(1, self.pool_size),
+            "max_overflow": max(0, self.max_overflow),
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+        connect_args = self.timeout_connect_args(url.get_backend_name(), url.get_driver_name())
+        if connect_args:
+            options["connect_args"] = connect_args
+        return options
+
+    def timeout_connect_args(self, backend: str, driver: str) -> dict:
+        """Session settings that make the server enforce ``statement_timeout``."""
+        milliseconds = int(self.statement_timeout * 1000)
+        if milliseconds <= 0:
+            return {}
+        if backend == "postgresql" and driver == "asyncpg":
+            return {"server_settings": {"statement_timeout": str(milliseconds)}}
+        if backend == "postgresql" and driver in {"psycopg2", "psycopg"}:
+            # A libpq startup option, so it survives the rollback the pool
+            # issues when a connection is returned.
+            return {"options": f"-c statement_timeout={milliseconds}"}
+        if backend == "mysql" and driver in {"pymysql", "mysqldb", "aiomysql"}:
+            return {"init_command": f"SET SESSION max_execution_time={milliseconds}"}
+        return {}
+
+    def get(self, uri: str):
+        with self._lock:
+            engine = self._engines.get(uri)
+            if engine is None:
+                from sqlalchemy import create_engine
+
+                engine = create_engine(uri, **self.engine_options(uri))
+                self._install_query_hooks(engine)
+                self._engines[uri] = engine
+            return engine
+
+    def async_url(self, uri: str):
+        """Return ``uri`` rewritten for an installed async driver, or None."""
+        from sqlalchemy.engine import make_url
+
+        url = make_url(uri)
+        driver = ASYNC_DRIVERS.get(url.get_backend_name())
+        if driver is None or not (_importable(driver) and _importable("greenlet")):
+            return None
+        return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+    def get_async(self, uri: str):
+        """Return a pooled ``AsyncEngine`` for ``uri``, or None when no async driver is installed."""
+        with self._lock:
+            if uri in self._async_engines:
+                return self._async_engines[uri]
+            url = self.async_url(uri)
+            engine = None
+            if url is not None:
+                from sqlalchemy.ext.asyncio import create_async_engine
+                from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+                options = self.engine_options(uri)
+                if options:
+                    options["poolclass"] = AsyncAdaptedQueuePool
+                    connect_args = self.timeout_connect_args(url.get_backend_name(), url.get_driver_name())
+                    if connect_args:
+                        options["connect_args"] = connect_args
+                engine = create_async_engine(url, **options)
+                self._install_query_hooks(engine.sync_engine)
+            self._async_engines[uri] = engine
+            return engine
+
+    def _install_query_hooks(self, engine) -> None:
+        from sqlalchemy import event
+
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", self._sqlite_connect)
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        event.listen(engine, "checkin", self._checkin)
+
+    def _sqlite_connect(self, dbapi_connection, connection_record) -> None:
+        set_progress_handler = getattr(dbapi_connection, "set_progress_handler", None)
+        if set_progress_handler is None:
+            return
+        info = connection_record.info
+
+        def expired() -> int:
+            deadline = info.get("psqlomni_deadline")
+            return int(deadline is not None and time.monotonic() > deadline)
+
+        set_progress_handler(expired, SQLITE_PROGRESS_STEPS)
+
+    @contextmanager
+    def user_query(self):
+        """Mark statements this thread runs inside the block as the user's approved query.
+
+        Only these are stopped by ``cancel_running``. Their SQLite deadline and
+        cancel entry stay in place until the connection goes back to the pool,
+        so rows fetched after ``execute`` returns are covered too.
+        """
+        self._local.user_query = True
+        try:
+            yield
+        finally:
+            self._local.user_query = False
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if conn.dialect.name == "sqlite" and self.statement_timeout > 0:
+            conn.info["psqlomni_deadline"] = time.monotonic() + self.statement_timeout
+        if getattr(self._local, "user_query", False):
+            conn.info["psqlomni_user_query"] = True
+            dbapi_connection = conn.connection.dbapi_connection
+            with self._lock:
+                self._running.setdefault(
+                    id(dbapi_connection),
+                    {"dbapi": dbapi_connection, "errors": conn.dialect.loaded_dbapi.Error, "cancelled": False},
+                )
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # sqlite3 does most of a query's work while rows are fetched; the user
+        # query's deadline is cleared on checkin instead.
+        if not conn.info.get("psqlomni_user_query"):
+            conn.info.pop("psqlomni_deadline", None)
+
+    def _checkin(self, dbapi_connection, connection_record) -> None:
+        connection_record.info.pop("psqlomni_deadline", None)
+        connection_record.info.pop("psqlomni_user_query", None)
+        with self._lock:
+            self._running.pop(id(dbapi_connection), None)
+
+    def _handle_error(self, context) -> None:
+        conn = context.connection
+        if conn is None:
+            return
+        deadline = conn.info.pop("psqlomni_deadline", None)
+        conn.info.pop("psqlomni_user_query", None)
+        with self._lock:
+            entry = self._running.pop(id(conn.connection.dbapi_connection), None)
+        message = str(context.original_exception).lower()
+        if entry is not None and entry["cancelled"]:
+            self._local.interruption = "cancelled"
+        elif (
+            (deadline is not None and time.monotonic() > deadline)
+            or "statement timeout" in message
+            or "maximum statement execution time" in message
+        ):
+            self._local.interruption = "timeout"
+
+    def cancel_running(self) -> int:
+        """Cancel user queries (see ``user_query``) in flight on any engine; returns how many were cancelled.
+
+        Uses the driver's own cancel (psycopg ``cancel()``, sqlite3
+        ``interrupt()``), so the connection stays usable and goes back to the pool.
+        Runs from the SIGINT handler, possibly while the interrupted main thread
+        holds ``_lock``, so it must not take the lock; copying the dict is a
+        single step under the GIL.
+        """
+        running = list(self._running.values())
+        cancelled = 0
+        for entry in running:
+            dbapi_connection = entry["dbapi"]
+            cancel = getattr(dbapi_connection, "cancel", None) or getattr(dbapi_connection, "interrupt", None)
+            if cancel is None:
+                continue
+            entry["cancelled"] = True
+            try:
+                cancel()
+            except entry["errors"]:
+                # The statement finished, or the connection broke, meanwhile.
+                entry["cancelled"] = False
+            else:
+                cancelled += 1
+        return cancelled
+
+    def take_interruption(self) -> str | None:
+        """Return and clear why this thread's last statement was stopped: ``"cancelled"``, ``"timeout"`` or None."""
+        interruption = getattr(self._local, "interruption", None)
+        self._local.interruption = None
+        return interruption
+
+    def discard(self, uri: str) -> None:
+        with self._lock:
+            engine = self._engines.pop(uri, None)
+            async_engine = self._async_engines.pop(uri, None)
+        if engine is not None:
+            engine.dispose()
+        if async_engine is not None:
+            async_engine.sync_engine.dispose()
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            engines = list(self._engines.values())
+            engines += [engine.sync_engine for engine in self._async_engines.values() if engine is not None]
+            self._engines.clear()
+            self._async_engines.clear()
+        for engine in engines:
+            engine.dispose()
+
+
+def _importable(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+ENGINES = EngineManager()
@@ -1,10 +1,19 @@
+from collections.abc import Callable
+from typing import Any
+
 from langgraph.graph import START, StateGraph
 
 from psqlomni.graph.nodes import (
     AgentState,
-    bootstrap_list_tables,
+    bootstrap_table_list,
+    make_answer_cache_node,
+    make_answer_cache_router,
+    make_history_compaction_node,
     make_query_generation_node,
+    make_run_query_router,
     make_schema_selection_node,
+    make_table_list_check_node,
+    make_table_list_router,
     route_after_query_generation,
 )
 from psqlomni.graph.tool_nodes import build_tool_nodes
@@ -15,26 +24,76 @@ except ImportError:  # pragma: no cover
     from langgraph.checkpoint.memory import MemorySaver as InMemorySaver
 
 
-def build_sql_graph(llm, tools, db_dialect: str, db_name: str):
+def build_sql_graph(
+    llm,
+    tools,
+    db_dialect: str,
+    db_name: str,
+    catalog_version: Callable[[], str | None] | None = None,
+    table_list_ttl: float = 300.0,
+    table_retriever: Callable[[str], list[str]] | None = None,
+    answer_lookup: Callable[[str, str | None], Any] | None = None,
+    table_stats: Callable[[list[str]], list[str]] | None = None,
+    checkpointer=None,
+    history_token_budget: int = 0,
+    asynchronous: bool = False,
+):
+    # Asynchronous graphs must be driven with astream/ainvoke. Only the LLM
+    # nodes have native coroutines; LangGraph runs the remaining sync nodes in
+    # a worker thread.
     tool_nodes = build_tool_nodes(tools)
 
     graph = StateGraph(AgentState)
-    graph.add_node("bootstrap_list_tables", bootstrap_list_tables)
+    graph.add_node("check_table_list", make_table_list_check_node(catalog_version, ttl_seconds=table_list_ttl))
+    graph.add_node("bootstrap_list_tables", bootstrap_table_list)
     graph.add_node("list_tables", tool_nodes.list_tables_node)
-    graph.add_node("select_schema", make_schema_selection_node(llm, tools["sql_db_schema"]))
+    graph.add_node(
+        "select_schema",
+        make_schema_selection_node(llm, tools["sql_db_schema"], table_retriever, asynchronous=asynchronous),
+    )
     graph.add_node("get_schema", tool_nodes.get_schema_node)
     graph.add_node(
         "generate_query",
-        make_query_generation_node(llm, tools["sql_db_query"], db_dialect=db_dialect, db_name=db_name),
+        make_query_generation_node(
+            llm,
+            tools["sql_db_query"],
+            db_dialect=db_dialect,
+            db_name=db_name,
+            table_stats=table_stats,
+            asynchronous=asynchronous,
+        ),
     )
     graph.add_node("run_query", tool_nodes.run_query_node)
 
-    graph.add_edge(START, "bootstrap_list_tables")
+    table_list_router = make_table_list_router(ttl_seconds=table_list_ttl)
+    schema_targets = ["bootstrap_list_tables", "select_schema"]
+    graph.add_edge(START, "check_table_list")
+    after_check, after_check_targets = table_list_router, schema_targets
+    if history_token_budget > 0:
+        graph.add_node("compact_history", make_history_compaction_node(history_token_budget))
+        graph.add_conditional_edges("compact_history", table_list_router, schema_targets)
+        after_check, after_check_targets = (lambda _state: "compact_history"), ["compact_history"]
+    if answer_lookup is not None:
+        # Looked up before compaction, which can drop the earlier questions
+        # the node uses to tell a first question from a follow-up.
+        graph.add_node("lookup_answer_cache", make_answer_cache_node(answer_lookup))
+        graph.add_edge("check_table_list", "lookup_answer_cache")
+        graph.add_conditional_edges(
+            "lookup_answer_cache",
+            make_answer_cache_router(after_check),
+            ["run_query", *after_check_targets],
+        )
+    else:
+        graph.add_conditional_edges("check_table_list", after_check, after_check_targets)
     graph.add_edge("bootstrap_list_tables", "list_tables")
     graph.add_edge("list_tables", "select_schema")
     graph.add_edge("select_schema", "get_schema")
     graph.add_edge("get_schema", "generate_query")
     graph.add_conditional_edges("generate_query", route_after_query_generation)
-    graph.add_edge("run_query", "generate_query")
+    graph.add_conditional_edges(
+        "run_query",
+        make_run_query_router(table_list_router),
+        ["generate_query", "bootstrap_list_tables", "select_schema"],
+    )
 
-    return graph.compile(checkpointer=InMemorySaver())
+    return graph.compile(checkpointer=checkpointer if checkpointer is not None else InMemorySaver())
@@ -0,0 +1,115 @@
+import hashlib
+import re
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+
+# Rough chars-per-token ratio for English text and SQL; close enough for a
+# budget and needs no tokenizer dependency.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_CHARS = 300
+DEDUPED_TOOLS = {"sql_db_list_tables", "sql_db_schema"}
+
+_SAMPLE_ROWS_BLOCK = re.compile(r"\n*/\*\n\d+ rows from .*? table:\n.*?\*/", re.DOTALL)
+
+
+def estimate_tokens(message: AnyMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = len(content) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += len(str(tool_call.get("args", ""))) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+    return tokens
+
+
+def _split_turns(messages: list[AnyMessage]) -> list[list[AnyMessage]]:
+    turns: list[list[AnyMessage]] = [[]]
+    for message in messages:
+        if isinstance(message, HumanMessage) and turns[-1]:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _is_table_list_message(message: AnyMessage) -> bool:
+    if isinstance(message, ToolMessage):
+        return message.name == "sql_db_list_tables"
+    return isinstance(message, AIMessage) and any(
+        tool_call.get("name") == "sql_db_list_tables" for tool_call in message.tool_calls
+    )
+
+
+def summarize_tool_result(message: ToolMessage) -> str:
+    content = str(message.content or "")
+    if message.name == "sql_db_schema":
+        # Follow-up questions need the DDL, not the sample rows.
+        return _SAMPLE_ROWS_BLOCK.sub("", content)
+    if message.name == "sql_db_list_tables" or len(content) <= SUMMARY_CHARS:
+        return content
+    return f"{content[:SUMMARY_CHARS]}... [earlier result truncated from {len(content)} characters]"
+
+
+def _with_content(message: ToolMessage, content: str) -> ToolMessage:
+    additional_kwargs = {**message.additional_kwargs, "compacted": True}
+    return message.model_copy(update={"content": content, "additional_kwargs": additional_kwargs})
+
+
+def compact_history(messages: list[AnyMessage], token_budget: int) -> list[AnyMessage]:
+    """Return the message updates that bring earlier turns of ``messages`` under ``token_budget``.
+
+    Updates reuse the original message ids, so ``add_messages`` replaces them in
+    place. The current turn (from the latest user message on) is never changed.
+    """
+    originals = {message.id: message for message in messages if message.id}
+    turns = _split_turns(messages)
+    earlier = [message for turn in turns[:-1] for message in turn]
+    earlier_ids = {message.id for message in earlier}
+    replacements: dict[str, AnyMessage] = {}
+
+    seen_outputs: set[tuple[str, str]] = set()
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage) or message.name not in DEDUPED_TOOLS or not message.id:
+            continue
+        key = (message.name, hashlib.sha1(str(message.content).encode()).hexdigest())
+        if key in seen_outputs and message.id in earlier_ids:
+            replacements[message.id] = _with_content(
+                message, f"[Same {message.name} output as a later message in this conversation.]"
+            )
+        seen_outputs.add(key)
+
+    for message in earlier:
+        if not isinstance(message, ToolMessage) or not message.id or message.id in replacements:
+            continue
+        if message.additional_kwargs.get("compacted"):
+            continue
+        summary = summarize_tool_result(message)
+        if summary != message.content:
+            replacements[message.id] = _with_content(message, summary)
+
+    replacements = {
+        message_id: replacement
+        for message_id, replacement in replacements.items()
+        if replacement.content != originals[message_id].content
+    }
+    compacted = [replacements.get(message.id, message) for message in messages]
+    total = sum(estimate_tokens(message) for message in compacted)
+
+    removed: list[str] = []
+    for turn in turns[:-1]:
+        if total <= token_budget:
+            break
+        for message in turn:
+            if not message.id or _is_table_list_message(message):
+                continue
+            removed.append(message.id)
+            total -= estimate_tokens(replacements.get(message.id, message))
+
+    updates: list[AnyMessage] = [RemoveMessage(id=message_id) for message_id in removed]
+    removed_ids = set(removed)
+    updates.extend(replacement for message_id, replacement in replacements.items() if message_id not in removed_ids)
+    return updates
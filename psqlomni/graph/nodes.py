@@ -1,12 +1,27 @@
-from typing import Annotated, Callable, TypedDict
+import asyncio
+import time
+from collections.abc import Callable
+from typing import Annotated, Any, TypedDict
+from uuid import uuid4
 
-from langchain_core.messages import AIMessage, AnyMessage, SystemMessage, ToolMessage
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
 from langgraph.graph import END
 from langgraph.graph.message import add_messages
 
+from psqlomni.graph.compaction import compact_history
+
 
 class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
+    table_list_version: str | None
+    table_list_fetched_at: float
 
 
 def bootstrap_list_tables(_: AgentState) -> dict[str, list[AIMessage]]:
@@ -27,40 +42,245 @@ def bootstrap_list_tables(_: AgentState) -> dict[str, list[AIMessage]]:
     }
 
 
-def make_schema_selection_node(llm, get_schema_tool) -> Callable[[AgentState], dict[str, list[AnyMessage]]]:
-    llm_with_schema_tool = llm.bind_tools([get_schema_tool])
+def _table_list_messages(messages: list[AnyMessage]) -> list[AnyMessage]:
+    table_list_messages = []
+    for message in messages:
+        if (isinstance(message, ToolMessage) and message.name == "sql_db_list_tables") or (
+            isinstance(message, AIMessage)
+            and any(tool_call.get("name") == "sql_db_list_tables" for tool_call in message.tool_calls)
+        ):
+            table_list_messages.append(message)
+    return table_list_messages
 
-    def select_schema(state: AgentState) -> dict[str, list[AnyMessage]]:
-        prompt = [
-            SystemMessage(
-                content=(
-                    "You are a SQL assistant. Decide which tables are relevant for the user request, "
-                    "then call sql_db_schema to fetch schema details before writing any SQL query."
-                )
-            )
-        ]
-        response = llm_with_schema_tool.invoke(prompt + state["messages"])
-        if isinstance(response, AIMessage) and not response.tool_calls:
-            table_names = ""
-            for message in reversed(state["messages"]):
+
+def _has_table_list(state: AgentState) -> bool:
+    return any(isinstance(message, ToolMessage) for message in _table_list_messages(state["messages"]))
+
+
+def make_table_list_check_node(
+    catalog_version: Callable[[], str | None] | None = None,
+    ttl_seconds: float = 300.0,
+) -> Callable[[AgentState], dict]:
+    """Read the catalog marker once the thread's table list is older than ``ttl_seconds``.
+
+    An unchanged marker renews the list for another ``ttl_seconds``; a changed
+    or unknown one leaves it expired, so the router fetches it again.
+    """
+
+    def check_table_list(state: AgentState) -> dict:
+        listed = _has_table_list(state)
+        if listed and time.time() - state.get("table_list_fetched_at", 0.0) < ttl_seconds:
+            return {}
+        version = catalog_version() if catalog_version else None
+        if listed and version is not None and version == state.get("table_list_version"):
+            return {"table_list_fetched_at": time.time()}
+        return {"table_list_version": version}
+
+    return check_table_list
+
+
+def bootstrap_table_list(state: AgentState) -> dict:
+    stale = [
+        RemoveMessage(id=message.id)
+        for message in _table_list_messages(state["messages"])
+        if message.id
+    ]
+    update = bootstrap_list_tables(state)
+    update["messages"] = stale + update["messages"]
+    update["table_list_fetched_at"] = time.time()
+    return update
+
+
+def make_table_list_router(ttl_seconds: float = 300.0) -> Callable[[AgentState], str]:
+    def route_table_listing(state: AgentState) -> str:
+        if _has_table_list(state) and time.time() - state.get("table_list_fetched_at", 0.0) < ttl_seconds:
+            return "select_schema"
+        return "bootstrap_list_tables"
+
+    return route_table_listing
+
+
+def make_history_compaction_node(token_budget: int) -> Callable[[AgentState], dict]:
+    def compact_thread_history(state: AgentState) -> dict:
+        updates = compact_history(state["messages"], token_budget)
+        return {"messages": updates} if updates else {}
+
+    return compact_thread_history
+
+
+def _latest_question(messages: list[AnyMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            content = message.content
+            return content if isinstance(content, str) else " ".join(str(item) for item in content)
+    return ""
+
+
+def _schema_selection_prompt(messages: list[AnyMessage], candidates: list[str]) -> list[AnyMessage]:
+    instructions = (
+        "You are a SQL assistant. Decide which tables are relevant for the user request, "
+        "then call sql_db_schema to fetch schema details before writing any SQL query."
+    )
+    if candidates:
+        instructions += (
+            f" Candidate tables, most relevant first: {', '.join(candidates)}. "
+            "Only fetch schema for tables in this list unless the user names another table."
+        )
+        table_list_ids = {id(message) for message in _table_list_messages(messages)}
+        messages = [message for message in messages if id(message) not in table_list_ids]
+    return [SystemMessage(content=instructions)] + messages
+
+
+def _schema_selection_update(
+    messages: list[AnyMessage],
+    candidates: list[str],
+    response: AnyMessage,
+) -> dict[str, list[AnyMessage]]:
+    if isinstance(response, AIMessage) and not response.tool_calls:
+        table_names = ", ".join(candidates)
+        if not table_names:
+            for message in reversed(messages):
                 if isinstance(message, ToolMessage) and message.name == "sql_db_list_tables":
                     table_names = str(message.content or "")
                     break
-            fallback_call = AIMessage(
-                content="",
-                tool_calls=[
-                    {
-                        "name": "sql_db_schema",
-                        "args": {"table_names": table_names},
-                        "id": "schema_fallback_call",
-                        "type": "tool_call",
-                    }
-                ],
-            )
-            return {"messages": [fallback_call]}
-        return {"messages": [response]}
+        fallback_call = AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "sql_db_schema",
+                    "args": {"table_names": table_names},
+                    "id": "schema_fallback_call",
+                    "type": "tool_call",
+                }
+            ],
+        )
+        return {"messages": [fallback_call]}
+    return {"messages": [response]}
 
-    return select_schema
+
+def make_schema_selection_node(
+    llm,
+    get_schema_tool,
+    table_retriever: Callable[[str], list[str]] | None = None,
+    asynchronous: bool = False,
+) -> Callable[[AgentState], dict[str, list[AnyMessage]]]:
+    llm_with_schema_tool = llm.bind_tools([get_schema_tool])
+
+    def select_schema(state: AgentState) -> dict[str, list[AnyMessage]]:
+        messages = state["messages"]
+        candidates = table_retriever(_latest_question(messages)) if table_retriever else []
+        response = llm_with_schema_tool.invoke(_schema_selection_prompt(messages, candidates))
+        return _schema_selection_update(messages, candidates, response)
+
+    async def aselect_schema(state: AgentState) -> dict[str, list[AnyMessage]]:
+        messages = state["messages"]
+        candidates = []
+        if table_retriever:
+            # Retrieval may call an embeddings API synchronously; keep it off the event loop.
+            candidates = await asyncio.to_thread(table_retriever, _latest_question(messages))
+        response = await llm_with_schema_tool.ainvoke(_schema_selection_prompt(messages, candidates))
+        return _schema_selection_update(messages, candidates, response)
+
+    return aselect_schema if asynchronous else select_schema
+
+
+ANSWER_CACHE_CALL_PREFIX = "answer_cache_"
+
+
+def make_answer_cache_node(answer_lookup: Callable[[str, str | None], Any]) -> Callable[[AgentState], dict]:
+    """Offer stored SQL for the first question of a thread.
+
+    Answers are stored for standalone questions only, so a follow-up such as
+    "and for 2023?" is never matched without its context. The catalog
+    version is the one the table-list check recorded for this thread.
+    """
+
+    def lookup_answer_cache(state: AgentState) -> dict:
+        questions = [message for message in state["messages"] if isinstance(message, HumanMessage)]
+        if len(questions) != 1:
+            return {}
+        question = _latest_question(questions)
+        cached = answer_lookup(question, state.get("table_list_version")) if question else None
+        if cached is None:
+            return {}
+        return {
+            "messages": [
+                AIMessage(
+                    content="",
+                    tool_calls=[
+                        {
+                            "name": "sql_db_query",
+                            "args": {"query": cached.sql},
+                            "id": f"{ANSWER_CACHE_CALL_PREFIX}{uuid4().hex}",
+                            "type": "tool_call",
+                        }
+                    ],
+                    response_metadata={
+                        "answer_cache": {"question": cached.question, "similarity": round(cached.similarity, 3)}
+                    },
+                )
+            ]
+        }
+
+    return lookup_answer_cache
+
+
+def _is_cached_answer_call(message: AnyMessage) -> bool:
+    return isinstance(message, AIMessage) and any(
+        str(tool_call.get("id", "")).startswith(ANSWER_CACHE_CALL_PREFIX) for tool_call in message.tool_calls
+    )
+
+
+def make_answer_cache_router(table_list_router: Callable[[AgentState], str]) -> Callable[[AgentState], str]:
+    def route_after_answer_lookup(state: AgentState) -> str:
+        if state["messages"] and _is_cached_answer_call(state["messages"][-1]):
+            return "run_query"
+        return table_list_router(state)
+
+    return route_after_answer_lookup
+
+
+def make_run_query_router(table_list_router: Callable[[AgentState], str]) -> Callable[[AgentState], str]:
+    def route_after_run_query(state: AgentState) -> str:
+        message = state["messages"][-1]
+        declined = isinstance(message, ToolMessage) and str(message.content).startswith(
+            ("Query execution cancelled", "User feedback")
+        )
+        if declined and str(message.tool_call_id).startswith(ANSWER_CACHE_CALL_PREFIX):
+            # The reused SQL was turned down, so answer the question the normal way.
+            return table_list_router(state)
+        return "generate_query"
+
+    return route_after_run_query
+
+
+def _described_tables(messages: list[AnyMessage]) -> list[str]:
+    # Tables fetched with sql_db_schema since the latest user question.
+    names = []
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage):
+            for tool_call in message.tool_calls:
+                if tool_call.get("name") == "sql_db_schema":
+                    table_names = str((tool_call.get("args") or {}).get("table_names", ""))
+                    names.extend(name.strip() for name in table_names.split(",") if name.strip())
+    return list(dict.fromkeys(names))
+
+
+def _table_stats_prompt(summaries: list[str]) -> list[AnyMessage]:
+    if not summaries:
+        return []
+    return [
+        SystemMessage(
+            content=(
+                "Planner statistics for these tables (estimates):\n"
+                + "\n".join(summaries)
+                + "\nPrefer predicates on indexed columns, filter or aggregate large tables before joining them, "
+                "and give every join a join condition."
+            )
+        )
+    ]
 
 
 def make_query_generation_node(
@@ -68,28 +288,41 @@ def make_query_generation_node(
     query_tool,
     db_dialect: str,
     db_name: str,
+    table_stats: Callable[[list[str]], list[str]] | None = None,
+    asynchronous: bool = False,
 ) -> Callable[[AgentState], dict[str, list[AnyMessage]]]:
     llm_with_query_tool = llm.bind_tools([query_tool])
     dialect = (db_dialect or "sql").strip()
     database_name = (db_name or "unknown").strip()
+    prompt = [
+        SystemMessage(
+            content=(
+                f"You are a SQL agent connected to database '{database_name}' using dialect '{dialect}'. "
+                "Generate SQL compatible with this dialect. "
+                "Use sql_db_query to execute SQL when needed. "
+                "Every query execution requires human approval via interrupt. "
+                "If execution is cancelled or feedback is returned, revise the SQL or explain clearly. "
+                "Never make up query results; rely on tool outputs."
+            )
+        )
+    ]
 
     def generate_query_or_answer(state: AgentState) -> dict[str, list[AnyMessage]]:
-        prompt = [
-            SystemMessage(
-                content=(
-                    f"You are a SQL agent connected to database '{database_name}' using dialect '{dialect}'. "
-                    "Generate SQL compatible with this dialect. "
-                    "Use sql_db_query to execute SQL when needed. "
-                    "Every query execution requires human approval via interrupt. "
-                    "If execution is cancelled or feedback is returned, revise the SQL or explain clearly. "
-                    "Never make up query results; rely on tool outputs."
-                )
-            )
-        ]
-        response = llm_with_query_tool.invoke(prompt + state["messages"])
+        messages = state["messages"]
+        summaries = table_stats(_described_tables(messages)) if table_stats else []
+        response = llm_with_query_tool.invoke(prompt + _table_stats_prompt(summaries) + messages)
+        return {"messages": [response]}
+
+    async def agenerate_query_or_answer(state: AgentState) -> dict[str, list[AnyMessage]]:
+        messages = state["messages"]
+        summaries = []
+        if table_stats:
+            # Catalog reads are blocking; keep them off the event loop.
+            summaries = await asyncio.to_thread(table_stats, _described_tables(messages))
+        response = await llm_with_query_tool.ainvoke(prompt + _table_stats_prompt(summaries) + messages)
         return {"messages": [response]}
 
-    return generate_query_or_answer
+    return agenerate_query_or_answer if asynchronous else generate_query_or_answer
 
 
 def route_after_query_generation(state: AgentState) -> str:
@@ -1,5 +1,14 @@
+import importlib.util
+
 from psqlomni.config import AppConfig
 
+# provider -> (module, package, install extra) for providers shipped as extras.
+OPTIONAL_PROVIDER_DEPENDENCIES = {
+    "anthropic": ("langchain_anthropic", "langchain-anthropic", "anthropic"),
+    "google_gemini": ("langchain_google_genai", "langchain-google-genai", "google"),
+    "ollama": ("langchain_ollama", "langchain-ollama", "ollama"),
+}
+
 
 class MissingProviderDependencyError(RuntimeError):
     def __init__(self, provider: str, package: str, install_extra: str):
@@ -16,6 +25,16 @@ def _missing_dependency_message(provider: str, package: str) -> str:
     )
 
 
+def check_provider_dependency(provider: str) -> None:
+    """Raise ``MissingProviderDependencyError`` early, without importing the provider SDK."""
+    dependency = OPTIONAL_PROVIDER_DEPENDENCIES.get(provider)
+    if dependency is None:
+        return
+    module, package, install_extra = dependency
+    if importlib.util.find_spec(module) is None:
+        raise MissingProviderDependencyError(provider, package, install_extra)
+
+
 def build_llm(config: AppConfig):
     provider = config.model_provider
 
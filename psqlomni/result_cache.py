@@ -0,0 +1,234 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_WHITESPACE = re.compile(r"\s+")
+_READ_QUERY = re.compile(r"^(select|with)\b")
+# Reads that write (data-modifying CTEs, SELECT ... FOR UPDATE) or whose
+# result changes between runs are never cached.
+_UNCACHEABLE = re.compile(
+    r"\b(insert|update|delete|merge|into|nextval|setval|random|now|current_date|current_time|"
+    r"current_timestamp|localtime|localtimestamp|clock_timestamp|statement_timestamp|"
+    r"transaction_timestamp|sysdate|gen_random_uuid|pg_sleep)\b"
+)
+_WRITE = re.compile(r"\b(insert|update|delete|merge|truncate|drop|alter|create|grant|revoke)\b")
+_READ_ONLY = re.compile(r"^(select|with|explain|show|describe|pragma)\b")
+_TABLE_REFERENCE = re.compile(
+    r"\b(?:from|join|update|into|table|exists)\s+((?:[\w$]+|\"[^\"]+\")(?:\.(?:[\w$]+|\"[^\"]+\"))*)"
+)
+# First line of a sql_db_query result served from the cache; the renderer
+# looks for it to flag the result on the console.
+CACHED_RESULT_PREFIX = "(cached result from "
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    connection TEXT NOT NULL,
+    tables TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_connection ON results (connection);
+"""
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace, drop trailing semicolons and lowercase everything outside quotes."""
+    parts = _QUOTED.split((query or "").strip().rstrip(";").strip())
+    normalized = "".join(part if index % 2 else _WHITESPACE.sub(" ", part.lower()) for index, part in enumerate(parts))
+    return normalized.strip()
+
+
+def referenced_tables(normalized: str) -> frozenset[str]:
+    """Unqualified, unquoted names of the tables a normalized statement reads or writes."""
+    # String literals can contain anything; blank them before matching.
+    unquoted = re.sub(r"'(?:[^']|'')*'", "''", normalized)
+    names = set()
+    for reference in _TABLE_REFERENCE.findall(unquoted):
+        name = reference.rsplit(".", 1)[-1].strip('"').lower()
+        if name not in {"select", "lateral", "only"}:
+            names.add(name)
+    return frozenset(names)
+
+
+def cached_result_note(age_seconds: float) -> str:
+    return f"{CACHED_RESULT_PREFIX}{age_seconds:.0f}s ago; rows changed since then are not shown)"
+
+
+def is_cacheable(normalized: str) -> bool:
+    unquoted = re.sub(r"'(?:[^']|'')*'", "''", normalized)
+    return bool(_READ_QUERY.match(unquoted)) and not _UNCACHEABLE.search(unquoted)
+
+
+def is_write(normalized: str) -> bool:
+    unquoted = re.sub(r"'(?:[^']|'')*'", "''", normalized)
+    return not _READ_ONLY.match(unquoted) or bool(_WRITE.search(unquoted))
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class _Entry:
+    connection: str
+    tables: frozenset[str]
+    result: str
+    created_at: float
+    size: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.size = len(self.result.encode())
+
+
+class ResultCache:
+    """LRU cache of query results keyed by connection and normalized SQL.
+
+    Entries expire after ``ttl_seconds`` and are dropped as soon as a write
+    through psqlomni touches one of the tables they read. Memory is bounded
+    by the total size of the cached result text. With ``path`` set, results
+    are also kept in a SQLite file so they survive a restart.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_bytes: int = 8_000_000, path: Path | None = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = ResultCacheStats()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.executescript(_DISK_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _key(connection: str, normalized: str) -> str:
+        return hashlib.sha256(f"{connection}\0{normalized}".encode()).hexdigest()
+
+    def get(self, connection: str, query: str) -> str | None:
+        cached = self.get_with_age(connection, query)
+        return cached[0] if cached is not None else None
+
+    def get_with_age(self, connection: str, query: str) -> tuple[str, float] | None:
+        """The cached result and its age in seconds, or None."""
+        normalized = normalize_sql(query)
+        if not is_cacheable(normalized):
+            return None
+        key = self._key(connection, normalized)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.created_at > self.ttl_seconds:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                entry = self._load(key, now)
+                if entry is not None:
+                    self._insert(key, entry)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry.result, now - entry.created_at
+
+    def put(self, connection: str, query: str, result: str) -> None:
+        normalized = normalize_sql(query)
+        if not is_cacheable(normalized):
+            return
+        key = self._key(connection, normalized)
+        entry = _Entry(connection, referenced_tables(normalized), result, time.time())
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._insert(key, entry)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO results (key, connection, tables, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, connection, json.dumps(sorted(entry.tables)), result, entry.created_at),
+                    )
+                    self._conn.execute("DELETE FROM results WHERE created_at < ?", (entry.created_at - self.ttl_seconds,))
+
+    def record(self, connection: str, query: str, result: str | None) -> None:
+        """Cache ``result`` for a read, or invalidate what a write touched.
+
+        Pass ``result=None`` for results that must not be cached (errors,
+        streamed output); writes still invalidate.
+        """
+        normalized = normalize_sql(query)
+        if is_write(normalized):
+            self.invalidate(connection, query)
+        elif result is not None:
+            self.put(connection, query, result)
+
+    def invalidate(self, connection: str, query: str) -> None:
+        """Drop results that a write could have changed.
+
+        Statements whose tables cannot be told (DDL on a schema, procedure
+        calls) drop every result for the connection.
+        """
+        tables = referenced_tables(normalize_sql(query))
+        with self._lock:
+            stale = {
+                key
+                for key, entry in self._entries.items()
+                if entry.connection == connection and (not tables or entry.tables & tables)
+            }
+            for key in stale:
+                self._drop(key)
+            if self._conn is not None:
+                rows = self._conn.execute("SELECT key, tables FROM results WHERE connection = ?", (connection,))
+                disk_stale = {key for key, stored in rows if not tables or set(json.loads(stored)) & tables}
+                with self._conn:
+                    self._conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in disk_stale])
+                stale |= disk_stale
+            self.stats.invalidations += len(stale)
+
+    def _insert(self, key: str, entry: _Entry) -> None:
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.stats.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _load(self, key: str, now: float) -> _Entry | None:
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT connection, tables, result, created_at FROM results WHERE key = ? AND created_at >= ?",
+            (key, now - self.ttl_seconds),
+        ).fetchone()
+        if row is None:
+            return None
+        return _Entry(row[0], frozenset(json.loads(row[1])), row[2], row[3])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy import MetaData, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+SCHEMA_CACHE_VERSION = 1
+
+# Postgres has no DDL timestamps in pg_catalog, so the marker hashes the row
+# versions (xmin) of the catalog rows that DDL rewrites, plus relation OIDs and
+# relfilenodes. Any CREATE/ALTER/DROP/COMMENT in the schema changes the hash.
+_POSTGRES_MARKER_SQL = text(
+    """
+    SELECT md5(
+        coalesce((
+            SELECT string_agg(
+                c.oid::text || ':' || c.relfilenode::text || ':' || c.xmin::text || ':' || c.relnatts::text,
+                ',' ORDER BY c.oid
+            )
+            FROM pg_catalog.pg_class c
+            WHERE c.relnamespace = n.oid AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+        ), '')
+        || '|' || coalesce((
+            SELECT max(a.xmin::text::bigint)::text
+            FROM pg_catalog.pg_attribute a
+            JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+            WHERE c.relnamespace = n.oid AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+        ), '')
+        || '|' || coalesce((
+            SELECT max(k.xmin::text::bigint)::text || ':' || count(*)::text
+            FROM pg_catalog.pg_constraint k
+            WHERE k.connamespace = n.oid
+        ), '')
+        || '|' || coalesce((
+            SELECT max(d.xmin::text::bigint)::text || ':' || count(*)::text
+            FROM pg_catalog.pg_description d
+            JOIN pg_catalog.pg_class c ON c.oid = d.objoid
+            WHERE c.relnamespace = n.oid
+        ), '')
+    )
+    FROM pg_catalog.pg_namespace n
+    WHERE n.nspname = coalesce(:schema, current_schema())
+    """
+)
+
+
+def connection_fingerprint(uri: str, schema: str | None = None) -> str:
+    payload = f"{uri}|{schema or ''}".encode()
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def catalog_marker(engine: Engine, schema: str | None = None) -> str | None:
+    dialect = engine.dialect.name
+    try:
+        with engine.connect() as conn:
+            if dialect == "postgresql":
+                value = conn.execute(_POSTGRES_MARKER_SQL, {"schema": schema}).scalar()
+            elif dialect == "sqlite":
+                value = conn.exec_driver_sql("PRAGMA schema_version").scalar()
+            else:
+                return None
+    except SQLAlchemyError:
+        return None
+    if value is None:
+        return None
+    return f"{dialect}:{value}"
+
+
+@dataclass
+class SchemaCatalogCache:
+    directory: Path
+
+    def path_for(self, fingerprint: str) -> Path:
+        return self.directory / f"{fingerprint}.pickle"
+
+    def load(self, fingerprint: str, marker: str) -> MetaData | None:
+        path = self.path_for(fingerprint)
+        if not path.exists():
+            return None
+        try:
+            with path.open("rb") as handle:
+                entry = pickle.load(handle)
+        except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+            return None
+        if not isinstance(entry, dict):
+            return None
+        if entry.get("version") != SCHEMA_CACHE_VERSION:
+            return None
+        if entry.get("sqlalchemy") != sqlalchemy.__version__:
+            return None
+        if entry.get("marker") != marker:
+            return None
+        metadata = entry.get("metadata")
+        if not isinstance(metadata, MetaData):
+            return None
+        return metadata
+
+    def store(self, fingerprint: str, marker: str, metadata: MetaData) -> None:
+        entry = {
+            "version": SCHEMA_CACHE_VERSION,
+            "sqlalchemy": sqlalchemy.__version__,
+            "marker": marker,
+            "metadata": metadata,
+        }
+        path = self.path_for(fingerprint)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("wb") as handle:
+                pickle.dump(entry, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(path)
+        except (OSError, pickle.PicklingError):
+            return
+
+    def invalidate(self, fingerprint: str) -> None:
+        try:
+            self.path_for(fingerprint).unlink()
+        except FileNotFoundError:
+            return
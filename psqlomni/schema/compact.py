@@ -0,0 +1,98 @@
+import re
+
+from sqlalchemy import Column, Table
+from sqlalchemy.engine import Dialect
+from sqlalchemy.exc import CompileError
+from sqlalchemy.types import NullType
+
+from psqlomni.schema.samples import SAMPLES_PENDING
+
+# Sample values are cut shorter than in the DDL format (100 characters).
+COMPACT_SAMPLE_VALUE_LENGTH = 40
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> set[str]:
+    # Crude stemming so "orders" in a question matches an "order_id" column.
+    return {word[:-1] if len(word) > 3 and word.endswith("s") else word for word in _WORDS.findall(text.lower())}
+
+
+def _columns(table: Table) -> list[Column]:
+    # SQLDatabase.get_table_info drops columns of types SQLAlchemy cannot map, too.
+    return [column for column in table.columns if type(column.type) is not NullType]
+
+
+def relevant_columns(table: Table, question: str, max_columns: int) -> list[Column] | None:
+    """The columns to show when ``table`` has more than ``max_columns``, else None.
+
+    Key columns come first, then the ones sharing a word with ``question``;
+    the table's own column order is kept in the output.
+    """
+    columns = _columns(table)
+    if max_columns <= 0 or len(columns) <= max_columns:
+        return None
+    words = _words(question)
+
+    def score(column: Column) -> tuple[bool, int]:
+        return column.primary_key or bool(column.foreign_keys), len(_words(column.name) & words)
+
+    keep = {column.name for column in sorted(columns, key=score, reverse=True)[:max_columns]}
+    return [column for column in columns if column.name in keep]
+
+
+def _type(column: Column, dialect: Dialect) -> str:
+    try:
+        name = column.type.compile(dialect=dialect)
+    except CompileError:
+        name = str(column.type)
+    return name.lower().replace(" ", "")
+
+
+def compact_table_info(
+    table: Table,
+    dialect: Dialect,
+    columns: list[Column] | None = None,
+    sample_rows: str | None = None,
+) -> str:
+    """One line per table: ``name(col:type*, col:type->other.id, +3 more)``.
+
+    ``*`` marks primary key columns and ``->`` foreign keys. ``sample_rows``
+    is the block ``SQLDatabase._get_sample_rows`` renders; its rows follow on
+    an indented ``e.g.`` line, limited to the shown columns.
+    """
+    all_columns = _columns(table)
+    shown = columns if columns is not None else all_columns
+    entries = []
+    for column in shown:
+        entry = f"{column.name}:{_type(column, dialect)}"
+        if column.primary_key:
+            entry += "*"
+        for foreign_key in column.foreign_keys:
+            entry += f"->{foreign_key.target_fullname}"
+        entries.append(entry)
+    if len(shown) < len(all_columns):
+        entries.append(f"+{len(all_columns) - len(shown)} more")
+    text = f"{table.name}({', '.join(entries)})"
+    if table.comment:
+        text += f"  -- {table.comment}"
+    rows = _sample_values(sample_rows, [column.name for column in shown])
+    if rows:
+        text += f"\n  e.g. {'; '.join('|'.join(row) for row in rows)}"
+    return text
+
+
+def _sample_values(sample_rows: str | None, names: list[str]) -> list[list[str]]:
+    lines = (sample_rows or "").split("\n")
+    if len(lines) < 3 or lines[2] == SAMPLES_PENDING:
+        return []
+    header = lines[1].split("\t")
+    positions = [header.index(name) for name in names if name in header]
+    rows = []
+    for line in lines[2:]:
+        if line:
+            values = line.split("\t")
+            rows.append(
+                [values[position][:COMPACT_SAMPLE_VALUE_LENGTH] for position in positions if position < len(values)]
+            )
+    return rows
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import Table
+
+from psqlomni.schema.compact import compact_table_info, relevant_columns
+from psqlomni.schema.introspection import load_tables
+from psqlomni.schema.samples import SAMPLES_PENDING, SampleRowStore
+
+# Tables are added to the shared MetaData from tool threads; one loader at a time.
+_LOAD_LOCK = threading.Lock()
+
+
+class TableDescriptionCache:
+    """LRU of rendered table descriptions (``CREATE TABLE`` plus sample rows), bounded by total size.
+
+    The app keeps one instance for the whole session, so the tools rebuilt on
+    a provider or model switch reuse what earlier turns rendered. Entries for
+    a connection are dropped when its catalog marker changes.
+    """
+
+    def __init__(self, max_bytes: int = 4_000_000) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._markers: dict[str, str | None] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def validate(self, connection: str, marker: str | None) -> None:
+        with self._lock:
+            if connection in self._markers and self._markers[connection] != marker:
+                self._drop_where(lambda key: key[0] == connection)
+            self._markers[connection] = marker
+
+    def get(self, connection: str, table: str) -> str | None:
+        with self._lock:
+            description = self._entries.get((connection, table))
+            if description is not None:
+                self._entries.move_to_end((connection, table))
+            return description
+
+    def put(self, connection: str, table: str, description: str) -> None:
+        size = len(description.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop_where(lambda key: key == (connection, table))
+            self._entries[(connection, table)] = description
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, oldest = self._entries.popitem(last=False)
+                self._bytes -= len(oldest.encode())
+
+    def invalidate(self, connection: str, tables: Iterable[str] | None = None) -> None:
+        """Drop descriptions of ``tables`` (every table when None) for ``connection``."""
+        names = None if tables is None else {table.lower() for table in tables}
+        with self._lock:
+            self._drop_where(lambda key: key[0] == connection and (names is None or key[1].lower() in names))
+
+    def _drop_where(self, predicate) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            self._bytes -= len(self._entries.pop(key).encode())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def describe_tables(
+    db: SQLDatabase,
+    table_names: list[str],
+    cache: TableDescriptionCache | None,
+    connection: str,
+    samples: SampleRowStore | None = None,
+    schema_format: str = "ddl",
+    question: str = "",
+    max_columns: int = 0,
+) -> str:
+    """``SQLDatabase.get_table_info_no_throw`` that loads and renders only tables not already in ``cache``.
+
+    With a ``samples`` store, a cached description whose sample rows went
+    stale triggers a background refresh; the store's ``on_refresh`` then
+    drops the description so the next call renders the new rows.
+    ``schema_format="compact"`` renders one line per table instead of DDL,
+    showing at most ``max_columns`` columns picked for ``question``.
+    """
+    missing = set(table_names) - set(db.get_usable_table_names())
+    if missing:
+        return f"Error: table_names {missing} not found in database"
+    descriptions = {name: cache.get(connection, name) if cache is not None else None for name in table_names}
+    pending = sorted(name for name, description in descriptions.items() if description is None)
+    if samples is not None:
+        for name, description in descriptions.items():
+            if description is not None:
+                samples.refresh_if_stale(connection, name)
+    cacheable = set()
+    if pending:
+        with _LOAD_LOCK:
+            prefix = f"{db._schema}." if db._schema else ""
+            unloaded = [name for name in pending if prefix + name not in db._metadata.tables]
+            if unloaded and not load_tables(db._engine, db._metadata, unloaded, schema=db._schema):
+                db._metadata.reflect(bind=db._engine, only=unloaded, schema=db._schema, views=db._view_support)
+            for name in pending:
+                if schema_format == "compact":
+                    table = db._metadata.tables[prefix + name]
+                    descriptions[name], pruned = _compact_description(db, table, question, max_columns)
+                else:
+                    descriptions[name], pruned = db.get_table_info([name]), False
+                # Pruned columns depend on the question, and placeholders on timing.
+                if not pruned and SAMPLES_PENDING not in descriptions[name]:
+                    cacheable.add(name)
+        for name in cacheable:
+            if cache is not None:
+                cache.put(connection, name, descriptions[name])
+    separator = "\n" if schema_format == "compact" else "\n\n"
+    return separator.join(sorted(description for description in descriptions.values() if description))
+
+
+def _compact_description(db: SQLDatabase, table: Table, question: str, max_columns: int) -> tuple[str, bool]:
+    if db.dialect == "sqlite" and table.name.startswith("sqlite_"):
+        return "", False
+    columns = relevant_columns(table, question, max_columns)
+    sample_rows = db._get_sample_rows(table) if db._sample_rows_in_table_info else None
+    return compact_table_info(table, db._engine.dialect, columns, sample_rows), columns is not None
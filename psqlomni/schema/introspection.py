@@ -0,0 +1,289 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import sqlalchemy
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    Computed,
+    DefaultClause,
+    FetchedValue,
+    ForeignKeyConstraint,
+    Identity,
+    MetaData,
+    PrimaryKeyConstraint,
+    Table,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.elements import TextClause
+
+# SQLAlchemy recovers these from the CREATE TABLE text (constraint names,
+# CHECK bodies, FK actions, the order of table-level FOREIGN KEY clauses).
+# Tables using them are reflected the usual way so the rendered CREATE TABLE
+# stays identical.
+_SQLITE_NEEDS_DDL_PARSING = re.compile(
+    r"\b(check|constraint|generated|deferrable|on\s+delete|on\s+update)\b", flags=re.IGNORECASE
+)
+_SQLITE_TABLES = "m.type = 'table' AND m.name NOT LIKE 'sqlite~_%' ESCAPE '~'"
+
+
+@dataclass
+class CatalogInfo:
+    """Reflection data for many tables, keyed by table name, in the shapes ``Inspector.get_*`` returns."""
+
+    columns: dict[str, list[dict]] = field(default_factory=dict)
+    pk_constraint: dict[str, dict] = field(default_factory=dict)
+    foreign_keys: dict[str, list[dict]] = field(default_factory=dict)
+    unique_constraints: dict[str, list[dict]] = field(default_factory=dict)
+    check_constraints: dict[str, list[dict]] = field(default_factory=dict)
+    table_comment: dict[str, dict] = field(default_factory=dict)
+    # Tables to reflect one by one instead.
+    fallback: set[str] = field(default_factory=set)
+
+
+def introspect_metadata(engine: Engine, schema: str | None = None) -> MetaData | None:
+    """Build ``MetaData`` for every table in ``schema`` with a constant number of catalog queries.
+
+    Returns None for dialects without a bulk path, or when the catalog
+    queries fail; callers then fall back to ``MetaData.reflect``.
+    """
+    metadata = MetaData()
+    return metadata if load_tables(engine, metadata, schema=schema) else None
+
+
+def load_tables(
+    engine: Engine, metadata: MetaData, table_names: list[str] | None = None, schema: str | None = None
+) -> bool:
+    """Add ``table_names`` (every table when None) and the tables their foreign keys point at to ``metadata``.
+
+    Each round of catalog queries covers all pending tables; referenced
+    tables that are still missing make the next round. Returns False for
+    dialects without a bulk path, or when the catalog queries fail.
+    """
+    if engine.dialect.name == "postgresql":
+        catalog = _postgres_catalog
+    elif engine.dialect.name == "sqlite" and schema is None:
+        catalog = _sqlite_catalog
+    else:
+        return False
+    try:
+        with engine.connect() as connection:
+            names = table_names
+            requested = set(names or ())
+            while names is None or names:
+                build_tables(metadata, catalog(connection, schema, names), connection, schema)
+                if names is None:
+                    break
+                missing = _missing_referred_tables(metadata)
+                names = sorted({name for owner, name in missing if owner == schema} - requested)
+                requested.update(names)
+            # Foreign keys into tables outside the bulk set (another schema, say).
+            for referred_schema, referred_table in _missing_referred_tables(metadata):
+                Table(referred_table, metadata, schema=referred_schema, autoload_with=connection)
+    except SQLAlchemyError:
+        return False
+    return True
+
+
+def build_tables(metadata: MetaData, info: CatalogInfo, connection: Connection, schema: str | None = None) -> None:
+    """Add tables to ``metadata`` the way ``Inspector.reflect_table`` builds them, without querying per table."""
+    for name in info.columns:
+        if name not in info.fallback and _key(schema, name) not in metadata.tables:
+            _build_table(metadata, name, info, schema)
+    for name in sorted(info.fallback):
+        if _key(schema, name) not in metadata.tables:
+            Table(name, metadata, schema=schema, autoload_with=connection)
+
+
+def _key(schema: str | None, name: str) -> str:
+    return f"{schema}.{name}" if schema else name
+
+
+def _missing_referred_tables(metadata: MetaData) -> set[tuple[str | None, str]]:
+    missing = set()
+    for table in list(metadata.tables.values()):
+        for constraint in table.foreign_key_constraints:
+            for element in constraint.elements:
+                referred_schema, referred_table = _split_target(element.target_fullname)
+                if _key(referred_schema, referred_table) not in metadata.tables:
+                    missing.add((referred_schema, referred_table))
+    return missing
+
+
+def _split_target(fullname: str) -> tuple[str | None, str]:
+    parts = fullname.split(".")
+    return (parts[0] if len(parts) > 2 else None), parts[-2]
+
+
+def _build_table(metadata: MetaData, name: str, info: CatalogInfo, schema: str | None) -> Table:
+    table = Table(name, metadata, schema=schema)
+    columns = {}
+    for column_info in info.columns[name]:
+        options = {
+            key: column_info[key]
+            for key in ("nullable", "autoincrement", "quote", "info", "key", "comment")
+            if key in column_info
+        }
+        options.update(column_info.get("dialect_options", {}))
+        args = []
+        default = column_info.get("default")
+        if default is not None:
+            if isinstance(default, FetchedValue):
+                args.append(default)
+            else:
+                args.append(DefaultClause(default if isinstance(default, TextClause) else text(default)))
+        if "computed" in column_info:
+            args.append(Computed(**column_info["computed"]))
+        if "identity" in column_info:
+            args.append(Identity(**column_info["identity"]))
+        columns[column_info["name"]] = column = Column(column_info["name"], column_info["type"], *args, **options)
+        table.append_column(column)
+
+    primary_key = info.pk_constraint.get(name) or {}
+    if primary_key.get("constrained_columns"):
+        table.append_constraint(
+            PrimaryKeyConstraint(
+                *[columns[column] for column in primary_key["constrained_columns"] if column in columns],
+                name=primary_key.get("name"),
+                comment=primary_key.get("comment"),
+                **primary_key.get("dialect_options", {}),
+            )
+        )
+
+    for foreign_key in info.foreign_keys.get(name, []):
+        prefix = [foreign_key["referred_schema"]] if foreign_key["referred_schema"] else []
+        table.append_constraint(
+            ForeignKeyConstraint(
+                [columns[column].key if column in columns else column for column in foreign_key["constrained_columns"]],
+                [".".join([*prefix, foreign_key["referred_table"], column]) for column in foreign_key["referred_columns"]],
+                foreign_key["name"],
+                link_to_name=True,
+                comment=foreign_key.get("comment"),
+                **foreign_key.get("options", {}),
+            )
+        )
+
+    for unique in info.unique_constraints.get(name, []):
+        if unique.get("duplicates_index"):
+            continue
+        table.append_constraint(
+            UniqueConstraint(
+                *[columns.get(column, column) for column in unique["column_names"]],
+                name=unique["name"],
+                comment=unique.get("comment"),
+                **unique.get("dialect_options", {}),
+            )
+        )
+
+    for check in info.check_constraints.get(name, []):
+        table.append_constraint(CheckConstraint(**check))
+
+    comment = info.table_comment.get(name)
+    if comment:
+        table.comment = comment["text"]
+    return table
+
+
+def _postgres_catalog(connection: Connection, schema: str | None, names: list[str] | None) -> CatalogInfo:
+    # The dialect's get_multi_* methods read pg_catalog for all tables at
+    # once and parse types exactly as reflection does; indexes and table
+    # options are skipped because CREATE TABLE text does not show them.
+    inspector = sqlalchemy.inspect(connection)
+
+    def by_name(values: dict) -> dict:
+        return {table_name: value for (_, table_name), value in values.items()}
+
+    return CatalogInfo(
+        columns=by_name(inspector.get_multi_columns(schema=schema, filter_names=names)),
+        pk_constraint=by_name(inspector.get_multi_pk_constraint(schema=schema, filter_names=names)),
+        foreign_keys=by_name(inspector.get_multi_foreign_keys(schema=schema, filter_names=names)),
+        unique_constraints=by_name(inspector.get_multi_unique_constraints(schema=schema, filter_names=names)),
+        check_constraints=by_name(inspector.get_multi_check_constraints(schema=schema, filter_names=names)),
+        table_comment=by_name(inspector.get_multi_table_comment(schema=schema, filter_names=names)),
+    )
+
+
+def _sqlite_catalog(connection: Connection, schema: str | None, names: list[str] | None) -> CatalogInfo:
+    dialect = connection.dialect
+    info = CatalogInfo()
+    tables, params = _SQLITE_TABLES, ()
+    if names is not None:
+        tables += f" AND m.name IN ({', '.join('?' for _ in names)})"
+        params = tuple(names)
+    pragma = "table_xinfo" if dialect.server_version_info >= (3, 31) else "table_info"
+    hidden = "c.hidden" if pragma == "table_xinfo" else "0"
+    rows = connection.exec_driver_sql(
+        f"SELECT m.name, m.sql, c.name, c.type, c.\"notnull\", c.dflt_value, c.pk, {hidden} "
+        f"FROM sqlite_master AS m JOIN pragma_{pragma}(m.name) AS c WHERE {tables}",
+        params,
+    ).all()
+    primary_keys = defaultdict(list)
+    for table, sql, column, type_, notnull, default, pk, hidden_kind in rows:
+        if table not in info.columns:
+            info.columns[table] = []
+            if _SQLITE_NEEDS_DDL_PARSING.search(sql or ""):
+                info.fallback.add(table)
+        if hidden_kind == 1:
+            continue
+        info.columns[table].append(
+            {
+                "name": column,
+                "type": dialect._resolve_type_affinity(type_.upper()),
+                "nullable": not notnull,
+                "default": str(default) if default is not None else None,
+            }
+        )
+        if pk:
+            primary_keys[table].append((pk, column))
+    for table, keys in primary_keys.items():
+        info.pk_constraint[table] = {"constrained_columns": [column for _, column in sorted(keys)], "name": None}
+
+    foreign_keys = defaultdict(dict)
+    table_sql = {}
+    for table, sql, fk_id, referred, local, remote in connection.exec_driver_sql(
+        'SELECT m.name, m.sql, f.id, f."table", f."from", f."to" '
+        f"FROM sqlite_master AS m JOIN pragma_foreign_key_list(m.name) AS f WHERE {tables}",
+        params,
+    ):
+        table_sql[table] = sql or ""
+        foreign_key = foreign_keys[table].setdefault(
+            fk_id,
+            {
+                "name": None,
+                "constrained_columns": [],
+                "referred_schema": None,
+                "referred_table": referred,
+                "referred_columns": [],
+                "options": {},
+            },
+        )
+        foreign_key["constrained_columns"].append(local)
+        if remote:
+            foreign_key["referred_columns"].append(remote)
+    for table, keys in foreign_keys.items():
+        if len(keys) > 1 and re.search(r"foreign\s+key", table_sql[table], flags=re.IGNORECASE):
+            info.fallback.add(table)
+        for foreign_key in keys.values():
+            if not foreign_key["referred_columns"]:
+                if foreign_key["referred_table"] not in info.columns:
+                    # Its primary key is outside this round of queries.
+                    info.fallback.add(table)
+                    continue
+                # No column named in the DDL: the referred table's primary key.
+                referred = info.pk_constraint.get(foreign_key["referred_table"], {})
+                foreign_key["referred_columns"] = list(referred.get("constrained_columns", []))
+        info.foreign_keys[table] = list(keys.values())
+
+    # Whether SQLAlchemy reports a UNIQUE constraint depends on how its DDL
+    # was written, so tables that have one take the per-table path.
+    for (table,) in connection.exec_driver_sql(
+        "SELECT DISTINCT m.name FROM sqlite_master AS m JOIN pragma_index_list(m.name) AS i "
+        f"WHERE {tables} AND i.origin = 'u'",
+        params,
+    ):
+        info.fallback.add(table)
+    return info
@@ -0,0 +1,164 @@
+import hashlib
+import math
+import re
+import zlib
+from collections import Counter
+
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import MetaData
+
+_WORD_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+REFIT_CHANGE_RATIO = 0.1
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for chunk in re.split(r"[^A-Za-z0-9]+", text or ""):
+        if not chunk:
+            continue
+        parts = [part.lower() for part in _WORD_PATTERN.findall(chunk)]
+        tokens.extend(parts)
+        if len(parts) > 1:
+            tokens.append(chunk.lower())
+    return tokens
+
+
+def _features(text: str) -> Counter:
+    features: Counter = Counter()
+    for token in tokenize(text):
+        features[f"w:{token}"] += 1
+        stem = token[:-1] if len(token) > 3 and token.endswith("s") else token
+        padded = f"#{stem}#"
+        for index in range(len(padded) - 2):
+            features[f"g:{padded[index:index + 3]}"] += 0.5
+    return features
+
+
+class HashingEmbeddings(Embeddings):
+    """Feature-hashed bag of words and character trigrams; needs no model or network."""
+
+    def __init__(self, dimensions: int = 512) -> None:
+        self.dimensions = dimensions
+
+    def _bucket(self, feature: str) -> int:
+        return zlib.crc32(feature.encode()) % self.dimensions
+
+    def _weight(self, feature: str, bucket: int) -> float:
+        return 1.0
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        for feature, weight in _features(text).items():
+            bucket = self._bucket(feature)
+            vector[bucket] += weight * self._weight(feature, bucket)
+        norm = math.sqrt(sum(value * value for value in vector))
+        if not norm:
+            return vector
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+class TfidfEmbeddings(HashingEmbeddings):
+    """Hashing embeddings re-weighted by inverse document frequency of the indexed corpus."""
+
+    def __init__(self, dimensions: int = 512) -> None:
+        super().__init__(dimensions)
+        self.idf: dict[int, float] = {}
+
+    def fit(self, texts: list[str]) -> None:
+        document_frequency: Counter = Counter()
+        for text in texts:
+            document_frequency.update({self._bucket(feature) for feature in _features(text)})
+        total = max(len(texts), 1)
+        self.idf = {
+            bucket: math.log((1 + total) / (1 + frequency)) + 1.0
+            for bucket, frequency in document_frequency.items()
+        }
+
+    def _weight(self, feature: str, bucket: int) -> float:
+        return self.idf.get(bucket, 1.0)
+
+
+EMBEDDING_BACKENDS = {
+    "hashing": HashingEmbeddings,
+    "tfidf": TfidfEmbeddings,
+}
+
+
+def build_embeddings(backend: str) -> Embeddings:
+    factory = EMBEDDING_BACKENDS.get((backend or "").strip().lower(), TfidfEmbeddings)
+    return factory()
+
+
+def table_documents(table_names, metadata: MetaData | None = None) -> dict[str, str]:
+    tables = metadata.tables if metadata is not None else {}
+    documents = {}
+    for name in table_names:
+        table = tables.get(name)
+        if table is None:
+            documents[name] = name
+            continue
+        parts = [name, name, table.comment or ""]
+        for column in table.columns:
+            parts.append(column.name)
+            if column.comment:
+                parts.append(column.comment)
+            for foreign_key in column.foreign_keys:
+                parts.append(foreign_key.column.table.name)
+        documents[name] = " ".join(part for part in parts if part)
+    return documents
+
+
+class TableRetrievalIndex:
+    def __init__(self, embeddings: Embeddings | None = None) -> None:
+        self.embeddings = embeddings or TfidfEmbeddings()
+        self._digests: dict[str, str] = {}
+        self._vectors: dict[str, list[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def table_names(self) -> list[str]:
+        return sorted(self._vectors)
+
+    def refresh(self, documents: dict[str, str]) -> int:
+        digests = {name: hashlib.sha1(text.encode()).hexdigest() for name, text in documents.items()}
+        for name in set(self._vectors) - set(documents):
+            self._vectors.pop(name, None)
+            self._digests.pop(name, None)
+
+        changed = [name for name, digest in digests.items() if self._digests.get(name) != digest]
+        if not changed:
+            return 0
+        if hasattr(self.embeddings, "fit") and len(changed) > REFIT_CHANGE_RATIO * len(self._vectors):
+            # Corpus statistics moved enough that every stored vector is stale.
+            self.embeddings.fit(list(documents.values()))
+            changed = list(documents)
+
+        vectors = self.embeddings.embed_documents([documents[name] for name in changed])
+        for name, vector in zip(changed, vectors):
+            self._vectors[name] = vector
+            self._digests[name] = digests[name]
+        return len(changed)
+
+    def search(self, query: str, k: int) -> list[str]:
+        if k <= 0 or not self._vectors:
+            return []
+        if len(self._vectors) <= k:
+            return self.table_names()
+        query_vector = self.embeddings.embed_query(query)
+        query_tokens = set(tokenize(query))
+        scored = []
+        for name, vector in self._vectors.items():
+            score = sum(left * right for left, right in zip(query_vector, vector))
+            if name.lower() in query_tokens:
+                score += 1.0
+            scored.append((score, name))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [name for _, name in scored[:k]]
+
@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import Table, func, literal_column, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
+
+# Shown in place of sample rows whose first fetch is still running.
+SAMPLES_PENDING = "(sample rows are still loading)"
+# Percentage of pages a Postgres TABLESAMPLE SYSTEM scan visits.
+POSTGRES_SAMPLE_PERCENT = 1
+
+
+def fetch_sample_rows(engine: Engine, table: Table, limit: int) -> list[list[str]]:
+    """A few rows of ``table``, read without scanning from its first page.
+
+    Postgres samples random pages with ``TABLESAMPLE SYSTEM``; SQLite starts
+    at a random rowid. Small tables, views and ``WITHOUT ROWID`` tables fall
+    back to ``SELECT ... LIMIT``, as do other dialects.
+    """
+    rows = []
+    with engine.connect() as connection:
+        try:
+            if engine.dialect.name == "postgresql":
+                sampled = table.tablesample(func.system(POSTGRES_SAMPLE_PERCENT))
+                rows = connection.execute(select(sampled).limit(limit)).all()
+            elif engine.dialect.name == "sqlite":
+                rowid = literal_column("rowid")
+                top = connection.execute(select(func.max(rowid)).select_from(table)).scalar()
+                if top:
+                    start = random.randint(1, top)
+                    rows = connection.execute(select(table).where(rowid >= start).limit(limit)).all()
+                    if len(rows) < limit:
+                        # Wrap around to the rows before the starting point.
+                        rows += connection.execute(select(table).where(rowid < start).limit(limit - len(rows))).all()
+        except SQLAlchemyError:
+            connection.rollback()
+            rows = []
+        if len(rows) < limit:
+            try:
+                rows = connection.execute(select(table).limit(limit)).all()
+            except ProgrammingError:
+                # Some dialects raise on empty tables, as SQLDatabase notes.
+                rows = []
+    return [[str(value)[:100] for value in row] for row in rows]
+
+
+def render_sample_rows(table: Table, limit: int, rows: list[list[str]] | None) -> str:
+    """The block ``SQLDatabase._get_sample_rows`` renders; ``rows=None`` marks a fetch still running."""
+    columns = "\t".join(column.name for column in table.columns)
+    body = SAMPLES_PENDING if rows is None else "\n".join("\t".join(row) for row in rows)
+    return f"{limit} rows from {table.name} table:\n{columns}\n{body}"
+
+
+@dataclass
+class _Sample:
+    table: Table
+    text: str
+    fetched_at: float
+
+
+class SampleRowStore:
+    """Per-table sample rows for ``sql_db_schema``, fetched off the request path.
+
+    Samples are kept for ``ttl_seconds``; a stale sample is served while a
+    worker thread fetches its replacement. The first fetch of a table waits
+    at most ``wait_seconds`` before the description goes out with a
+    placeholder. ``on_refresh(connection, table_name)`` runs after each fetch.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        wait_seconds: float = 2.0,
+        on_refresh: Callable[[str, str], None] | None = None,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.on_refresh = on_refresh
+        self._entries: dict[tuple[str, str], _Sample] = {}
+        self._pending: dict[tuple[str, str], Future] = {}
+        self._databases: dict[str, SQLDatabase] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="psqlomni-samples")
+
+    def attach(self, db: SQLDatabase, connection: str) -> None:
+        """Serve ``db``'s sample rows from this store."""
+        self._databases[connection] = db
+        db._get_sample_rows = lambda table: self.sample_rows(connection, table)
+
+    def sample_rows(self, connection: str, table: Table) -> str:
+        key = (connection, table.name)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or self._stale(entry):
+            future = self._refresh(connection, table)
+            if entry is None:
+                wait([future], timeout=self.wait_seconds)
+                with self._lock:
+                    entry = self._entries.get(key)
+        if entry is None:
+            return render_sample_rows(table, self._limit(connection), None)
+        return entry.text
+
+    def refresh_if_stale(self, connection: str, table_name: str) -> None:
+        """Start a background fetch for a stale sample that callers still hold a rendering of."""
+        with self._lock:
+            entry = self._entries.get((connection, table_name))
+        if entry is not None and self._stale(entry):
+            self._refresh(connection, entry.table)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _stale(self, entry: _Sample) -> bool:
+        return time.time() - entry.fetched_at > self.ttl_seconds
+
+    def _limit(self, connection: str) -> int:
+        return self._databases[connection]._sample_rows_in_table_info
+
+    def _refresh(self, connection: str, table: Table) -> Future:
+        key = (connection, table.name)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._executor.submit(self._fetch, connection, table)
+            return future
+
+    def _fetch(self, connection: str, table: Table) -> None:
+        key = (connection, table.name)
+        try:
+            limit = self._limit(connection)
+            try:
+                rows = fetch_sample_rows(self._databases[connection]._engine, table, limit)
+            except (SQLAlchemyError, OSError, ValueError):
+                # Database, network and value conversion errors leave the table without samples.
+                rows = []
+            with self._lock:
+                self._entries[key] = _Sample(table, render_sample_rows(table, limit, rows), time.time())
+        finally:
+            # Anything else fails this fetch only; the next request starts a new one.
+            with self._lock:
+                self._pending.pop(key, None)
+        if self.on_refresh is not None:
+            self.on_refresh(connection, table.name)
@@ -0,0 +1,201 @@
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+# Wide tables would swamp the prompt; the lowest-cardinality columns are the
+# ones worth knowing about when picking filters and GROUP BY keys.
+MAX_DISTINCT_COLUMNS = 8
+
+_POSTGRES_ROWS_SQL = text(
+    """
+    SELECT c.relname, c.reltuples
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = coalesce(:schema, current_schema()) AND c.relname IN :names
+    """
+).bindparams(bindparam("names", expanding=True))
+_POSTGRES_DISTINCT_SQL = text(
+    """
+    SELECT tablename, attname, n_distinct
+    FROM pg_catalog.pg_stats
+    WHERE schemaname = coalesce(:schema, current_schema()) AND tablename IN :names
+    """
+).bindparams(bindparam("names", expanding=True))
+_POSTGRES_INDEX_SQL = text(
+    """
+    SELECT t.relname, ix.indisprimary, pg_catalog.pg_get_indexdef(ix.indexrelid)
+    FROM pg_catalog.pg_index ix
+    JOIN pg_catalog.pg_class t ON t.oid = ix.indrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = coalesce(:schema, current_schema()) AND t.relname IN :names
+    ORDER BY t.relname, ix.indisprimary DESC, ix.indexrelid
+    """
+).bindparams(bindparam("names", expanding=True))
+_POSTGRES_INDEX_DEF = re.compile(r"^CREATE (UNIQUE )?INDEX .*? USING (\w+) \((.*)\)(?: WHERE (.*))?$")
+
+
+@dataclass
+class TableStats:
+    """Planner statistics for one table: estimated rows, distinct values per column and index keys."""
+
+    name: str
+    rows: int | None = None
+    distinct: dict[str, int] = field(default_factory=dict)
+    indexes: list[str] = field(default_factory=list)
+
+    def has_hints(self) -> bool:
+        return self.rows is not None or bool(self.indexes or self.distinct)
+
+    def summary(self) -> str:
+        parts = [f"~{_count(self.rows)} rows" if self.rows is not None else "row count unknown"]
+        if self.indexes:
+            parts.append(f"indexes: {', '.join(self.indexes)}")
+        if self.distinct:
+            columns = sorted(self.distinct.items(), key=lambda item: item[1])[:MAX_DISTINCT_COLUMNS]
+            parts.append(f"distinct values: {', '.join(f'{name}={_count(value)}' for name, value in columns)}")
+        return f"{self.name}: {'; '.join(parts)}"
+
+
+def _count(value: int) -> str:
+    for limit, suffix in ((1_000_000_000, "B"), (1_000_000, "M"), (1_000, "k")):
+        if value >= limit:
+            return f"{value / limit:.1f}".rstrip("0").rstrip(".") + suffix
+    return str(value)
+
+
+def collect_table_stats(engine: Engine, table_names: list[str], schema: str | None = None) -> dict[str, TableStats]:
+    """Read planner statistics for ``table_names`` in a fixed number of catalog queries.
+
+    Postgres reads ``pg_class.reltuples``, ``pg_stats`` and index
+    definitions; SQLite reads ``sqlite_stat1`` (present once ``ANALYZE`` has
+    run) and its index lists. Other dialects, and failed queries, give an
+    empty result: the hints are optional.
+    """
+    if not table_names:
+        return {}
+    try:
+        with engine.connect() as connection:
+            if engine.dialect.name == "postgresql":
+                return _postgres_stats(connection, table_names, schema)
+            if engine.dialect.name == "sqlite" and schema is None:
+                return _sqlite_stats(connection, table_names)
+    except SQLAlchemyError:
+        pass
+    return {}
+
+
+def _postgres_stats(connection: Connection, table_names: list[str], schema: str | None) -> dict[str, TableStats]:
+    params = {"schema": schema, "names": list(table_names)}
+    stats = {}
+    for name, reltuples in connection.execute(_POSTGRES_ROWS_SQL, params):
+        # reltuples is -1 (0 before Postgres 14) until the table is vacuumed or analyzed.
+        stats[name] = TableStats(name, rows=int(reltuples) if reltuples > 0 else None)
+    for name, column, n_distinct in connection.execute(_POSTGRES_DISTINCT_SQL, params):
+        table = stats.setdefault(name, TableStats(name))
+        if n_distinct > 0:
+            table.distinct[column] = int(n_distinct)
+        elif n_distinct < 0 and table.rows is not None:
+            # Negative values are a fraction of the row count.
+            table.distinct[column] = max(1, int(-n_distinct * table.rows))
+    for name, primary, definition in connection.execute(_POSTGRES_INDEX_SQL, params):
+        match = _POSTGRES_INDEX_DEF.match(definition or "")
+        if match is None:
+            continue
+        unique, method, columns, predicate = match.groups()
+        index = f"({columns})" if method == "btree" else f"{method} ({columns})"
+        if primary:
+            index += " primary key"
+        elif unique:
+            index += " unique"
+        if predicate:
+            index += f" where {predicate}"
+        stats.setdefault(name, TableStats(name)).indexes.append(index)
+    return stats
+
+
+def _sqlite_stats(connection: Connection, table_names: list[str]) -> dict[str, TableStats]:
+    placeholders = ", ".join("?" for _ in table_names)
+    params = tuple(table_names)
+    stats = {
+        name: TableStats(name)
+        for (name,) in connection.exec_driver_sql(
+            f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})", params
+        )
+    }
+    primary_keys = {}
+    for name, column in connection.exec_driver_sql(
+        f"SELECT m.name, c.name FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS c "
+        f"WHERE m.type = 'table' AND m.name IN ({placeholders}) AND c.pk > 0 ORDER BY m.name, c.pk",
+        params,
+    ):
+        primary_keys.setdefault(name, []).append(column)
+    for name, columns in primary_keys.items():
+        stats[name].indexes.append(f"({', '.join(columns)}) primary key")
+    # Index name -> (table, first column, unique, partial, columns).
+    first_columns = {}
+    for name, index, unique, partial, column in connection.exec_driver_sql(
+        'SELECT m.name, l.name, l."unique", l.partial, i.name FROM sqlite_master AS m '
+        "JOIN pragma_index_list(m.name) AS l JOIN pragma_index_info(l.name) AS i "
+        f"WHERE m.type = 'table' AND m.name IN ({placeholders}) AND l.origin != 'pk' "
+        "ORDER BY m.name, l.seq, i.seqno",
+        params,
+    ):
+        first_columns.setdefault(index, (name, column, unique, partial, []))[4].append(column)
+    for name, column, unique, partial, columns in first_columns.values():
+        entry = f"({', '.join(columns)})"
+        if unique:
+            entry += " unique"
+        if partial:
+            entry += " partial"
+        stats[name].indexes.append(entry)
+
+    analyzed = connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").first()
+    if analyzed is not None:
+        for name, index, stat in connection.exec_driver_sql(
+            f"SELECT tbl, idx, stat FROM sqlite_stat1 WHERE tbl IN ({placeholders})", params
+        ):
+            # "rows avg_rows_per_key_prefix..." per index, or just "rows" for the table.
+            numbers = [int(value) for value in str(stat).split() if value.isdigit()]
+            if not numbers:
+                continue
+            stats[name].rows = numbers[0]
+            if index in first_columns and len(numbers) > 1 and numbers[1] > 0:
+                stats[name].distinct[first_columns[index][1]] = max(1, numbers[0] // numbers[1])
+    return stats
+
+
+class TableStatsCache:
+    """Per-table statistics summaries, cached for ``ttl_seconds`` and keyed by connection.
+
+    Planner statistics only move after ``ANALYZE`` or autovacuum, so a
+    summary is reused across turns instead of being read for every query.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[tuple[str, str], tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def summaries(self, engine: Engine, connection: str, table_names: list[str], schema: str | None = None) -> list[str]:
+        now = time.time()
+        with self._lock:
+            cached = {
+                name: entry[0]
+                for name in table_names
+                if (entry := self._entries.get((connection, name))) is not None and now - entry[1] <= self.ttl_seconds
+            }
+        missing = [name for name in dict.fromkeys(table_names) if name not in cached]
+        if missing:
+            collected = collect_table_stats(engine, missing, schema)
+            with self._lock:
+                for name in missing:
+                    # Tables without statistics are remembered too, so they are not re-read every turn.
+                    stats = collected.get(name)
+                    cached[name] = stats.summary() if stats is not None and stats.has_hints() else ""
+                    self._entries[(connection, name)] = (cached[name], now)
+        return [cached[name] for name in dict.fromkeys(table_names) if cached[name]]
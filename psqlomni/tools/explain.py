@@ -0,0 +1,148 @@
+import json
+import re
+from dataclasses import asdict, dataclass, field
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from psqlomni.tools.guardrails import SQLGLOT_DIALECTS, _import_sqlglot
+
+EXPLAIN_ACTIONS = ("off", "warn", "block")
+DEFAULT_EXPLAIN_ROW_THRESHOLD = 1_000_000
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+
+
+@dataclass
+class QueryPlan:
+    total_cost: float | None = None
+    estimated_rows: int | None = None
+    # Full scans as {"table": name, "rows": estimated table rows or None}.
+    seq_scans: list[dict] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    def to_payload(self) -> dict:
+        return asdict(self)
+
+
+def explain_query(db: SQLDatabase, query: str, row_threshold: int = DEFAULT_EXPLAIN_ROW_THRESHOLD) -> QueryPlan | None:
+    """Ask the planner about ``query`` without running it.
+
+    Returns None when the dialect is not supported or the statement cannot be
+    explained (DDL, syntax errors, more than one statement); the approval
+    prompt then shows no estimate. The query has not been approved yet, so
+    Postgres explains it in a read-only transaction that is rolled back.
+    """
+    if not is_single_statement(query, db.dialect):
+        return None
+    try:
+        with db._engine.connect() as connection:
+            if db.dialect == "postgresql":
+                connection.execute(text("SET TRANSACTION READ ONLY"))
+                try:
+                    plan = _explain_postgres(connection, query)
+                finally:
+                    connection.rollback()
+            elif db.dialect == "sqlite":
+                plan = _explain_sqlite(connection, query)
+            else:
+                return None
+    except SQLAlchemyError:
+        return None
+    plan.warnings = plan_warnings(plan, row_threshold)
+    return plan
+
+
+def is_single_statement(query: str, dialect: str) -> bool:
+    """Whether ``query`` is exactly one statement; False when that cannot be told.
+
+    psycopg2 runs every statement in the string it is given, so anything
+    after a ``;`` would run along with the ``EXPLAIN``. Without sqlglot, a
+    ``;`` outside string literals and quoted identifiers is enough to refuse.
+    """
+    stripped = (query or "").strip().rstrip(";").strip()
+    if not stripped:
+        return False
+    sqlglot = _import_sqlglot()
+    if sqlglot is None or dialect not in SQLGLOT_DIALECTS:
+        return ";" not in _QUOTED.sub("", stripped)
+    try:
+        statements = sqlglot.parse(stripped, read=SQLGLOT_DIALECTS[dialect])
+    except sqlglot.errors.SqlglotError:
+        return False
+    return len([statement for statement in statements if statement is not None]) == 1
+
+
+def plan_warnings(plan: QueryPlan, row_threshold: int) -> list[str]:
+    if row_threshold <= 0:
+        return []
+    warnings = [
+        f"Sequential scan on {scan['table']} (~{scan['rows']:,} rows)"
+        for scan in plan.seq_scans
+        if scan["rows"] is not None and scan["rows"] >= row_threshold
+    ]
+    if plan.estimated_rows is not None and plan.estimated_rows >= row_threshold:
+        warnings.append(f"Planner estimates ~{plan.estimated_rows:,} result rows")
+    return warnings
+
+
+def _plan_nodes(node: dict):
+    yield node
+    for child in node.get("Plans") or []:
+        yield from _plan_nodes(child)
+
+
+def _explain_postgres(connection, query: str) -> QueryPlan:
+    document = connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+    if isinstance(document, str):
+        document = json.loads(document)
+    root = document[0]["Plan"]
+    plan = QueryPlan(total_cost=root.get("Total Cost"), estimated_rows=root.get("Plan Rows"))
+    scanned = []
+    for node in _plan_nodes(root):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") not in scanned:
+            scanned.append(node["Relation Name"])
+    if scanned:
+        # Plan Rows on a scan node is after filtering; the table size is what
+        # makes a sequential scan expensive.
+        sizes = dict(
+            connection.execute(
+                text("SELECT relname, reltuples FROM pg_class WHERE relname = ANY(:names)"),
+                {"names": scanned},
+            ).all()
+        )
+        for table in scanned:
+            rows = sizes.get(table)
+            plan.seq_scans.append({"table": table, "rows": int(rows) if rows is not None and rows >= 0 else None})
+    return plan
+
+
+def _explain_sqlite(connection, query: str) -> QueryPlan:
+    plan = QueryPlan()
+    for row in connection.execute(text(f"EXPLAIN QUERY PLAN {query}")).all():
+        match = _SQLITE_SCAN.match(str(row[-1]))
+        if not match or match.group(1).upper() in {"CONSTANT", "SUBQUERY"}:
+            continue
+        table = _sqlite_table_for_alias(query, match.group(1))
+        if any(scan["table"] == table for scan in plan.seq_scans):
+            continue
+        plan.seq_scans.append({"table": table, "rows": _sqlite_table_rows(connection, table)})
+    return plan
+
+
+def _sqlite_table_for_alias(query: str, name: str) -> str:
+    # The plan names the alias used in the query ("SCAN u"), not the table.
+    pattern = rf"(?:from|join)\s+[\"`\[]?(\w+)[\"`\]]?\s+(?:as\s+)?{re.escape(name)}\b"
+    match = re.search(pattern, query, flags=re.IGNORECASE)
+    return match.group(1) if match else name
+
+
+def _sqlite_table_rows(connection, table: str) -> int | None:
+    # max(rowid) is an index lookup, unlike count(*); close enough for a warning.
+    try:
+        rows = connection.execute(text(f'SELECT max(rowid) FROM "{table}"')).scalar()
+    except SQLAlchemyError:
+        return None
+    return int(rows or 0)
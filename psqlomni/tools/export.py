@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from langchain_community.utilities import SQLDatabase
+
+from psqlomni.tools.streaming import DEFAULT_BATCH_SIZE, CsvRowSink, stream_query
+
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+# Rows buffered to find a type for columns that start with NULLs.
+SCHEMA_SAMPLE_ROWS = 10_000
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+
+@dataclass
+class ExportResult:
+    path: Path
+    file_format: str
+    row_count: int
+    columns: list[tuple[str, str]]
+
+
+class ArrowRowSink:
+    """Writes batches to one Arrow IPC or Parquet file with a schema fixed up front.
+
+    The schema is inferred once, from the first rows in which every column
+    has a value (or from the first ``SCHEMA_SAMPLE_ROWS``); later batches are
+    converted to it. Columns that are only NULLs by then are written as
+    strings, and decimals get the widest precision at the sampled scale.
+    """
+
+    def __init__(self, path: Path, file_format: str) -> None:
+        self.path = Path(path)
+        self.file_format = file_format
+        self.columns: list[str] = []
+        self.schema = None
+        self._writer = None
+        self._pending: list[tuple] = []
+
+    def write_header(self, columns: list[str]) -> None:
+        self.columns = columns
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        if self._writer is None:
+            self._pending.extend(rows)
+            has_nulls = any(all(value is None for value in column) for column in zip(*self._pending))
+            if has_nulls and len(self._pending) < SCHEMA_SAMPLE_ROWS:
+                return
+            rows, self._pending = self._pending, []
+            self.schema = self._infer_schema(rows)
+            self._open_writer()
+        self._write_batch(rows)
+
+    def _infer_schema(self, rows: list[tuple]):
+        import pyarrow as pa
+
+        values = list(zip(*rows)) or [() for _ in self.columns]
+        fields = []
+        for name, column in zip(self.columns, values):
+            column_type = pa.array(column).type
+            if pa.types.is_null(column_type):
+                column_type = pa.string()
+            elif pa.types.is_decimal(column_type):
+                column_type = pa.decimal128(38, min(column_type.scale, 38))
+            fields.append(pa.field(name, column_type))
+        return pa.schema(fields)
+
+    def _write_batch(self, rows: list[tuple]) -> None:
+        import pyarrow as pa
+
+        arrays = []
+        for column, field in zip(zip(*rows), self.schema):
+            if pa.types.is_string(field.type):
+                column = [None if value is None else str(value) for value in column]
+            try:
+                arrays.append(pa.array(column, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as exc:
+                raise ValueError(f"column {field.name!r} does not fit its exported type {field.type}: {exc}") from exc
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def _open_writer(self) -> None:
+        import pyarrow as pa
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(str(self.path), self.schema)
+        else:
+            self._writer = pa.ipc.new_file(str(self.path), self.schema)
+
+    def close(self) -> None:
+        if self._writer is None and self.columns:
+            rows, self._pending = self._pending, []
+            self.schema = self._infer_schema(rows)
+            self._open_writer()
+            if rows:
+                self._write_batch(rows)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def describe_columns(self) -> list[tuple[str, str]]:
+        if self.schema is None:
+            return [(name, "unknown") for name in self.columns]
+        return [(field.name, str(field.type)) for field in self.schema]
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+
+class TypedCsvRowSink(CsvRowSink):
+    def __init__(self, path: Path) -> None:
+        super().__init__(path)
+        self.columns: list[str] = []
+        self.types: dict[str, str] = {}
+
+    def write_header(self, columns: list[str]) -> None:
+        self.columns = columns
+        super().write_header(columns)
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        for name, values in zip(self.columns, zip(*rows)):
+            if name in self.types:
+                continue
+            value = next((value for value in values if value is not None), None)
+            if value is not None:
+                self.types[name] = type(value).__name__
+        super().write_rows(rows)
+
+    def describe_columns(self) -> list[tuple[str, str]]:
+        return [(name, self.types.get(name, "unknown")) for name in self.columns]
+
+
+def resolve_export_target(path: str) -> tuple[Path, str]:
+    target = Path(path).expanduser()
+    suffix = target.suffix.lower()
+    wants_arrow = suffix in ARROW_SUFFIXES or suffix in PARQUET_SUFFIXES
+    if wants_arrow and _import_pyarrow() is not None:
+        return target, "parquet" if suffix in PARQUET_SUFFIXES else "arrow"
+    if wants_arrow:
+        return target.with_suffix(".csv"), "csv"
+    return target, "csv"
+
+
+def export_query(
+    db: SQLDatabase,
+    query: str,
+    path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ExportResult:
+    target, file_format = resolve_export_target(path)
+    sink = TypedCsvRowSink(target) if file_format == "csv" else ArrowRowSink(target, file_format)
+    try:
+        result = stream_query(db, query, preview_rows=0, sink=sink, batch_size=batch_size)
+    except BaseException:
+        # stream_query has closed the sink; a truncated file would read as a complete export.
+        target.unlink(missing_ok=True)
+        raise
+    if result.returns_rows and not result.row_count:
+        sink.write_header(result.columns)
+        sink.close()
+    return ExportResult(
+        path=target,
+        file_format=file_format,
+        row_count=result.row_count,
+        columns=sink.describe_columns(),
+    )
+
+
+def format_export_result(result: ExportResult) -> str:
+    columns = ", ".join(f"{name} ({column_type})" for name, column_type in result.columns) or "(none)"
+    return (
+        f"Exported {result.row_count} rows to {result.path} ({result.file_format}). "
+        f"Columns: {columns}. The rows themselves are not included here."
+    )
@@ -0,0 +1,139 @@
+import re
+from typing import Any
+
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+from sqlalchemy.exc import SQLAlchemyError
+
+# SQLAlchemy dialect name -> sqlglot dialect name.
+SQLGLOT_DIALECTS = {
+    "postgresql": "postgres",
+    "sqlite": "sqlite",
+    "mysql": "mysql",
+    "mariadb": "mysql",
+    "mssql": "tsql",
+    "oracle": "oracle",
+    "duckdb": "duckdb",
+    "snowflake": "snowflake",
+    "bigquery": "bigquery",
+}
+# Dialects where the subquery + LIMIT fallback is valid SQL.
+LIMIT_DIALECTS = {"postgresql", "sqlite", "mysql", "mariadb", "duckdb"}
+
+_READ_QUERY = re.compile(r"^\s*(select|with)\b", flags=re.IGNORECASE)
+_TRAILING_LIMIT = re.compile(r"\blimit\s+(\d+)(?:\s+offset\s+\d+)?\s*$", flags=re.IGNORECASE)
+
+
+def _import_sqlglot():
+    try:
+        import sqlglot
+    except ImportError:
+        return None
+    return sqlglot
+
+
+def _strip(query: str) -> str:
+    return query.strip().rstrip(";").strip()
+
+
+def limit_query(query: str, dialect: str, row_cap: int) -> str | None:
+    """Rewrite a read query to fetch at most ``row_cap + 1`` rows.
+
+    The extra row tells the caller that the result was cut. Returns None when
+    the query is already bounded, is not a plain read, or cannot be limited
+    safely for ``dialect``.
+    """
+    if row_cap <= 0 or not _READ_QUERY.match(query or ""):
+        return None
+    sqlglot = _import_sqlglot()
+    if sqlglot is not None and dialect in SQLGLOT_DIALECTS:
+        try:
+            return _limit_with_sqlglot(sqlglot, query, SQLGLOT_DIALECTS[dialect], row_cap)
+        except sqlglot.errors.SqlglotError:
+            pass
+    if dialect not in LIMIT_DIALECTS:
+        return None
+    query = _strip(query)
+    existing = _TRAILING_LIMIT.search(query)
+    if existing and int(existing.group(1)) <= row_cap:
+        return None
+    return f"SELECT * FROM (\n{query}\n) AS psqlomni_limited LIMIT {row_cap + 1}"
+
+
+def _limit_with_sqlglot(sqlglot, query: str, dialect: str, row_cap: int) -> str | None:
+    from sqlglot import exp
+
+    tree = sqlglot.parse_one(query, read=dialect)
+    if not isinstance(tree, exp.Query):
+        return None
+    if isinstance(tree, exp.Select) and not tree.args.get("group") and _aggregates(exp, tree):
+        # A plain aggregate returns a single row; nothing to bound.
+        return None
+    limit = tree.args.get("limit")
+    if limit is not None:
+        value = limit.expression
+        if isinstance(value, exp.Literal) and value.is_int and int(value.name) <= row_cap:
+            return None
+    return tree.limit(row_cap + 1).sql(dialect=dialect)
+
+
+def _aggregates(exp, select) -> bool:
+    """Whether a select list item aggregates over the rows of ``select`` itself.
+
+    Aggregates inside window functions or subqueries do not collapse the result.
+    """
+    for projection in select.expressions:
+        for node in projection.find_all(exp.AggFunc):
+            parent = node.parent
+            while parent is not select and not isinstance(parent, (exp.Window, exp.Query)):
+                parent = parent.parent
+            if parent is select:
+                return True
+    return False
+
+
+def format_rows(
+    rows: list[Any],
+    max_string_length: int,
+    row_cap: int,
+    byte_cap: int,
+) -> str:
+    """Format rows like ``SQLDatabase.run`` and add a note when the caps cut them."""
+    fetched = len(rows)
+    if row_cap > 0:
+        rows = rows[:row_cap]
+    formatted = [
+        tuple(truncate_word(value, length=max_string_length) for value in dict(row).values()) for row in rows
+    ]
+    if byte_cap > 0:
+        size = 2
+        for index, row in enumerate(formatted):
+            size += len(repr(row).encode()) + (2 if index else 0)
+            if size > byte_cap:
+                formatted = formatted[:index]
+                break
+    if not formatted and not fetched:
+        return ""
+    text_result = str(formatted)
+    if len(formatted) < fetched:
+        if fetched > len(rows):
+            of = f"more than {len(rows)}"
+        else:
+            of = f"{fetched}"
+        text_result += (
+            f"\n(Showing the first {len(formatted)} of {of} rows; the result was cut to stay within "
+            f"{row_cap} rows / {byte_cap} bytes. Use filters, aggregates or a LIMIT to see specific rows.)"
+        )
+    return text_result
+
+
+def run_capped_query(db: SQLDatabase, query: str, row_cap: int, byte_cap: int) -> str:
+    """Run a read query with the row and byte caps applied; errors come back as text like ``run_no_throw``."""
+    if row_cap <= 0 and byte_cap <= 0:
+        return db.run_no_throw(query)
+    limited = limit_query(query, db.dialect, row_cap)
+    try:
+        rows = db._execute(limited or query)
+    except SQLAlchemyError as exc:
+        return f"Error: {exc}"
+    return format_rows(rows, db._max_string_length, row_cap, byte_cap)
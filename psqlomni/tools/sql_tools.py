@@ -1,11 +1,48 @@
+import asyncio
 import re
-from typing import Any
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Any
 
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_core.tools import BaseTool, tool
 from langchain_community.utilities import SQLDatabase
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import BaseTool, StructuredTool
+from langgraph.prebuilt import InjectedState
 from langgraph.types import interrupt
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
+from psqlomni.engines import ENGINES
+from psqlomni.result_cache import (
+    ResultCache,
+    cached_result_note,
+    is_write,
+    normalize_sql,
+    referenced_tables,
+)
+from psqlomni.schema.cache import catalog_marker, connection_fingerprint
+from psqlomni.schema.descriptions import TableDescriptionCache, describe_tables
+from psqlomni.schema.samples import SampleRowStore
+from psqlomni.tools.explain import (
+    DEFAULT_EXPLAIN_ROW_THRESHOLD,
+    QueryPlan,
+    explain_query,
+)
+from psqlomni.tools.export import export_query, format_export_result
+from psqlomni.tools.guardrails import format_rows, limit_query, run_capped_query
+from psqlomni.tools.streaming import RowSink, format_streamed_result, stream_query
+
+# Bounds the plans kept for approval requests that are never answered.
+MAX_PLANS_AWAITING_DECISION = 32
+
+# Approved queries run here when the tool is called on the main thread: a
+# driver blocked in C (psycopg2, mysqlclient) holds off Python signal
+# handlers, so the ctrl-c handler that cancels the query would only run
+# after it finished.
+_QUERY_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="psqlomni-query")
 
 _MUTATING_SQL_PREFIX = re.compile(
     r"^\s*(insert|update|delete|alter|drop|create|truncate|grant|revoke|comment|merge|upsert)",
@@ -17,52 +54,362 @@ def _is_mutating_query(query: str) -> bool:
     return bool(_MUTATING_SQL_PREFIX.match(query or ""))
 
 
-def _build_interruptible_query_tool(db: SQLDatabase) -> BaseTool:
-    @tool("sql_db_query")
+def _execute_query(
+    db: SQLDatabase,
+    query: str,
+    execution_mode: str,
+    preview_rows: int,
+    row_sink_factory: Callable[[], RowSink] | None,
+    row_cap: int = 0,
+    byte_cap: int = 0,
+) -> Any:
+    ENGINES.take_interruption()
+    with ENGINES.user_query():
+        if _is_mutating_query(query):
+            result = db.run_no_throw(query)
+        elif execution_mode != "stream":
+            result = run_capped_query(db, query, row_cap, byte_cap)
+        else:
+            try:
+                sink = row_sink_factory() if row_sink_factory else None
+                result = format_streamed_result(stream_query(db, query, preview_rows=preview_rows, sink=sink))
+            except (SQLAlchemyError, OSError) as exc:
+                result = f"Error: {exc}"
+    return _interrupted_message(ENGINES.take_interruption()) or result
+
+
+def _off_main_thread(function: Callable[..., Any], *args: Any) -> Any:
+    if threading.current_thread() is not threading.main_thread():
+        return function(*args)
+    # Waiting on the future leaves the main thread free to run signal handlers.
+    return _QUERY_EXECUTOR.submit(function, *args).result()
+
+
+def _is_failed_result(result: Any) -> bool:
+    """Whether a sql_db_query result reports an error, cancellation or timeout instead of rows."""
+    return isinstance(result, str) and result.startswith(("Error", "Query cancelled"))
+
+
+def _interrupted_message(interruption: str | None) -> str | None:
+    if interruption == "cancelled":
+        return "Query cancelled by the user (ctrl-c) before it finished; no results were returned."
+    if interruption == "timeout":
+        return (
+            f"Query cancelled: it ran longer than the {ENGINES.statement_timeout}s statement timeout. "
+            "Narrow it with filters, an index-friendly predicate or a LIMIT, then try again."
+        )
+    return None
+
+
+async def _aexecute_query(
+    db: SQLDatabase,
+    query: str,
+    execution_mode: str,
+    preview_rows: int,
+    row_sink_factory: Callable[[], RowSink] | None,
+    row_cap: int = 0,
+    byte_cap: int = 0,
+) -> Any:
+    engine = None
+    if execution_mode != "stream" or _is_mutating_query(query):
+        engine = ENGINES.get_async(db._engine.url.render_as_string(hide_password=False))
+    if engine is None:
+        # No async driver installed (or a streamed read, whose row sink is
+        # synchronous): run the blocking path on a worker thread instead.
+        return await asyncio.to_thread(
+            _execute_query, db, query, execution_mode, preview_rows, row_sink_factory, row_cap, byte_cap
+        )
+    mutating = _is_mutating_query(query)
+    limited = None if mutating else limit_query(query, db.dialect, row_cap)
+    ENGINES.take_interruption()
+    try:
+        with ENGINES.user_query():
+            async with engine.begin() as connection:
+                result = await connection.execute(text(limited or query))
+                if not result.returns_rows:
+                    return ""
+                rows = result.mappings().all()
+    except SQLAlchemyError as exc:
+        return _interrupted_message(ENGINES.take_interruption()) or f"Error: {exc}"
+    # Same formatting as the sync path, so the model sees identical results in both modes.
+    if mutating:
+        return format_rows(rows, db._max_string_length, 0, 0)
+    return format_rows(rows, db._max_string_length, row_cap, byte_cap)
+
+
+def _approval_request(query: str, plan: QueryPlan | None = None) -> dict:
+    request = {
+        "action": "sql_db_query",
+        "query": query,
+        "is_mutating": _is_mutating_query(query),
+    }
+    if plan is not None:
+        request["plan"] = plan.to_payload()
+    return request
+
+
+def _blocked_message(plan: QueryPlan) -> str:
+    return (
+        f"Query blocked before execution: {'; '.join(plan.warnings)}. "
+        "Narrow it with filters, an index-friendly predicate or a LIMIT, then try again."
+    )
+
+
+def _resolve_decision(query: str, decision: Any) -> tuple[str, str]:
+    """Map an approval decision to ``(action, value)``.
+
+    ``action`` is ``"run"`` (value is the SQL to execute), ``"export"`` (value is
+    the target path) or ``"reply"`` (value is returned to the model as is).
+    """
+    if isinstance(decision, str):
+        return "reply", "Query execution cancelled by user."
+
+    if not isinstance(decision, dict):
+        return "reply", "Query execution cancelled: invalid interrupt response."
+
+    action = str(decision.get("action", "")).lower().strip()
+    if action in {"reject", "cancel"}:
+        return "reply", "Query execution cancelled by user."
+
+    if action in {"feedback", "response"}:
+        message = str(decision.get("message", "Execution cancelled by user feedback.")).strip()
+        return "reply", f"User feedback (no query executed): {message}"
+
+    if action == "export":
+        path = str(decision.get("path", "")).strip()
+        if not path:
+            return "reply", "Query execution cancelled: export requested without a file path."
+        if _is_mutating_query(query):
+            return "reply", "Query execution cancelled: only read queries can be exported."
+        return "export", path
+
+    if action == "edit":
+        edited = str(decision.get("query", "")).strip()
+        if not edited:
+            return "reply", "Query execution cancelled: edit requested without query text."
+        return "run", edited
+
+    if action == "accept":
+        return "run", query
+
+    return "reply", "Query execution cancelled: unknown decision."
+
+
+def _export(db: SQLDatabase, query: str, path: str) -> str:
+    ENGINES.take_interruption()
+    with ENGINES.user_query():
+        try:
+            result = format_export_result(export_query(db, query, path))
+        except (SQLAlchemyError, OSError, ValueError, TypeError) as exc:
+            result = f"Error: {exc}"
+    return _interrupted_message(ENGINES.take_interruption()) or result
+
+
+def _query_result(result: Any) -> Any:
+    if isinstance(result, str) and not result.strip():
+        return "Query executed successfully. Result: no rows returned."
+    return result
+
+
+def _build_interruptible_query_tool(
+    db: SQLDatabase,
+    execution_mode: str = "buffered",
+    preview_rows: int = 20,
+    row_sink_factory: Callable[[], RowSink] | None = None,
+    explain_action: str = "off",
+    explain_row_threshold: int = DEFAULT_EXPLAIN_ROW_THRESHOLD,
+    row_cap: int = 0,
+    byte_cap: int = 0,
+    result_cache: ResultCache | None = None,
+    table_descriptions: TableDescriptionCache | None = None,
+) -> BaseTool:
+    cache_connection = None
+    if result_cache is not None or table_descriptions is not None:
+        cache_connection = _connection_key(db)
+
+    def cached_result(query: str) -> Any:
+        # Streamed results point at row sink output, so only buffered ones are reused.
+        if result_cache is None or execution_mode == "stream":
+            return None
+        cached = result_cache.get_with_age(cache_connection, query)
+        if cached is None:
+            return None
+        result, age = cached
+        return f"{cached_result_note(age)}\n{_query_result(result)}"
+
+    def remember_result(query: str, result: Any) -> None:
+        normalized = normalize_sql(query)
+        if table_descriptions is not None and is_write(normalized):
+            # DDL changes the CREATE TABLE text and DML the sample rows.
+            table_descriptions.invalidate(cache_connection, referenced_tables(normalized) or None)
+        if result_cache is None:
+            return
+        reusable = execution_mode != "stream" and isinstance(result, str) and not _is_failed_result(result)
+        result_cache.record(cache_connection, query, result if reusable else None)
+
+    # The tool body re-runs from the top when the interrupt is resumed. Plans
+    # sent with an approval request are kept until its decision comes back,
+    # so the resumed run reuses them instead of running EXPLAIN again.
+    awaiting_decision: dict[str, QueryPlan | None] = {}
+
+    def preflight(query: str) -> QueryPlan | None:
+        if explain_action == "off":
+            return None
+        if query in awaiting_decision:
+            return awaiting_decision[query]
+        plan = explain_query(db, query, explain_row_threshold)
+        if not (plan is not None and plan.warnings and explain_action == "block"):
+            if len(awaiting_decision) >= MAX_PLANS_AWAITING_DECISION:
+                # Approval requests that were never answered.
+                awaiting_decision.clear()
+            awaiting_decision[query] = plan
+        return plan
+
+    def request_approval(query: str, plan: QueryPlan | None) -> tuple[str, str]:
+        decision = interrupt(_approval_request(query, plan))
+        awaiting_decision.pop(query, None)
+        return _resolve_decision(query, decision)
+
     def interruptible_sql_db_query(query: str) -> Any:
         """Execute a SQL query against the database after human approval."""
-        decision = interrupt(
-            {
-                "action": "sql_db_query",
-                "query": query,
-                "is_mutating": _is_mutating_query(query),
-            }
-        )
+        plan = preflight(query)
+        if plan is not None and plan.warnings and explain_action == "block":
+            return _blocked_message(plan)
+        action, value = request_approval(query, plan)
+        if action == "export":
+            return _off_main_thread(_export, db, query, value)
+        if action == "run":
+            result = cached_result(value)
+            if result is None:
+                result = _off_main_thread(
+                    _execute_query, db, value, execution_mode, preview_rows, row_sink_factory, row_cap, byte_cap
+                )
+                remember_result(value, result)
+            return _query_result(result)
+        return value
+
+    async def ainterruptible_sql_db_query(query: str) -> Any:
+        """Execute a SQL query against the database after human approval."""
+        plan = await asyncio.to_thread(preflight, query)
+        if plan is not None and plan.warnings and explain_action == "block":
+            return _blocked_message(plan)
+        action, value = request_approval(query, plan)
+        if action == "export":
+            return await asyncio.to_thread(_export, db, query, value)
+        if action == "run":
+            result = cached_result(value)
+            if result is None:
+                result = await _aexecute_query(
+                    db, value, execution_mode, preview_rows, row_sink_factory, row_cap, byte_cap
+                )
+                remember_result(value, result)
+            return _query_result(result)
+        return value
 
-        if isinstance(decision, str):
-            return "Query execution cancelled by user."
+    return StructuredTool.from_function(
+        func=interruptible_sql_db_query,
+        coroutine=ainterruptible_sql_db_query,
+        name="sql_db_query",
+    )
 
-        if not isinstance(decision, dict):
-            return "Query execution cancelled: invalid interrupt response."
 
-        action = str(decision.get("action", "")).lower().strip()
-        if action in {"reject", "cancel"}:
-            return "Query execution cancelled by user."
+def _connection_key(db: SQLDatabase) -> str:
+    return connection_fingerprint(db._engine.url.render_as_string(hide_password=False), db._schema)
 
-        if action in {"feedback", "response"}:
-            message = str(decision.get("message", "Execution cancelled by user feedback.")).strip()
-            return f"User feedback (no query executed): {message}"
 
-        query_to_run = query
-        if action == "edit":
-            edited = str(decision.get("query", "")).strip()
-            if not edited:
-                return "Query execution cancelled: edit requested without query text."
-            query_to_run = edited
+class _PrunedSchemaInput(BaseModel):
+    table_names: str = Field(
+        description=(
+            "A comma-separated list of the table names for which to return the schema. "
+            "Example input: 'table1, table2, table3'"
+        )
+    )
+    # Filled in by ToolNode and hidden from the model; pruning needs the question.
+    state: Annotated[dict | None, InjectedState] = None
+
+
+def _latest_question(state: dict | None) -> str:
+    for message in reversed((state or {}).get("messages", [])):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else str(message.content)
+    return ""
 
-        if action in {"accept", "edit"}:
-            result = db.run_no_throw(query_to_run)
-            if isinstance(result, str) and not result.strip():
-                return "Query executed successfully. Result: no rows returned."
-            return result
 
-        return "Query execution cancelled: unknown decision."
+def _build_schema_tool(
+    db: SQLDatabase,
+    base: BaseTool,
+    table_descriptions: TableDescriptionCache | None,
+    sample_store: SampleRowStore | None = None,
+    schema_format: str = "ddl",
+    schema_max_columns: int = 0,
+) -> BaseTool:
+    connection = _connection_key(db)
+    if table_descriptions is not None:
+        table_descriptions.validate(connection, catalog_marker(db._engine, db._schema))
+    pruning = schema_format == "compact" and schema_max_columns > 0
 
-    return interruptible_sql_db_query
+    def sql_db_schema(table_names: str, state: dict | None = None) -> str:
+        return describe_tables(
+            db,
+            [name.strip() for name in table_names.split(",")],
+            table_descriptions,
+            connection,
+            sample_store,
+            schema_format=schema_format,
+            question=_latest_question(state),
+            max_columns=schema_max_columns,
+        )
+
+    # Same name, description and arguments (as the model sees them) as the toolkit tool it replaces.
+    return StructuredTool.from_function(
+        func=sql_db_schema,
+        name=base.name,
+        description=base.description,
+        args_schema=_PrunedSchemaInput if pruning else base.args_schema,
+    )
 
 
-def build_sql_tools(db: SQLDatabase, llm) -> dict[str, BaseTool]:
+def build_sql_tools(
+    db: SQLDatabase,
+    llm,
+    execution_mode: str = "buffered",
+    preview_rows: int = 20,
+    row_sink_factory: Callable[[], RowSink] | None = None,
+    explain_action: str = "off",
+    explain_row_threshold: int = DEFAULT_EXPLAIN_ROW_THRESHOLD,
+    row_cap: int = 0,
+    byte_cap: int = 0,
+    result_cache: ResultCache | None = None,
+    table_descriptions: TableDescriptionCache | None = None,
+    sample_store: SampleRowStore | None = None,
+    schema_format: str = "ddl",
+    schema_max_columns: int = 0,
+) -> dict[str, BaseTool]:
+    if sample_store is not None and db._sample_rows_in_table_info:
+        sample_store.attach(db, _connection_key(db))
+    else:
+        sample_store = None
     toolkit = SQLDatabaseToolkit(db=db, llm=llm)
     tools = {tool.name: tool for tool in toolkit.get_tools()}
-    tools["sql_db_query"] = _build_interruptible_query_tool(db)
+    if table_descriptions is not None or schema_format == "compact":
+        tools["sql_db_schema"] = _build_schema_tool(
+            db,
+            tools["sql_db_schema"],
+            table_descriptions,
+            sample_store,
+            schema_format=schema_format,
+            schema_max_columns=schema_max_columns,
+        )
+    tools["sql_db_query"] = _build_interruptible_query_tool(
+        db,
+        execution_mode=execution_mode,
+        preview_rows=preview_rows,
+        row_sink_factory=row_sink_factory,
+        explain_action=explain_action,
+        explain_row_threshold=explain_row_threshold,
+        row_cap=row_cap,
+        byte_cap=byte_cap,
+        result_cache=result_cache,
+        table_descriptions=table_descriptions,
+    )
     return tools
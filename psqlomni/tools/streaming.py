@@ -0,0 +1,154 @@
+import csv
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Protocol
+
+from langchain_community.utilities import SQLDatabase
+from langchain_community.utilities.sql_database import truncate_word
+from sqlalchemy import text
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class RowSink(Protocol):
+    def write_header(self, columns: list[str]) -> None: ...
+
+    def write_rows(self, rows: list[tuple]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+@dataclass
+class StreamedResult:
+    columns: list[str] = field(default_factory=list)
+    preview: list[tuple] = field(default_factory=list)
+    row_count: int = 0
+    returns_rows: bool = True
+    destination: str | None = None
+
+
+class ConsoleRowSink:
+    def __init__(self, stream=None) -> None:
+        self.stream = stream or sys.stdout
+
+    def write_header(self, columns: list[str]) -> None:
+        self.stream.write("\t".join(columns) + "\n")
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        self.stream.write("".join("\t".join(str(value) for value in row) + "\n" for row in rows))
+        self.stream.flush()
+
+    def close(self) -> None:
+        return None
+
+    def __str__(self) -> str:
+        return "console"
+
+
+class CsvRowSink:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._handle = None
+        self._writer = None
+
+    def write_header(self, columns: list[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(columns)
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+
+class DiscardRowSink:
+    def write_header(self, columns: list[str]) -> None:
+        return None
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    def __str__(self) -> str:
+        return "nowhere"
+
+
+def build_row_sink(target: str) -> RowSink:
+    normalized = (target or "console").strip()
+    if normalized.lower() == "console":
+        return ConsoleRowSink()
+    if normalized.lower() in {"none", "discard"}:
+        return DiscardRowSink()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return CsvRowSink(Path(normalized).expanduser() / f"query-{stamp}.csv")
+
+
+def stream_query(
+    db: SQLDatabase,
+    query: str,
+    preview_rows: int,
+    sink: RowSink | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> StreamedResult:
+    result = StreamedResult(destination=str(sink) if sink is not None else None)
+    with db._engine.connect() as connection:
+        # yield_per implies stream_results: psycopg2 switches to a named
+        # (server-side) cursor and only batch_size rows are held at once.
+        cursor = connection.execution_options(yield_per=batch_size).execute(text(query))
+        if not cursor.returns_rows:
+            connection.commit()
+            result.returns_rows = False
+            result.row_count = max(cursor.rowcount, 0)
+            return result
+
+        result.columns = list(cursor.keys())
+        header_written = False
+        try:
+            for partition in cursor.partitions():
+                rows = [tuple(row) for row in partition]
+                result.row_count += len(rows)
+                needed = preview_rows - len(result.preview)
+                if needed > 0:
+                    result.preview.extend(rows[:needed])
+                    rows = rows[needed:]
+                if rows and sink is not None:
+                    if not header_written:
+                        sink.write_header(result.columns)
+                        header_written = True
+                    sink.write_rows(rows)
+        finally:
+            if sink is not None:
+                sink.close()
+    return result
+
+
+def format_streamed_result(result: StreamedResult, max_string_length: int = 300) -> str:
+    if not result.returns_rows:
+        return f"Query executed successfully. Rows affected: {result.row_count}."
+    if not result.preview:
+        return ""
+    preview = [
+        tuple(truncate_word(value, length=max_string_length) for value in row)
+        for row in result.preview
+    ]
+    text_result = str(preview)
+    if result.row_count > len(result.preview):
+        text_result += (
+            f"\n(Showing the first {len(result.preview)} of {result.row_count} rows; "
+            f"the remaining rows were streamed to {result.destination or 'nowhere'} "
+            "and are not included here.)"
+        )
+    return text_result
+
@@ -0,0 +1,245 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from psqlomni.graph.compaction import estimate_tokens
+
+TRACE_FORMATS = ("jsonl", "chrome")
+
+
+@dataclass
+class SpanStats:
+    calls: int = 0
+    seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    bytes: int = 0
+    rows: int = 0
+
+    def add(self, seconds: float, attrs: dict) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.prompt_tokens += int(attrs.get("prompt_tokens") or 0)
+        self.completion_tokens += int(attrs.get("completion_tokens") or 0)
+        self.bytes += int(attrs.get("bytes") or 0)
+        self.rows += int(attrs.get("rows") or 0)
+
+
+class TraceWriter:
+    """Appends finished spans to a JSON-lines file or a Chrome trace (``chrome://tracing``, Perfetto)."""
+
+    def __init__(self, path: Path, trace_format: str = "jsonl") -> None:
+        self.path = Path(path).expanduser()
+        self.trace_format = trace_format if trace_format in TRACE_FORMATS else "jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = self.path.open("a", encoding="utf-8")
+        if self.trace_format == "chrome" and self._handle.tell() == 0:
+            # The trace viewers accept a JSON array without its closing bracket,
+            # so events can be appended as they finish.
+            self._handle.write("[\n")
+
+    def write(self, event: dict) -> None:
+        if self.trace_format == "chrome":
+            chrome_event = {
+                "name": event["name"],
+                "cat": event["category"],
+                "ph": "X",
+                "ts": round(event["start"] * 1_000_000),
+                "dur": round(event["duration"] * 1_000_000),
+                "pid": os.getpid(),
+                "tid": event["thread"],
+                "args": event["attrs"],
+            }
+            self._handle.write(json.dumps(chrome_event, default=str) + ",\n")
+        else:
+            self._handle.write(json.dumps(event, default=str) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class Tracer:
+    """Aggregates timing spans for the current turn and the whole session.
+
+    Spans are summed into ``turn`` and ``session`` as they finish and are not
+    kept otherwise, so memory stays flat however long the session runs.
+    """
+
+    def __init__(self, writer: TraceWriter | None = None) -> None:
+        self.writer = writer
+        self.turn: dict[tuple[str, str], SpanStats] = {}
+        self.session: dict[tuple[str, str], SpanStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.time()
+        self._handler = None
+
+    def begin_turn(self) -> None:
+        with self._lock:
+            self.turn = {}
+
+    def record(self, category: str, name: str, started: float, seconds: float, attrs: dict | None = None) -> None:
+        attrs = attrs or {}
+        with self._lock:
+            for stats in (self.turn, self.session):
+                stats.setdefault((category, name), SpanStats()).add(seconds, attrs)
+            if self.writer is not None:
+                self.writer.write(
+                    {
+                        "category": category,
+                        "name": name,
+                        "start": started - self._origin,
+                        "duration": seconds,
+                        "thread": threading.get_ident(),
+                        "attrs": attrs,
+                    }
+                )
+
+    @contextmanager
+    def span(self, category: str, name: str, **attrs):
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append((category, attrs))
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            stack.pop()
+            self.record(category, name, started_at, time.perf_counter() - started, attrs)
+
+    def annotate(self, **values) -> None:
+        """Add numeric values to the innermost open span on this thread."""
+        stack = self._local.__dict__.get("stack")
+        if not stack:
+            return
+        attrs = stack[-1][1]
+        for key, value in values.items():
+            attrs[key] = attrs.get(key, 0) + value
+
+    def current_category(self) -> str | None:
+        stack = self._local.__dict__.get("stack")
+        return stack[-1][0] if stack else None
+
+    def callback_handler(self) -> "TracingCallbackHandler":
+        if self._handler is None:
+            self._handler = TracingCallbackHandler(self)
+        return self._handler
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records graph node and chat model runs as tracer spans."""
+
+    def __init__(self, tracer: Tracer) -> None:
+        self.tracer = tracer
+        self._nodes: dict = {}
+        self._llm_calls: dict = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._nodes[run_id] = (node, time.time(), time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        self._finish_node(run_id, {})
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        # Approval interrupts end the node with an error; they are not failures.
+        self._finish_node(run_id, {"interrupted": type(error).__name__ == "GraphInterrupt"})
+
+    def _finish_node(self, run_id, attrs: dict) -> None:
+        started = self._nodes.pop(run_id, None)
+        if started is None:
+            return
+        node, started_at, perf_started = started
+        self.tracer.record("node", node, started_at, time.perf_counter() - perf_started, attrs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs) -> None:
+        node = (metadata or {}).get("langgraph_node") or "llm"
+        prompt_tokens = sum(estimate_tokens(message) for batch in messages for message in batch)
+        self._llm_calls[run_id] = (node, time.time(), time.perf_counter(), prompt_tokens)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        started = self._llm_calls.pop(run_id, None)
+        if started is None:
+            return
+        node, started_at, perf_started, estimated_prompt = started
+        attrs = {"prompt_tokens": estimated_prompt, "completion_tokens": 0, "estimated": True}
+        generations = [generation for batch in response.generations for generation in batch]
+        usage = None
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        if usage:
+            attrs = {
+                "prompt_tokens": usage.get("input_tokens", 0),
+                "completion_tokens": usage.get("output_tokens", 0),
+                "estimated": False,
+            }
+        else:
+            attrs["completion_tokens"] = sum(
+                estimate_tokens(generation.message) if hasattr(generation, "message") else len(generation.text) // 4
+                for generation in generations
+            )
+        self.tracer.record("llm", node, started_at, time.perf_counter() - perf_started, attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        started = self._llm_calls.pop(run_id, None)
+        if started is None:
+            return
+        node, started_at, perf_started, _ = started
+        self.tracer.record("llm", node, started_at, time.perf_counter() - perf_started, {"error": str(error)})
+
+
+def instrument_database(db, tracer: Tracer) -> None:
+    """Trace ``db.run_no_throw`` and direct ``db._execute`` calls, counting rows and bytes."""
+    if db is None or getattr(db, "_psqlomni_tracer", None) is tracer:
+        return
+    run_no_throw = getattr(db, "_psqlomni_run_no_throw", db.run_no_throw)
+    execute = getattr(db, "_psqlomni_execute", getattr(db, "_execute", None))
+
+    @functools.wraps(run_no_throw)
+    def traced_run_no_throw(command, *args, **kwargs):
+        with tracer.span("db", "run_no_throw", sql=str(command)[:200]) as attrs:
+            result = run_no_throw(command, *args, **kwargs)
+            attrs["bytes"] = len(str(result).encode())
+            attrs["error"] = isinstance(result, str) and result.startswith("Error")
+            return result
+
+    db._psqlomni_run_no_throw = run_no_throw
+    db.run_no_throw = traced_run_no_throw
+    db._psqlomni_tracer = tracer
+    if execute is None:
+        return
+
+    @functools.wraps(execute)
+    def traced_execute(command, *args, **kwargs):
+        if tracer.current_category() == "db":
+            result = execute(command, *args, **kwargs)
+            if isinstance(result, list):
+                tracer.annotate(rows=len(result))
+            return result
+        # Called outside run_no_throw (capped reads): give it a span of its own.
+        with tracer.span("db", "execute", sql=str(command)[:200]) as attrs:
+            result = execute(command, *args, **kwargs)
+            if isinstance(result, list):
+                attrs["rows"] = len(result)
+            return result
+
+    db._psqlomni_execute = execute
+    db._execute = traced_execute
+
+
+def build_tracer(trace_file: str | None, trace_format: str = "jsonl") -> Tracer:
+    writer = TraceWriter(Path(trace_file), trace_format) if trace_file else None
+    return Tracer(writer)
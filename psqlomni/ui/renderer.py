@@ -2,10 +2,12 @@ import json
 import os
 import sys
 import textwrap
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 
+from psqlomni.result_cache import CACHED_RESULT_PREFIX
+
 
 @dataclass
 class ConsoleRenderer:
@@ -13,6 +15,8 @@ class ConsoleRenderer:
     max_content_width: int = 1000
     color_enabled: bool = True
     process_faint: bool = True
+    streamed_message_ids: set[str] = field(default_factory=set, init=False, repr=False)
+    _streaming_id: str | None = field(default=None, init=False, repr=False)
 
     def __post_init__(self) -> None:
         if not self.color_enabled:
@@ -41,6 +45,32 @@ class ConsoleRenderer:
         print(f"\n{self._process_label('[AGENT]', 'magenta')}")
         print(self._process_text(text))
 
+    def stream_token(self, message_id: str | None, text: str) -> None:
+        # Whether the message ends in a tool call is only known once it is
+        # complete, so streamed text goes under a header that does not claim
+        # it is the final answer.
+        if not text:
+            return
+        if message_id != self._streaming_id:
+            self.end_stream()
+            print(f"\n{self._colorize('[RESPONSE]', 'green', bold=True)}")
+            self._streaming_id = message_id
+            if message_id:
+                self.streamed_message_ids.add(message_id)
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def start_turn(self) -> None:
+        self.end_stream()
+        self.streamed_message_ids.clear()
+
+    def end_stream(self) -> None:
+        if self._streaming_id is None:
+            return
+        self._streaming_id = None
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+
     def print_tool_call(self, name: str, call_id: str, args: dict) -> None:
         print(f"\n{self._process_label('[TOOL CALL]', 'yellow')}")
         print(self._process_text(f"name: {name}"))
@@ -55,37 +85,85 @@ class ConsoleRenderer:
         print(f"\n{self._process_label(label, 'blue')}")
         print(self._process_text(self._truncate(content)))
 
-    def print_approval_prompt(self, query: str, is_mutating: bool) -> None:
+    def print_cached_answer(self, question: str, similarity: float) -> None:
+        print(f"\n{self._colorize('[CACHED SQL]', 'cyan', bold=True)}")
+        print(self._process_text(f"reusing SQL approved earlier for: {question} (similarity={similarity:.2f})"))
+
+    def print_cached_result(self, note: str) -> None:
+        print(f"\n{self._colorize('[CACHED RESULT]', 'cyan', bold=True)}")
+        print(self._process_text(note.strip("()")))
+
+    def print_approval_prompt(self, query: str, is_mutating: bool, plan: dict | None = None) -> None:
+        self.end_stream()
         print(f"\n{self._colorize('[APPROVAL REQUIRED]', 'red', bold=True)}")
         print(self._process_text("action: sql_db_query"))
         print(self._process_text("sql:"))
         print(self._process_text(query))
-        print(self._process_text("choices: [a]ccept  [e]dit query  [f]eedback  [c]ancel"))
+        if plan:
+            self._print_plan(plan)
+        print(self._process_text("choices: [a]ccept  [e]dit query  [f]eedback  e[x]port (/export <path>)  [c]ancel"))
+
+    def _print_plan(self, plan: dict) -> None:
+        estimate = []
+        if plan.get("total_cost") is not None:
+            estimate.append(f"cost={plan['total_cost']:,.0f}")
+        if plan.get("estimated_rows") is not None:
+            estimate.append(f"rows={plan['estimated_rows']:,}")
+        if estimate:
+            print(self._process_text(f"estimate: {' '.join(estimate)}"))
+        scans = [
+            scan["table"] if scan.get("rows") is None else f"{scan['table']} (~{scan['rows']:,} rows)"
+            for scan in plan.get("seq_scans") or []
+        ]
+        if scans:
+            print(self._process_text(f"full scans: {', '.join(scans)}"))
+        for warning in plan.get("warnings") or []:
+            print(self._colorize(f"warning: {warning}", "yellow", bold=True))
 
     def print_turn_summary(self, tool_calls: int, tool_results: int, approvals: int) -> None:
+        self.end_stream()
         if not self.is_verbose():
             return
         print(f"\n{self._process_label('[TURN SUMMARY]', 'white')}")
         print(self._process_text(f"tool_calls={tool_calls} tool_results={tool_results} approvals={approvals}"))
 
-    def render_message(self, message, seen_messages: set[str]) -> tuple[bool, str | None]:
-        message_id = getattr(message, "id", None)
-        if message_id is None:
-            message_id = (
-                f"{type(message).__name__}|{getattr(message, 'name', '')}|"
-                f"{getattr(message, 'tool_call_id', '')}|{getattr(message, 'content', '')}|"
-                f"{getattr(message, 'tool_calls', '')}"
+    def print_stats(self, turn: dict, session: dict, result_cache=None) -> None:
+        print(f"\n{self._colorize('[STATS]', 'white', bold=True)}")
+        for title, stats in (("last turn", turn), ("session", session)):
+            print(f"{title}:")
+            if not stats:
+                print("  (no data yet)")
+                continue
+            for (category, name), item in sorted(stats.items(), key=lambda entry: -entry[1].seconds):
+                line = f"  {category:<8} {name:<24} calls={item.calls:<4} time={item.seconds * 1000:>9.1f} ms"
+                if item.prompt_tokens or item.completion_tokens:
+                    line += f"  tokens={item.prompt_tokens}/{item.completion_tokens}"
+                if category == "db":
+                    line += f"  rows={item.rows}  bytes={item.bytes}"
+                print(line)
+        if result_cache is not None:
+            print(
+                f"result cache: hits={result_cache.hits} misses={result_cache.misses} "
+                f"evictions={result_cache.evictions} invalidations={result_cache.invalidations}"
             )
 
-        if message_id in seen_messages:
-            return False, None
-        seen_messages.add(message_id)
+    def render_message(self, message, seen_messages: set[str]) -> tuple[bool, str | None]:
+        # Node updates carry each message once; ids only guard against replays.
+        message_id = getattr(message, "id", None)
+        if message_id is not None:
+            if message_id in seen_messages:
+                return False, None
+            seen_messages.add(message_id)
+        self.end_stream()
 
         if isinstance(message, HumanMessage):
             return False, None
 
         if isinstance(message, AIMessage):
             tool_calls = getattr(message, "tool_calls", None) or []
+            cached = (getattr(message, "response_metadata", None) or {}).get("answer_cache")
+            if tool_calls and cached:
+                self.print_cached_answer(cached.get("question", ""), float(cached.get("similarity", 1.0)))
             if tool_calls:
                 if self.is_verbose():
                     self.print_agent("Preparing tool calls.")
@@ -99,16 +177,18 @@ class ConsoleRenderer:
 
             content = self._coerce_content(message.content)
             if content.strip():
-                self.print_final(content)
+                if message_id not in self.streamed_message_ids:
+                    self.print_final(content)
                 return True, content
             return False, None
 
         if isinstance(message, ToolMessage):
+            content = self._coerce_content(message.content)
             if self.is_verbose():
-                self.print_tool_result(
-                    getattr(message, "name", "tool"),
-                    self._coerce_content(message.content),
-                )
+                self.print_tool_result(getattr(message, "name", "tool"), content)
+            elif content.startswith(CACHED_RESULT_PREFIX):
+                # Quiet mode hides tool results, but a reused result should not pass unnoticed.
+                self.print_cached_result(content.split("\n", 1)[0])
             return False, None
 
         return False, None
@@ -0,0 +1,73 @@
+from psqlomni.answer_cache import AnswerCache, normalize_question
+
+
+def test_normalize_question_strips_case_punctuation_and_spacing():
+    assert normalize_question("  Revenue by REGION,   last month? ") == "revenue by region last month"
+
+
+def test_lookup_exact_and_fuzzy_matches(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite", similarity_threshold=0.8)
+    cache.store("conn", "Revenue by region last month", "v1", "SELECT region, sum(amount) FROM sales GROUP BY 1")
+
+    exact = cache.lookup("conn", "revenue by region, last month?", "v1")
+    fuzzy = cache.lookup("conn", "revenue by regions last month", "v1")
+
+    assert exact.sql.startswith("SELECT region")
+    assert exact.similarity == 1.0
+    assert exact.question == "Revenue by region last month"
+    assert fuzzy is not None and 0.8 <= fuzzy.similarity < 1.0
+    assert cache.lookup("conn", "list all customers in berlin", "v1") is None
+    assert cache.lookup("other-conn", "revenue by region last month", "v1") is None
+
+
+def test_schema_change_invalidates_entries(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite")
+    cache.store("conn", "count users", "v1", "SELECT count(*) FROM users")
+
+    assert cache.lookup("conn", "count users", "v2") is None
+    assert cache.lookup("conn", "count users", "v1") is None
+    assert len(cache) == 0
+
+
+def test_store_evicts_least_recently_used(tmp_path, monkeypatch):
+    from psqlomni import answer_cache
+
+    clock = iter(range(100, 200))
+    monkeypatch.setattr(answer_cache.time, "time", lambda: next(clock))
+    cache = AnswerCache(tmp_path / "answers.sqlite", max_entries=2)
+    cache.store("conn", "count users", "v1", "SELECT count(*) FROM users")
+    cache.store("conn", "count orders", "v1", "SELECT count(*) FROM orders")
+    assert cache.lookup("conn", "count users", "v1") is not None
+    cache.store("conn", "count invoices", "v1", "SELECT count(*) FROM invoices")
+
+    assert len(cache) == 2
+    assert cache.lookup("conn", "count orders", "v1") is None
+    assert cache.lookup("conn", "count users", "v1") is not None
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = tmp_path / "answers.sqlite"
+    AnswerCache(path).store("conn", "count users", None, "SELECT count(*) FROM users")
+    assert AnswerCache(path).lookup("conn", "Count users", None).sql == "SELECT count(*) FROM users"
+
+
+def test_fuzzy_match_requires_the_same_negations(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite", similarity_threshold=0.5)
+    cache.store("conn", "How many orders were placed", "v1", "SELECT count(*) FROM orders WHERE placed")
+
+    assert cache.lookup("conn", "how many orders were not placed", "v1") is None
+    assert cache.lookup("conn", "how many orders weren't placed", "v1") is None
+    assert cache.lookup("conn", "how many orders were placed without a coupon", "v1") is None
+    assert cache.lookup("conn", "how many orders were placed?", "v1") is not None
+
+
+def test_fuzzy_match_requires_the_same_numbers_and_dates(tmp_path):
+    cache = AnswerCache(tmp_path / "answers.sqlite", similarity_threshold=0.5)
+    cache.store("conn", "Top 10 customers by revenue in 2023", "v1", "SELECT 1")
+    cache.store("conn", "Orders placed on 2024-01-05", "v1", "SELECT 2")
+
+    assert cache.lookup("conn", "top 5 customers by revenue in 2023", "v1") is None
+    assert cache.lookup("conn", "top 10 customers by revenue in 2024", "v1") is None
+    assert cache.lookup("conn", "orders placed on 2024-01-06", "v1") is None
+    assert cache.lookup("conn", "top 10 customer by revenue in 2023", "v1").sql == "SELECT 1"
+    assert cache.lookup("conn", "orders that were placed on 2024-01-05", "v1").sql == "SELECT 2"
@@ -0,0 +1,28 @@
+from benchmarks import fixtures
+from benchmarks.harness import Recorder, quiet
+from benchmarks.scenarios import SCENARIOS
+
+
+def test_benchmark_scenarios_run_offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(fixtures, "FIXTURE_DIR", tmp_path)
+    monkeypatch.setattr(fixtures, "LARGE_RESULT_ROWS", 50)
+    options = {"turns": 3, "config": {"checkpoint_backend": "memory"}}
+
+    for name, scenario in SCENARIOS.items():
+        recorder = Recorder()
+        with quiet():
+            scenario(recorder, 3, options)
+        assert recorder.phases, name
+        assert recorder.timer.calls["generate_query"] >= 1, name
+
+
+def test_schema_format_benchmark_compares_token_counts(tmp_path, monkeypatch):
+    from benchmarks import schema_format
+
+    monkeypatch.setattr(fixtures, "FIXTURE_DIR", tmp_path)
+    monkeypatch.setattr(fixtures, "LARGE_RESULT_ROWS", 50)
+
+    ddl, compact = schema_format.run(tables=3, described=3, turns=2)
+
+    assert (ddl["format"], compact["format"]) == ("ddl", "compact")
+    assert compact["schema_tokens"] < ddl["schema_tokens"]
@@ -0,0 +1,116 @@
+import sqlite3
+import stat
+from types import SimpleNamespace
+
+from langgraph.types import Command
+
+from psqlomni import app as app_mod
+from psqlomni.answer_cache import CachedAnswer
+from psqlomni.graph.builder import build_sql_graph
+from psqlomni.graph.checkpoint import SqliteCheckpointSaver
+from psqlomni.tools.sql_tools import build_sql_tools
+from tests.test_graph_builder import ScriptedLLM, _sqlite_db
+
+
+def _graph(db, checkpointer, answer_lookup=None):
+    llm = ScriptedLLM()
+    return build_sql_graph(
+        llm,
+        build_sql_tools(db, llm),
+        db_dialect="sqlite",
+        db_name="app",
+        answer_lookup=answer_lookup,
+        checkpointer=checkpointer,
+    )
+
+
+def test_checkpointer_uses_wal_mode(tmp_path):
+    path = tmp_path / "checkpoints.sqlite"
+    SqliteCheckpointSaver(path).close()
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_thread_resumes_after_restart(tmp_path):
+    db = _sqlite_db(tmp_path)
+    path = tmp_path / "checkpoints.sqlite"
+    config = {"configurable": {"thread_id": "t1"}}
+
+    saver = SqliteCheckpointSaver(path)
+    first = _graph(db, saver)
+    first.invoke({"messages": [("user", "how many users?")]}, config=config)
+    message_count = len(first.get_state(config).values["messages"])
+    saver.close()
+
+    reopened = SqliteCheckpointSaver(path)
+    second = _graph(db, reopened)
+    assert reopened.has_thread("t1")
+    assert reopened.list_threads() == ["t1"]
+    assert len(second.get_state(config).values["messages"]) == message_count
+
+    second.invoke({"messages": [("user", "and now?")]}, config=config)
+    assert len(second.get_state(config).values["messages"]) > message_count
+
+
+def test_interrupt_can_be_resumed_after_restart(tmp_path):
+    db = _sqlite_db(tmp_path)
+    path = tmp_path / "checkpoints.sqlite"
+    config = {"configurable": {"thread_id": "t1"}}
+    lookup = lambda question, _version: CachedAnswer(question, "SELECT count(*) FROM users", 1.0)
+
+    saver = SqliteCheckpointSaver(path)
+    result = _graph(db, saver, lookup).invoke({"messages": [("user", "how many users?")]}, config=config)
+    assert "__interrupt__" in result
+    saver.close()
+
+    graph = _graph(db, SqliteCheckpointSaver(path), lookup)
+    graph.invoke(Command(resume={"action": "accept"}), config=config)
+
+    results = [m for m in graph.get_state(config).values["messages"] if getattr(m, "name", None) == "sql_db_query"]
+    assert results and "0" in results[-1].content
+
+
+def test_superseded_checkpoints_are_pruned(tmp_path):
+    db = _sqlite_db(tmp_path)
+    saver = SqliteCheckpointSaver(tmp_path / "checkpoints.sqlite", retention=3)
+    graph = _graph(db, saver)
+    config = {"configurable": {"thread_id": "t1"}}
+
+    for turn in range(4):
+        graph.invoke({"messages": [("user", f"question {turn}")]}, config=config)
+
+    assert len(list(saver.list(config))) == 3
+    assert len(graph.get_state(config).values["messages"]) > 4
+
+    saver.delete_thread("t1")
+    assert not saver.has_thread("t1")
+
+
+def test_least_recent_threads_beyond_the_cap_are_dropped(tmp_path):
+    db = _sqlite_db(tmp_path)
+    path = tmp_path / "checkpoints.sqlite"
+    saver = SqliteCheckpointSaver(path, max_threads=2)
+    graph = _graph(db, saver)
+
+    for thread_id in ("t1", "t2", "t3"):
+        graph.invoke({"messages": [("user", "how many users?")]}, config={"configurable": {"thread_id": thread_id}})
+
+    assert saver.list_threads() == ["t3", "t2"]
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_memory_backend_is_pruned_without_touching_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_mod, "CACHE_DIR", tmp_path / "cache")
+    app = app_mod.PSqlomni.__new__(app_mod.PSqlomni)
+    app.config = SimpleNamespace(checkpoint_backend="memory", checkpoint_retention=3, checkpoint_max_threads=2)
+    saver = app._build_checkpointer()
+    graph = _graph(_sqlite_db(tmp_path), saver)
+
+    for thread_id in ("t1", "t2", "t3"):
+        for turn in range(3):
+            graph.invoke({"messages": [("user", f"question {turn}")]}, config={"configurable": {"thread_id": thread_id}})
+
+    assert saver.list_threads() == ["t3", "t2"]
+    assert len(list(saver.list({"configurable": {"thread_id": "t3"}}))) == 3
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,71 @@
+import sqlite3
+
+from langchain_community.utilities import SQLDatabase
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+from sqlalchemy import create_engine
+
+from psqlomni.schema.compact import compact_table_info, relevant_columns
+from psqlomni.tools.sql_tools import build_sql_tools
+
+
+def _db(tmp_path, **kwargs) -> SQLDatabase:
+    path = tmp_path / "app.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(40));
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id), total NUMERIC(10, 2),
+                status TEXT, shipped_at TEXT, notes TEXT);
+            INSERT INTO users VALUES (1, 'ada');
+            INSERT INTO orders VALUES (1, 1, 9.5, 'paid', NULL, 'gift');
+            """
+        )
+    return SQLDatabase(create_engine(f"sqlite:///{path}"), **kwargs)
+
+
+def test_compact_table_info_marks_keys_and_is_shorter_than_ddl(tmp_path):
+    db = _db(tmp_path, sample_rows_in_table_info=3)
+    table = db._metadata.tables["orders"]
+
+    compact = compact_table_info(table, db._engine.dialect, sample_rows=db._get_sample_rows(table))
+
+    assert compact == (
+        "orders(id:integer*, user_id:integer->users.id, total:numeric(10,2), status:text, shipped_at:text, notes:text)"
+        "\n  e.g. 1|1|9.50|paid|None|gift"
+    )
+    assert len(compact) < len(db.get_table_info(["orders"])) / 2
+
+
+def test_relevant_columns_keeps_keys_and_columns_named_in_the_question(tmp_path):
+    table = _db(tmp_path)._metadata.tables["orders"]
+
+    kept = relevant_columns(table, "Which orders shipped late?", 3)
+
+    assert [column.name for column in kept] == ["id", "user_id", "shipped_at"]
+    assert relevant_columns(table, "anything", 6) is None
+
+
+def test_compact_schema_tool_prunes_columns_for_the_question_in_a_graph(tmp_path):
+    db = _db(tmp_path, sample_rows_in_table_info=0)
+    tools = build_sql_tools(db, FakeListChatModel(responses=[]), schema_format="compact", schema_max_columns=3)
+    graph = StateGraph(MessagesState)
+    graph.add_node("get_schema", ToolNode([tools["sql_db_schema"]]))
+    graph.add_edge(START, "get_schema")
+    graph.add_edge("get_schema", END)
+    call = AIMessage(
+        content="",
+        tool_calls=[
+            {"name": "sql_db_schema", "args": {"table_names": "orders, users"}, "id": "s1", "type": "tool_call"}
+        ],
+    )
+
+    result = graph.compile().invoke({"messages": [HumanMessage(content="Total of paid orders?"), call]})
+
+    assert "state" not in tools["sql_db_schema"].tool_call_schema.model_json_schema()["properties"]
+    assert result["messages"][-1].content == (
+        "orders(id:integer*, user_id:integer->users.id, total:numeric(10,2), +3 more)\n"
+        "users(id:integer*, name:varchar(40))"
+    )
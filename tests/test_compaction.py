@@ -0,0 +1,78 @@
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langgraph.graph.message import add_messages
+
+from psqlomni.graph.compaction import SUMMARY_CHARS, compact_history, estimate_tokens
+
+SCHEMA = (
+    "\nCREATE TABLE users (\n\tid INTEGER, \n\tname TEXT\n)\n\n"
+    "/*\n3 rows from users table:\nid\tname\n1\tada\n2\tbob\n3\tcy\n*/"
+)
+
+
+def _tool_turn(question: str, tool_name: str, content: str, index: int) -> list:
+    return [
+        HumanMessage(content=question, id=f"h{index}"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": tool_name, "args": {}, "id": f"call{index}", "type": "tool_call"}],
+            id=f"a{index}",
+        ),
+        ToolMessage(content=content, name=tool_name, tool_call_id=f"call{index}", id=f"t{index}"),
+    ]
+
+
+def _thread() -> list:
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "sql_db_list_tables", "args": {}, "id": "list_tables_call", "type": "tool_call"}],
+            id="list-call",
+        ),
+        ToolMessage(content="users", name="sql_db_list_tables", tool_call_id="list_tables_call", id="list-result"),
+        *_tool_turn("who signed up?", "sql_db_schema", SCHEMA, 1),
+        *_tool_turn("list them", "sql_db_query", str([(i, "x" * 20) for i in range(100)]), 2),
+        *_tool_turn("and again?", "sql_db_schema", SCHEMA, 3),
+    ]
+
+
+def test_compaction_summarizes_and_dedupes_earlier_tool_results():
+    messages = _thread()
+
+    updates = {message.id: message for message in compact_history(messages, token_budget=100_000)}
+
+    assert "Same sql_db_schema output" in updates["t1"].content
+    assert len(updates["t2"].content) < SUMMARY_CHARS + 80
+    assert "truncated" in updates["t2"].content
+    assert "t3" not in updates
+    assert not any(isinstance(message, RemoveMessage) for message in updates.values())
+
+
+def test_compaction_strips_sample_rows_from_earlier_schema_output():
+    messages = _tool_turn("who signed up?", "sql_db_schema", SCHEMA, 1) + [HumanMessage(content="next", id="h9")]
+
+    (update,) = compact_history(messages, token_budget=100_000)
+
+    assert "CREATE TABLE users" in update.content
+    assert "rows from users table" not in update.content
+
+
+def test_compaction_drops_oldest_turns_but_keeps_table_list_and_current_turn():
+    messages = _thread()
+
+    updates = compact_history(messages, token_budget=120)
+    compacted = add_messages(messages, updates)
+
+    ids = [message.id for message in compacted]
+    assert "list-call" in ids and "list-result" in ids
+    assert "h1" not in ids and "t1" not in ids
+    assert ids[-3:] == ["h3", "a3", "t3"]
+    assert sum(estimate_tokens(message) for message in compacted) < sum(
+        estimate_tokens(message) for message in messages
+    )
+
+
+def test_compaction_is_a_no_op_once_compacted():
+    messages = _thread()
+    compacted = add_messages(messages, compact_history(messages, token_budget=100_000))
+
+    assert compact_history(compacted, token_budget=100_000) == []
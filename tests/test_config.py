@@ -1,3 +1,4 @@
+import json
 from argparse import Namespace
 
 from psqlomni import config as cfg
@@ -101,6 +102,26 @@ def test_resolve_app_config_db_uri_from_cli(monkeypatch, tmp_path):
     assert app.db_dialect == "sqlite"
 
 
+def test_resolve_app_config_saves_only_explicit_tuning_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(cfg, "CONFIG_FILE", tmp_path / "psqlomni.json")
+    monkeypatch.setattr(cfg, "_validate_connection", lambda _: None)
+    cfg.CONFIG_FILE.write_text('{"result_row_cap": 50}', encoding="utf-8")
+
+    monkeypatch.setenv("MODEL_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "ok_test")
+    monkeypatch.setenv("MODEL", "gpt-4.1-mini")
+    monkeypatch.setenv("SAMPLE_ROWS_IN_TABLE_INFO", "3")
+    monkeypatch.setenv("SCHEMA_FORMAT", "compact")
+
+    cfg.resolve_app_config(_args(db_uri="sqlite:///:memory:"))
+
+    saved = json.loads(cfg.CONFIG_FILE.read_text(encoding="utf-8"))
+    assert saved["result_row_cap"] == 50
+    assert saved["schema_format"] == "compact"
+    assert "query_timeout_seconds" not in saved
+    assert "checkpoint_backend" not in saved
+
+
 def test_save_model_config_updates_existing_file(monkeypatch, tmp_path):
     monkeypatch.setattr(cfg, "CONFIG_FILE", tmp_path / "psqlomni.json")
     cfg.CONFIG_FILE.write_text(
@@ -0,0 +1,54 @@
+import sqlite3
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import MetaData, create_engine, event
+
+from psqlomni.schema.descriptions import TableDescriptionCache, describe_tables
+
+SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id), total REAL);
+CREATE TABLE audit (id INTEGER PRIMARY KEY, note TEXT);
+INSERT INTO users VALUES (1, 'ada');
+INSERT INTO orders VALUES (1, 1, 9.5);
+"""
+
+
+def _lazy_db(tmp_path) -> SQLDatabase:
+    path = tmp_path / "app.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+    return SQLDatabase(create_engine(f"sqlite:///{path}"), metadata=MetaData(), lazy_table_reflection=True)
+
+
+def test_describe_tables_loads_only_requested_tables_and_reuses_rendered_text(tmp_path):
+    db = _lazy_db(tmp_path)
+    eager = SQLDatabase(create_engine(db._engine.url))
+    cache = TableDescriptionCache()
+    statements = []
+    event.listen(db._engine, "before_cursor_execute", lambda _conn, _cursor, statement, *_: statements.append(statement))
+
+    described = describe_tables(db, ["orders"], cache, "conn")
+
+    assert described == eager.get_table_info(["orders"])
+    assert "audit" not in db._metadata.tables
+    statements.clear()
+    assert describe_tables(db, ["orders"], cache, "conn") == described
+    assert statements == []
+    assert describe_tables(db, ["missing"], cache, "conn") == "Error: table_names {'missing'} not found in database"
+
+
+def test_table_description_cache_is_bounded_and_invalidated():
+    cache = TableDescriptionCache(max_bytes=10)
+    cache.put("conn", "a", "12345")
+    cache.put("conn", "b", "12345")
+    assert cache.get("conn", "a") == "12345"
+    cache.put("conn", "c", "12345")
+    assert cache.get("conn", "b") is None
+    assert len(cache) == 2
+
+    cache.invalidate("conn", ["A"])
+    assert cache.get("conn", "a") is None
+    cache.validate("conn", "v1")
+    cache.validate("conn", "v2")
+    assert len(cache) == 0
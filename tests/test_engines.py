@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from psqlomni import config as cfg
+from psqlomni import db as db_mod
+from psqlomni.engines import ENGINES, EngineManager
+from tests.test_db import _config
+
+
+def test_engine_is_shared_by_validation_and_sql_database(monkeypatch, tmp_path):
+    monkeypatch.setattr(db_mod, "CACHE_DIR", tmp_path / "cache")
+    uri = f"sqlite:///{tmp_path / 'app.db'}"
+
+    cfg._validate_connection(uri)
+    db = db_mod.build_sql_database(_config(db_uri=uri, db_dialect="sqlite", schema_cache=False))
+
+    assert db._engine is ENGINES.get(uri)
+    ENGINES.discard(uri)
+
+
+def test_failed_validation_drops_the_engine(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'missing' / 'app.db'}"
+
+    with pytest.raises(OperationalError):
+        cfg._validate_connection(uri)
+
+    assert uri not in ENGINES._engines
+
+
+def test_server_engines_use_configured_queue_pool():
+    manager = EngineManager()
+    manager.configure(pool_size=3, pool_recycle=60)
+
+    options = manager.engine_options("postgresql://alice@db.internal:5432/app")
+
+    assert options["poolclass"] is QueuePool
+    assert (options["pool_size"], options["pool_recycle"], options["pool_pre_ping"]) == (3, 60, True)
+    assert manager.engine_options("sqlite:///app.db") == {}
+    with pytest.raises(TypeError):
+        manager.configure(pool_timeout=1)
+
+
+def test_engines_are_cached_per_uri(tmp_path):
+    manager = EngineManager()
+    first = manager.get(f"sqlite:///{tmp_path / 'a.db'}")
+    second = manager.get(f"sqlite:///{tmp_path / 'b.db'}")
+
+    assert manager.get(f"sqlite:///{tmp_path / 'a.db'}") is first
+    assert second is not first
+    manager.dispose_all()
+    assert manager._engines == {}
+
+
+RUNAWAY_QUERY = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+def test_sqlite_statement_timeout_stops_runaway_queries(tmp_path):
+    manager = EngineManager(statement_timeout=0.2)
+    engine = manager.get(f"sqlite:///{tmp_path / 'app.db'}")
+
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text(RUNAWAY_QUERY))
+        assert manager.take_interruption() == "timeout"
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+    assert manager.take_interruption() is None
+    manager.dispose_all()
+
+
+def test_cancel_running_interrupts_the_statement_in_flight(tmp_path):
+    manager = EngineManager()
+    engine = manager.get(f"sqlite:///{tmp_path / 'app.db'}")
+    outcome = {}
+
+    def run():
+        with manager.user_query(), engine.connect() as connection:
+            try:
+                connection.execute(text(RUNAWAY_QUERY))
+            except OperationalError:
+                outcome["interruption"] = manager.take_interruption()
+
+    worker = threading.Thread(target=run)
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not manager._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert manager.cancel_running() == 1
+    worker.join(5)
+    assert outcome == {"interruption": "cancelled"}
+    assert manager._running == {}
+    manager.dispose_all()
+
+
+def test_cancel_running_leaves_other_statements_alone(tmp_path):
+    manager = EngineManager(statement_timeout=0.5)
+    engine = manager.get(f"sqlite:///{tmp_path / 'app.db'}")
+    outcome = {}
+
+    def run():
+        with engine.connect() as connection:
+            try:
+                connection.execute(text(RUNAWAY_QUERY))
+            except OperationalError:
+                outcome["interruption"] = manager.take_interruption()
+
+    worker = threading.Thread(target=run)
+    worker.start()
+    time.sleep(0.1)
+
+    assert manager.cancel_running() == 0
+    worker.join(5)
+    assert outcome == {"interruption": "timeout"}
+    manager.dispose_all()
+
+
+def test_sqlite_user_query_deadline_covers_the_fetch(tmp_path):
+    manager = EngineManager(statement_timeout=0.2)
+    engine = manager.get(f"sqlite:///{tmp_path / 'app.db'}")
+    # sqlite3 returns from execute after the first row; the rest is computed while fetching.
+    endless = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT x FROM c"
+
+    with manager.user_query(), engine.connect() as connection:
+        result = connection.execute(text(endless))
+        with pytest.raises(OperationalError):
+            result.fetchall()
+    assert manager.take_interruption() == "timeout"
+    assert manager._running == {}
+    manager.dispose_all()
+
+
+def test_cancel_running_does_not_wait_for_the_manager_lock():
+    # The SIGINT handler calls cancel_running on whatever the main thread was
+    # doing, which may be holding the lock.
+    manager = EngineManager()
+    outcome = []
+
+    def interrupted_while_locked():
+        with manager._lock:
+            outcome.append(manager.cancel_running())
+
+    worker = threading.Thread(target=interrupted_while_locked, daemon=True)
+    worker.start()
+    worker.join(2)
+
+    assert outcome == [0]
+
+
+def test_postgres_timeout_is_a_connection_option():
+    manager = EngineManager(statement_timeout=30)
+
+    options = manager.engine_options("postgresql+psycopg2://alice@db.internal:5432/app")
+
+    assert options["connect_args"] == {"options": "-c statement_timeout=30000"}
+    assert manager.timeout_connect_args("postgresql", "asyncpg") == {
+        "server_settings": {"statement_timeout": "30000"}
+    }
+    assert "connect_args" not in EngineManager().engine_options("postgresql://alice@db.internal:5432/app")
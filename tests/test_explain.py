@@ -0,0 +1,159 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import event
+
+from psqlomni.tools import guardrails, sql_tools
+from psqlomni.tools.explain import _explain_postgres, explain_query, is_single_statement
+
+POSTGRES_PLAN = [
+    {
+        "Plan": {
+            "Node Type": "Hash Join",
+            "Total Cost": 182034.5,
+            "Plan Rows": 2400000,
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "events", "Plan Rows": 2400000},
+                {"Node Type": "Index Scan", "Relation Name": "users", "Plan Rows": 10},
+            ],
+        }
+    }
+]
+
+
+class FakePostgresConnection:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        if str(statement).startswith("EXPLAIN"):
+            return SimpleNamespace(scalar=lambda: json.dumps(POSTGRES_PLAN))
+        return SimpleNamespace(all=lambda: [("events", 2.5e9)])
+
+
+class FakePostgresEngine:
+    def __init__(self):
+        self.connection = FakePostgresConnection()
+        self.rolled_back = False
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        return self.connection.execute(statement, params)
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def _sqlite_db(tmp_path) -> SQLDatabase:
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    db.run("INSERT INTO users (name) VALUES ('ada'), ('bob'), ('cy'), ('di'), ('ed')")
+    return db
+
+
+def test_postgres_plan_reports_cost_rows_and_table_size_of_seq_scans():
+    connection = FakePostgresConnection()
+
+    plan = _explain_postgres(connection, "SELECT * FROM events JOIN users USING (user_id)")
+
+    assert connection.statements[0].startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert (plan.total_cost, plan.estimated_rows) == (182034.5, 2400000)
+    assert plan.seq_scans == [{"table": "events", "rows": 2500000000}]
+
+
+def test_sqlite_plan_flags_full_scans_through_aliases(tmp_path):
+    db = _sqlite_db(tmp_path)
+
+    plan = explain_query(db, "SELECT * FROM users AS u WHERE u.name = 'ada'", row_threshold=3)
+    indexed = explain_query(db, "SELECT * FROM users WHERE id = 2", row_threshold=3)
+
+    assert plan.seq_scans == [{"table": "users", "rows": 5}]
+    assert plan.warnings == ["Sequential scan on users (~5 rows)"]
+    assert indexed.seq_scans == [] and indexed.warnings == []
+    assert explain_query(db, "SELECT * FROM missing", row_threshold=3) is None
+
+
+def test_query_tool_puts_plan_in_payload_or_blocks(monkeypatch, tmp_path):
+    db = _sqlite_db(tmp_path)
+    requests = []
+    monkeypatch.setattr(sql_tools, "interrupt", lambda request: requests.append(request) or {"action": "accept"})
+    query = {"query": "SELECT name FROM users"}
+
+    warn = sql_tools._build_interruptible_query_tool(db, explain_action="warn", explain_row_threshold=3)
+    assert "ada" in warn.invoke(query)
+    assert requests[0]["plan"]["warnings"] == ["Sequential scan on users (~5 rows)"]
+
+    block = sql_tools._build_interruptible_query_tool(db, explain_action="block", explain_row_threshold=3)
+    assert block.invoke(query).startswith("Query blocked before execution: Sequential scan on users")
+    assert len(requests) == 1
+
+
+def test_resumed_query_tool_reuses_the_plan_from_the_approval_request(monkeypatch, tmp_path):
+    db = _sqlite_db(tmp_path)
+    plans = []
+    monkeypatch.setattr(
+        sql_tools, "explain_query", lambda *args: plans.append(args) or explain_query(*args)
+    )
+
+    class Paused(Exception):
+        pass
+
+    def pause(_request):
+        raise Paused
+
+    tool = sql_tools._build_interruptible_query_tool(db, explain_action="warn", explain_row_threshold=3)
+    monkeypatch.setattr(sql_tools, "interrupt", pause)
+    with pytest.raises(Paused):
+        tool.invoke({"query": "SELECT name FROM users"})
+    monkeypatch.setattr(sql_tools, "interrupt", lambda _request: {"action": "accept"})
+
+    assert "ada" in tool.invoke({"query": "SELECT name FROM users"})
+    assert len(plans) == 1
+    tool.invoke({"query": "SELECT name FROM users"})
+    assert len(plans) == 2
+
+
+@pytest.mark.parametrize("sqlglot", [True, False])
+def test_multi_statement_queries_are_never_explained(monkeypatch, sqlglot):
+    if sqlglot:
+        pytest.importorskip("sqlglot")
+    else:
+        monkeypatch.setattr(guardrails, "_import_sqlglot", lambda: None)
+    engine = FakePostgresEngine()
+    db = SimpleNamespace(dialect="postgresql", _engine=engine)
+
+    assert explain_query(db, "SELECT 1; COMMIT; DELETE FROM events") is None
+    assert engine.connection.statements == []
+    assert is_single_statement("SELECT ';' FROM events;", "postgresql")
+
+    plan = explain_query(db, "SELECT * FROM events JOIN users USING (user_id)")
+
+    assert plan.total_cost == 182034.5
+    assert engine.connection.statements[0] == "SET TRANSACTION READ ONLY"
+    assert engine.rolled_back
+
+
+def test_preflight_does_not_run_statements_the_user_has_not_approved(monkeypatch, tmp_path):
+    db = _sqlite_db(tmp_path)
+    statements = []
+    event.listen(db._engine, "before_cursor_execute", lambda _conn, _cursor, statement, *_: statements.append(statement))
+    requests = []
+    monkeypatch.setattr(sql_tools, "interrupt", lambda request: requests.append(request) or {"action": "cancel"})
+    tool = sql_tools._build_interruptible_query_tool(db, explain_action="warn", explain_row_threshold=3)
+
+    tool.invoke({"query": "SELECT name FROM users; DELETE FROM users"})
+
+    assert statements == []
+    assert "plan" not in requests[0]
+    assert db.run("SELECT count(*) FROM users") == "[(5,)]"
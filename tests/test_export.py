@@ -0,0 +1,134 @@
+import csv
+from decimal import Decimal
+
+import pytest
+from langchain_community.utilities import SQLDatabase
+
+from psqlomni.tools import export as export_mod
+from psqlomni.tools import sql_tools
+from psqlomni.tools.export import (
+    export_query,
+    format_export_result,
+    resolve_export_target,
+)
+
+
+def _db(tmp_path, rows=25):
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE sales (id INTEGER PRIMARY KEY, region TEXT, amount REAL)")
+    if rows:
+        values = ", ".join(f"({i}, 'r{i % 3}', {i * 1.5})" for i in range(rows))
+        db.run(f"INSERT INTO sales (id, region, amount) VALUES {values}")
+    return db
+
+
+def test_export_query_writes_csv_in_chunks(tmp_path):
+    db = _db(tmp_path)
+
+    result = export_query(db, "SELECT id, region, amount FROM sales ORDER BY id", str(tmp_path / "out.csv"), batch_size=4)
+
+    assert result.row_count == 25
+    assert result.file_format == "csv"
+    assert result.columns == [("id", "int"), ("region", "str"), ("amount", "float")]
+    with (tmp_path / "out.csv").open(encoding="utf-8") as handle:
+        rows = list(csv.reader(handle))
+    assert rows[0] == ["id", "region", "amount"]
+    assert len(rows) == 26
+
+
+def test_export_query_writes_header_for_empty_results(tmp_path):
+    db = _db(tmp_path, rows=0)
+    result = export_query(db, "SELECT * FROM sales", str(tmp_path / "empty.csv"))
+    assert result.row_count == 0
+    assert (tmp_path / "empty.csv").read_text(encoding="utf-8").strip() == "id,region,amount"
+
+
+def test_resolve_export_target_falls_back_to_csv_without_pyarrow(monkeypatch, tmp_path):
+    monkeypatch.setattr(export_mod, "_import_pyarrow", lambda: None)
+    assert resolve_export_target(str(tmp_path / "out.parquet")) == (tmp_path / "out.csv", "csv")
+    assert resolve_export_target(str(tmp_path / "out.tsv")) == (tmp_path / "out.tsv", "csv")
+
+
+def test_export_query_writes_parquet_and_arrow(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    db = _db(tmp_path)
+    parquet = export_query(db, "SELECT * FROM sales", str(tmp_path / "out.parquet"), batch_size=10)
+    arrow = export_query(db, "SELECT * FROM sales", str(tmp_path / "out.arrow"), batch_size=10)
+
+    assert parquet.file_format == "parquet"
+    assert pq.read_table(tmp_path / "out.parquet").num_rows == 25
+    assert arrow.file_format == "arrow"
+    with pa.ipc.open_file(tmp_path / "out.arrow") as reader:
+        assert reader.read_all().num_rows == 25
+    assert ("amount", "double") in parquet.columns
+
+
+def test_format_export_result_hides_rows(tmp_path):
+    db = _db(tmp_path, rows=3)
+    text = format_export_result(export_query(db, "SELECT region FROM sales", str(tmp_path / "r.csv")))
+    assert text.startswith(f"Exported 3 rows to {tmp_path / 'r.csv'} (csv).")
+    assert "Columns: region (str)." in text
+    assert "r0" not in text
+
+
+def test_query_tool_export_decision(tmp_path):
+    db = _db(tmp_path)
+    tool = sql_tools._build_interruptible_query_tool(db)
+    original_interrupt = sql_tools.interrupt
+    try:
+        sql_tools.interrupt = lambda _: {"action": "export", "path": str(tmp_path / "x.csv")}
+        exported = tool.invoke({"query": "SELECT * FROM sales"})
+        rejected = tool.invoke({"query": "DELETE FROM sales"})
+        sql_tools.interrupt = lambda _: {"action": "export"}
+        missing = tool.invoke({"query": "SELECT * FROM sales"})
+    finally:
+        sql_tools.interrupt = original_interrupt
+
+    assert exported.startswith("Exported 25 rows")
+    assert rejected == "Query execution cancelled: only read queries can be exported."
+    assert missing == "Query execution cancelled: export requested without a file path."
+
+
+def test_query_tool_export_reports_the_statement_timeout(monkeypatch, tmp_path):
+    from psqlomni.engines import ENGINES
+
+    uri = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(ENGINES, "statement_timeout", 0.2)
+    monkeypatch.setattr(sql_tools, "interrupt", lambda _: {"action": "export", "path": str(tmp_path / "x.csv")})
+    tool = sql_tools._build_interruptible_query_tool(SQLDatabase(ENGINES.get(uri)))
+
+    result = tool.invoke({"query": "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT x FROM c"})
+
+    assert result.startswith("Query cancelled: it ran longer than the 0.2s statement timeout.")
+    assert not (tmp_path / "x.csv").exists()
+    ENGINES.discard(uri)
+
+
+def test_arrow_sink_keeps_one_schema_across_batches(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    sink = export_mod.ArrowRowSink(tmp_path / "out.parquet", "parquet")
+    sink.write_header(["id", "note", "amount"])
+    sink.write_rows([(1, None, Decimal("1.5")), (2, None, None)])
+    sink.write_rows([(3, "late", Decimal("12.25")), (4, None, Decimal("3.75"))])
+    sink.write_rows([(5, 7, Decimal(100))])
+    sink.close()
+
+    table = pq.read_table(tmp_path / "out.parquet")
+    assert table.num_rows == 5
+    assert str(table.schema.field("note").type) == "string"
+    assert table.column("note").to_pylist() == [None, None, "late", None, "7"]
+    assert table.column("amount").to_pylist()[1:3] == [None, Decimal("12.25")]
+
+
+def test_export_query_removes_partial_file_on_error(tmp_path):
+    pytest.importorskip("pyarrow")
+    db = _db(tmp_path, rows=0)
+    db.run("INSERT INTO sales (id, region, amount) VALUES (1, 'north', 1.0), (2, 'south', 2.0), (3, 'west', 'n/a')")
+
+    with pytest.raises(ValueError, match="amount"):
+        export_query(db, "SELECT * FROM sales ORDER BY id", str(tmp_path / "out.parquet"), batch_size=2)
+    assert not (tmp_path / "out.parquet").exists()
@@ -0,0 +1,118 @@
+from langchain_community.utilities import SQLDatabase
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+from psqlomni.answer_cache import CachedAnswer
+from psqlomni.graph.builder import build_sql_graph
+from psqlomni.tools.sql_tools import build_sql_tools
+
+
+class ScriptedBoundLLM:
+    def __init__(self, tool_names, calls):
+        self.tool_names = tool_names
+        self.calls = calls
+
+    def invoke(self, _messages):
+        self.calls.append(self.tool_names)
+        if "sql_db_schema" in self.tool_names:
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": "sql_db_schema", "args": {"table_names": "users"}, "id": "schema"}],
+            )
+        return AIMessage(content="done")
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+class ScriptedLLM(BaseChatModel):
+    calls: list = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="done"))])
+
+    def bind_tools(self, tools, **kwargs):
+        return ScriptedBoundLLM([getattr(tool, "name", "") for tool in tools], self.calls)
+
+
+def _sqlite_db(tmp_path):
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    return SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}", sample_rows_in_table_info=0)
+
+
+def _table_list_results(graph, config):
+    messages = graph.get_state(config).values["messages"]
+    return [m for m in messages if isinstance(m, ToolMessage) and m.name == "sql_db_list_tables"]
+
+
+def test_graph_lists_tables_once_per_catalog_version(tmp_path):
+    db = _sqlite_db(tmp_path)
+    llm = ScriptedLLM()
+    versions = ["v1"]
+    graph = build_sql_graph(
+        llm,
+        build_sql_tools(db, llm),
+        db_dialect="sqlite",
+        db_name="app",
+        catalog_version=lambda: versions[0],
+        table_list_ttl=0,
+    )
+    config = {"configurable": {"thread_id": "t1"}}
+
+    graph.invoke({"messages": [("user", "how many users?")]}, config=config)
+    graph.invoke({"messages": [("user", "and now?")]}, config=config)
+    assert len(_table_list_results(graph, config)) == 1
+
+    versions[0] = "v2"
+    graph.invoke({"messages": [("user", "after ddl?")]}, config=config)
+    results = _table_list_results(graph, config)
+    assert len(results) == 1
+    assert graph.get_state(config).values["table_list_version"] == "v2"
+
+
+def test_graph_offers_cached_answer_without_calling_the_llm(tmp_path):
+    db = _sqlite_db(tmp_path)
+    llm = ScriptedLLM()
+    graph = build_sql_graph(
+        llm,
+        build_sql_tools(db, llm),
+        db_dialect="sqlite",
+        db_name="app",
+        answer_lookup=lambda question, _version: CachedAnswer(question, "SELECT count(*) FROM users", 1.0),
+    )
+    config = {"configurable": {"thread_id": "t1"}}
+
+    result = graph.invoke({"messages": [("user", "how many users?")]}, config=config)
+
+    interrupt_value = result["__interrupt__"][0].value
+    assert interrupt_value["query"] == "SELECT count(*) FROM users"
+    assert llm.calls == []
+
+
+def test_graph_compacts_history_at_the_start_of_each_turn(tmp_path):
+    db = _sqlite_db(tmp_path)
+    llm = ScriptedLLM()
+    graph = build_sql_graph(
+        llm,
+        build_sql_tools(db, llm),
+        db_dialect="sqlite",
+        db_name="app",
+        history_token_budget=60,
+    )
+    config = {"configurable": {"thread_id": "t1"}}
+
+    for question in ("first question", "second question", "third question"):
+        graph.invoke({"messages": [("user", question)]}, config=config)
+
+    messages = graph.get_state(config).values["messages"]
+    questions = [m.content for m in messages if m.type == "human"]
+    assert "first question" not in questions
+    assert questions[-1] == "third question"
+    assert len(_table_list_results(graph, config)) == 1
@@ -1,9 +1,17 @@
-from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
 from langgraph.graph import END
 
+from psqlomni.answer_cache import CachedAnswer
 from psqlomni.graph.nodes import (
     bootstrap_list_tables,
+    bootstrap_table_list,
+    make_answer_cache_node,
+    make_answer_cache_router,
+    make_query_generation_node,
+    make_run_query_router,
     make_schema_selection_node,
+    make_table_list_check_node,
+    make_table_list_router,
     route_after_query_generation,
 )
 
@@ -11,8 +19,10 @@ from psqlomni.graph.nodes import (
 class FakeBoundLLM:
     def __init__(self, response):
         self.response = response
+        self.calls = []
 
-    def invoke(self, _messages):
+    def invoke(self, messages):
+        self.calls.append(messages)
         return self.response
 
 
@@ -21,7 +31,8 @@ class FakeLLM:
         self.response = response
 
     def bind_tools(self, _tools):
-        return FakeBoundLLM(self.response)
+        self.bound = FakeBoundLLM(self.response)
+        return self.bound
 
 
 def test_bootstrap_list_tables_creates_expected_tool_call():
@@ -58,6 +69,53 @@ def test_make_schema_selection_node_uses_llm_tool_call_when_present():
     assert result["messages"][0] == response
 
 
+def test_make_schema_selection_node_uses_retrieved_candidates():
+    llm = FakeLLM(AIMessage(content="No tool chosen"))
+    questions = []
+
+    def retriever(question):
+        questions.append(question)
+        return ["orders", "users"]
+
+    node = make_schema_selection_node(llm, get_schema_tool=object(), table_retriever=retriever)
+    state = {
+        "messages": [
+            AIMessage(content="", tool_calls=[{"name": "sql_db_list_tables", "args": {}, "id": "list_tables_call"}]),
+            ToolMessage(content="users, orders, audit_log", name="sql_db_list_tables", tool_call_id="list_tables_call"),
+            HumanMessage(content="orders per user"),
+        ]
+    }
+
+    result = node(state)
+
+    assert questions == ["orders per user"]
+    assert result["messages"][0].tool_calls[0]["args"]["table_names"] == "orders, users"
+    sent = llm.bound.calls[0]
+    assert "Candidate tables, most relevant first: orders, users." in sent[0].content
+    assert [type(message).__name__ for message in sent] == ["SystemMessage", "HumanMessage"]
+
+
+def test_query_generation_node_adds_stats_for_described_tables():
+    llm = FakeLLM(AIMessage(content="done"))
+    requested = []
+
+    def table_stats(names):
+        requested.append(names)
+        return ["orders: ~1.2M rows; indexes: (id) primary key"]
+
+    node = make_query_generation_node(llm, object(), db_dialect="postgresql", db_name="shop", table_stats=table_stats)
+    schema_call = AIMessage(
+        content="",
+        tool_calls=[{"name": "sql_db_schema", "args": {"table_names": "orders, users"}, "id": "s1", "type": "tool_call"}],
+    )
+    node({"messages": [HumanMessage(content="orders per user?"), schema_call]})
+
+    assert requested == [["orders", "users"]]
+    prompt = llm.bound.calls[0]
+    assert "orders: ~1.2M rows" in prompt[1].content
+    assert prompt[2].content == "orders per user?"
+
+
 def test_route_after_query_generation():
     run_query_state = {
         "messages": [AIMessage(content="", tool_calls=[{"name": "sql_db_query", "args": {}, "id": "1"}])]
@@ -65,3 +123,104 @@ def test_route_after_query_generation():
     done_state = {"messages": [AIMessage(content="Final answer", tool_calls=[])]}
     assert route_after_query_generation(run_query_state) == "run_query"
     assert route_after_query_generation(done_state) == END
+
+
+def _listed_state(**overrides):
+    state = {
+        "messages": [
+            AIMessage(
+                content="",
+                id="ai-list",
+                tool_calls=[{"name": "sql_db_list_tables", "args": {}, "id": "list_tables_call"}],
+            ),
+            ToolMessage(content="users", name="sql_db_list_tables", tool_call_id="list_tables_call", id="tool-list"),
+        ],
+        "table_list_version": "v1",
+        "table_list_fetched_at": 0.0,
+    }
+    state.update(overrides)
+    return state
+
+
+def test_table_list_router_fetches_when_thread_has_no_table_list():
+    router = make_table_list_router()
+    assert router({"messages": []}) == "bootstrap_list_tables"
+
+
+def test_table_list_check_renews_list_on_unchanged_catalog(monkeypatch):
+    from psqlomni.graph import nodes
+
+    monkeypatch.setattr(nodes.time, "time", lambda: 100.0)
+    versions = iter(["v1", "v2"])
+    check = make_table_list_check_node(lambda: next(versions), ttl_seconds=60)
+    router = make_table_list_router(ttl_seconds=60)
+
+    assert check(_listed_state(table_list_fetched_at=90.0)) == {}
+    assert router(_listed_state(table_list_fetched_at=90.0)) == "select_schema"
+
+    renewed = check(_listed_state())
+    assert renewed == {"table_list_fetched_at": 100.0}
+    assert router(_listed_state(**renewed)) == "select_schema"
+
+    changed = check(_listed_state())
+    assert changed == {"table_list_version": "v2"}
+    assert router(_listed_state(**changed)) == "bootstrap_list_tables"
+
+
+def test_table_list_check_refetches_when_catalog_marker_is_unknown():
+    check = make_table_list_check_node(lambda: None, ttl_seconds=60)
+
+    assert check(_listed_state(table_list_version=None)) == {"table_list_version": None}
+
+
+def test_table_list_bootstrap_node_replaces_stale_table_list():
+    result = bootstrap_table_list(_listed_state())
+
+    removed = [message.id for message in result["messages"] if isinstance(message, RemoveMessage)]
+    assert removed == ["ai-list", "tool-list"]
+    assert result["messages"][-1].tool_calls[0]["name"] == "sql_db_list_tables"
+    assert result["table_list_fetched_at"] > 0
+
+
+def test_answer_cache_node_emits_query_call_on_hit():
+    versions = []
+    node = make_answer_cache_node(
+        lambda question, version: versions.append(version) or CachedAnswer("Count users", "SELECT count(*) FROM users", 0.95)
+    )
+    miss_node = make_answer_cache_node(lambda question, _version: None)
+    state = {"messages": [HumanMessage(content="count users")], "table_list_version": "v1"}
+
+    message = node(state)["messages"][0]
+
+    assert message.tool_calls[0]["name"] == "sql_db_query"
+    assert message.tool_calls[0]["args"] == {"query": "SELECT count(*) FROM users"}
+    assert message.tool_calls[0]["id"].startswith("answer_cache_")
+    assert message.response_metadata["answer_cache"] == {"question": "Count users", "similarity": 0.95}
+    assert versions == ["v1"]
+    assert miss_node(state) == {}
+
+
+def test_answer_cache_node_skips_follow_up_questions():
+    node = make_answer_cache_node(lambda question, _version: CachedAnswer(question, "SELECT 1", 1.0))
+    state = {"messages": [HumanMessage(content="count users"), AIMessage(content="42"), HumanMessage(content="and 2023?")]}
+
+    assert node(state) == {}
+
+
+def test_answer_cache_routers():
+    cached_call = AIMessage(
+        content="",
+        tool_calls=[{"name": "sql_db_query", "args": {"query": "SELECT 1"}, "id": "answer_cache_1"}],
+    )
+    after_lookup = make_answer_cache_router(lambda _state: "select_schema")
+    after_query = make_run_query_router(lambda _state: "bootstrap_list_tables")
+
+    assert after_lookup({"messages": [cached_call]}) == "run_query"
+    assert after_lookup({"messages": [HumanMessage(content="hi")]}) == "select_schema"
+
+    declined = ToolMessage(content="Query execution cancelled by user.", tool_call_id="answer_cache_1")
+    declined_llm_call = ToolMessage(content="Query execution cancelled by user.", tool_call_id="call-7")
+    executed = ToolMessage(content="[(1,)]", tool_call_id="answer_cache_1")
+    assert after_query({"messages": [declined]}) == "bootstrap_list_tables"
+    assert after_query({"messages": [declined_llm_call]}) == "generate_query"
+    assert after_query({"messages": [executed]}) == "generate_query"
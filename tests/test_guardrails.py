@@ -0,0 +1,75 @@
+import pytest
+from langchain_community.utilities import SQLDatabase
+
+from psqlomni.tools import guardrails
+from psqlomni.tools.guardrails import format_rows, limit_query, run_capped_query
+
+
+def _sqlite_db(tmp_path, rows=50) -> SQLDatabase:
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT)")
+    values = ", ".join(f"('kind-{index}')" for index in range(rows))
+    db.run(f"INSERT INTO events (kind) VALUES {values}")
+    return db
+
+
+def test_limit_query_fallback_wraps_unbounded_reads(monkeypatch):
+    monkeypatch.setattr(guardrails, "_import_sqlglot", lambda: None)
+
+    assert limit_query("SELECT * FROM events;", "postgresql", 100) == (
+        "SELECT * FROM (\nSELECT * FROM events\n) AS psqlomni_limited LIMIT 101"
+    )
+    assert limit_query("SELECT * FROM events LIMIT 10", "postgresql", 100) is None
+    assert limit_query("SELECT * FROM events LIMIT 500", "sqlite", 100).endswith("LIMIT 101")
+    assert limit_query("UPDATE events SET kind = 'x'", "postgresql", 100) is None
+    assert limit_query("SELECT * FROM events", "mssql", 100) is None
+    assert limit_query("SELECT * FROM events", "postgresql", 0) is None
+
+
+def test_limit_query_with_sqlglot_limits_the_parsed_query():
+    pytest.importorskip("sqlglot")
+
+    assert limit_query("SELECT * FROM events;", "postgresql", 100) == "SELECT * FROM events LIMIT 101"
+    assert limit_query("SELECT * FROM events LIMIT 10", "postgresql", 100) is None
+    assert limit_query("SELECT * FROM events LIMIT 500", "sqlite", 100) == "SELECT * FROM events LIMIT 101"
+    assert limit_query("SELECT * FROM events", "mssql", 100) == "SELECT TOP 101 * FROM events"
+    assert limit_query("SELECT * FROM events WHERE (", "postgresql", 100).endswith("LIMIT 101")
+
+
+def test_limit_query_with_sqlglot_leaves_only_plain_aggregates_unbounded():
+    pytest.importorskip("sqlglot")
+
+    assert limit_query("SELECT count(*), max(id) FROM events", "postgresql", 100) is None
+    assert limit_query("SELECT kind, count(*) FROM events GROUP BY kind", "postgresql", 100).endswith("LIMIT 101")
+    assert limit_query("SELECT id, count(*) OVER () FROM events", "postgresql", 100).endswith("LIMIT 101")
+    assert limit_query(
+        "SELECT id FROM events WHERE id > (SELECT avg(id) FROM events)", "postgresql", 100
+    ).endswith("LIMIT 101")
+    assert limit_query(
+        "SELECT id, (SELECT max(id) FROM events) AS top FROM events", "postgresql", 100
+    ).endswith("LIMIT 101")
+
+
+def test_capped_query_reports_cut_results(tmp_path):
+    db = _sqlite_db(tmp_path)
+
+    result = run_capped_query(db, "SELECT id FROM events ORDER BY id", row_cap=5, byte_cap=0)
+
+    assert result.startswith("[(1,), (2,), (3,), (4,), (5,)]")
+    assert "Showing the first 5 of more than 5 rows" in result
+    assert run_capped_query(db, "SELECT id FROM events ORDER BY id LIMIT 3", row_cap=5, byte_cap=0) == (
+        "[(1,), (2,), (3,)]"
+    )
+
+
+def test_byte_cap_drops_trailing_rows():
+    rows = [{"id": index, "kind": "x" * 20} for index in range(10)]
+
+    result = format_rows(rows, max_string_length=100, row_cap=0, byte_cap=100)
+
+    shown = result.split("\n")[0]
+    assert len(shown) <= 100
+    assert "Showing the first 3 of 10 rows" in result
+    assert format_rows(rows[:2], max_string_length=100, row_cap=0, byte_cap=100) == str(
+        [(0, "x" * 20), (1, "x" * 20)]
+    )
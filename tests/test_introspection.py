@@ -0,0 +1,113 @@
+import pickle
+import sqlite3
+from types import SimpleNamespace
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import INTEGER, VARCHAR, MetaData, create_engine, event
+from sqlalchemy.schema import CreateTable
+
+from psqlomni.schema import introspection
+from psqlomni.schema.introspection import introspect_metadata
+
+SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255) NOT NULL UNIQUE, name TEXT DEFAULT 'anon',
+    score NUMERIC(10, 2), created DATETIME DEFAULT CURRENT_TIMESTAMP, flag BOOLEAN);
+CREATE TABLE orders (id INTEGER NOT NULL, user_id INTEGER REFERENCES users(id), total REAL, PRIMARY KEY (id));
+CREATE TABLE items (order_id INTEGER, sku TEXT, qty INT NOT NULL, PRIMARY KEY (order_id, sku),
+    FOREIGN KEY (order_id) REFERENCES orders);
+CREATE TABLE checked (id INTEGER PRIMARY KEY, n INT CHECK (n > 0));
+CREATE TABLE cascades (id INTEGER PRIMARY KEY, u INT REFERENCES users(id) ON DELETE CASCADE);
+CREATE TABLE links (a INT REFERENCES users(id), b INT REFERENCES orders(id));
+CREATE TABLE odd_names ("Mixed Case" TEXT, [bracket] int, `tick` varchar);
+CREATE VIEW recent AS SELECT * FROM users;
+"""
+
+
+def _engine(tmp_path, script: str):
+    path = tmp_path / "app.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(script)
+    return create_engine(f"sqlite:///{path}")
+
+
+def _record_statements(engine) -> list:
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda _conn, _cursor, statement, *_: statements.append(statement))
+    return statements
+
+
+def test_sqlite_bulk_introspection_matches_reflection(tmp_path):
+    engine = _engine(tmp_path, SCHEMA)
+
+    metadata = introspect_metadata(engine)
+    bulk = SQLDatabase(engine, metadata=metadata, lazy_table_reflection=True, sample_rows_in_table_info=0)
+    reflected = SQLDatabase(create_engine(engine.url), sample_rows_in_table_info=0)
+
+    assert bulk.get_table_info() == reflected.get_table_info()
+    assert sorted(pickle.loads(pickle.dumps(metadata)).tables) == sorted(reflected._metadata.tables)
+
+
+def test_sqlite_catalog_query_count_does_not_grow_with_tables(tmp_path):
+    script = "".join(
+        f"CREATE TABLE t{index} (id INTEGER PRIMARY KEY, parent INTEGER REFERENCES t0(id), label TEXT);"
+        for index in range(40)
+    )
+    engine = _engine(tmp_path, script)
+    statements = _record_statements(engine)
+
+    metadata = introspect_metadata(engine)
+
+    assert len(metadata.tables) == 40
+    assert len(statements) <= 3
+    assert "REFERENCES t0 (id)" in str(CreateTable(metadata.tables["t7"]).compile(engine))
+
+
+def test_load_tables_adds_requested_tables_and_their_foreign_key_targets(tmp_path):
+    engine = _engine(tmp_path, SCHEMA)
+    reflected = SQLDatabase(create_engine(engine.url), sample_rows_in_table_info=0)
+    metadata = MetaData()
+
+    assert introspection.load_tables(engine, metadata, ["items"])
+    assert sorted(metadata.tables) == ["items", "orders", "users"]
+    lazy = SQLDatabase(engine, metadata=metadata, lazy_table_reflection=True, sample_rows_in_table_info=0)
+    assert lazy.get_table_info(["items"]) == reflected.get_table_info(["items"])
+
+
+def test_postgres_uses_multi_table_inspector_calls(monkeypatch):
+    calls = []
+    key = (None, "users")
+
+    def multi(name, value):
+        def method(schema=None, filter_names=None):
+            calls.append((name, schema, filter_names))
+            return {key: value}
+
+        return method
+
+    inspector = SimpleNamespace(
+        get_multi_columns=multi(
+            "columns",
+            [
+                {"name": "id", "type": INTEGER(), "nullable": False, "default": "nextval('users_id_seq'::regclass)"},
+                {"name": "email", "type": VARCHAR(255), "nullable": True, "comment": "login"},
+            ],
+        ),
+        get_multi_pk_constraint=multi("pk", {"constrained_columns": ["id"], "name": "users_pkey"}),
+        get_multi_foreign_keys=multi("fk", []),
+        get_multi_unique_constraints=multi("unique", [{"name": "users_email_key", "column_names": ["email"]}]),
+        get_multi_check_constraints=multi("check", []),
+        get_multi_table_comment=multi("comment", {"text": "app users"}),
+    )
+    monkeypatch.setattr(introspection.sqlalchemy, "inspect", lambda _connection: inspector)
+
+    info = introspection._postgres_catalog(object(), "public", ["users"])
+    metadata = MetaData()
+    introspection.build_tables(metadata, info, connection=None, schema="public")
+    table = metadata.tables["public.users"]
+
+    assert [(schema, names) for _, schema, names in calls] == [("public", ["users"])] * 6
+    assert table.comment == "app users"
+    assert table.primary_key.name == "users_pkey"
+    assert table.c.email.comment == "login"
+    assert str(table.c.id.server_default.arg) == "nextval('users_id_seq'::regclass)"
+    assert {constraint.name for constraint in table.constraints} >= {"users_pkey", "users_email_key"}
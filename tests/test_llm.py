@@ -1,7 +1,11 @@
 import pytest
 
 from psqlomni.config import AppConfig
-from psqlomni.llm import MissingProviderDependencyError, build_llm
+from psqlomni.llm import (
+    MissingProviderDependencyError,
+    build_llm,
+    check_provider_dependency,
+)
 
 
 def _config(**overrides) -> AppConfig:
@@ -60,3 +64,14 @@ def test_build_llm_missing_google_dependency_has_install_hint(monkeypatch):
     assert exc.package == "langchain-google-genai"
     assert exc.install_extra == "google"
     assert "pip install psqlomni[google]" in str(exc)
+
+
+def test_check_provider_dependency_does_not_import_sdk(monkeypatch):
+    from psqlomni import llm as llm_mod
+
+    monkeypatch.setattr(llm_mod.importlib.util, "find_spec", lambda name: None)
+
+    check_provider_dependency("openai")
+    with pytest.raises(MissingProviderDependencyError) as exc_info:
+        check_provider_dependency("ollama")
+    assert exc_info.value.install_extra == "ollama"
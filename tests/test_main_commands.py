@@ -1,9 +1,13 @@
 from types import SimpleNamespace
 
-from psqlomni import __main__ as main_mod
+from psqlomni import __main__ as entry_mod
+from psqlomni import app as main_mod
+from psqlomni.app import PSqlomni
 from psqlomni.config import AppConfig
-from psqlomni.__main__ import PSqlomni
 from psqlomni.llm import MissingProviderDependencyError
+from psqlomni.result_cache import ResultCache
+from psqlomni.tools import sql_tools
+from psqlomni.tracing import Tracer
 
 
 class FakeRenderer:
@@ -53,6 +57,10 @@ def _app() -> PSqlomni:
     app.renderer = FakeRenderer(mode="verbose")
     app.thread_id = "thread-1"
     app.known_thread_ids = {"thread-1"}
+    app.table_indexes = {}
+    app.answer_cache = None
+    app.checkpointer = None
+    app.tracer = Tracer()
     return app
 
 
@@ -156,7 +164,7 @@ def test_prompt_query_decision_paths(monkeypatch, capsys):
     monkeypatch.setattr(main_mod, "prompt", lambda *_args, **_kwargs: next(prompts))
     decision = app._prompt_query_decision({"query": "SELECT 1", "is_mutating": False})
     assert decision == {"action": "accept"}
-    assert "Invalid choice. Use a/e/f/c." in capsys.readouterr().out
+    assert "Invalid choice. Use a/e/f/x/c." in capsys.readouterr().out
 
     prompts = iter(["e", "SELECT 2"])
     monkeypatch.setattr(main_mod, "prompt", lambda *_args, **_kwargs: next(prompts))
@@ -173,6 +181,21 @@ def test_prompt_query_decision_paths(monkeypatch, capsys):
     monkeypatch.setattr(main_mod, "prompt", lambda *_args, **_kwargs: next(prompts))
     assert app._prompt_query_decision({"query": "SELECT 1", "is_mutating": False}) == {"action": "cancel"}
 
+    prompts = iter(["/export ~/Out/Extract.parquet"])
+    monkeypatch.setattr(main_mod, "prompt", lambda *_args, **_kwargs: next(prompts))
+    assert app._prompt_query_decision({"query": "SELECT 1", "is_mutating": False}) == {
+        "action": "export",
+        "path": "~/Out/Extract.parquet",
+    }
+
+    prompts = iter(["x", "", "x", "rows.csv"])
+    monkeypatch.setattr(main_mod, "prompt", lambda *_args, **_kwargs: next(prompts))
+    assert app._prompt_query_decision({"query": "SELECT 1", "is_mutating": False}) == {
+        "action": "export",
+        "path": "rows.csv",
+    }
+    assert "Export path cannot be empty." in capsys.readouterr().out
+
 
 def test_connect_database_interactive_uri_mode(monkeypatch, capsys):
     app = _app()
@@ -192,19 +215,22 @@ def test_connect_database_interactive_uri_mode(monkeypatch, capsys):
         def run_no_throw(self, query):
             run_calls.append(query)
 
+        def get_usable_table_names(self):
+            return ["events"]
+
     def fake_build_sql_database(config):
         db_calls.append(config)
         return FakeDB()
 
     tools_calls = []
 
-    def fake_build_sql_tools(db, llm):
+    def fake_build_sql_tools(db, llm, **_kwargs):
         tools_calls.append((db, llm))
         return {"sql_query": object()}
 
     graph_calls = []
 
-    def fake_build_sql_graph(llm, tools, db_dialect, db_name):
+    def fake_build_sql_graph(llm, tools, db_dialect, db_name, **_kwargs):
         graph_calls.append((llm, tools, db_dialect, db_name))
         return object()
 
@@ -273,19 +299,22 @@ def test_connect_database_interactive_structured_mode(monkeypatch, capsys):
         def run_no_throw(self, query):
             run_calls.append(query)
 
+        def get_usable_table_names(self):
+            return ["events"]
+
     def fake_build_sql_database(config):
         db_calls.append(config)
         return FakeDB()
 
     tools_calls = []
 
-    def fake_build_sql_tools(db, llm):
+    def fake_build_sql_tools(db, llm, **_kwargs):
         tools_calls.append((db, llm))
         return {"sql_query": object()}
 
     graph_calls = []
 
-    def fake_build_sql_graph(llm, tools, db_dialect, db_name):
+    def fake_build_sql_graph(llm, tools, db_dialect, db_name, **_kwargs):
         graph_calls.append((llm, tools, db_dialect, db_name))
         return object()
 
@@ -326,16 +355,17 @@ def test_connect_database_interactive_structured_mode(monkeypatch, capsys):
 
 
 def test_main_reports_missing_provider_dependency(monkeypatch, capsys):
-    def fail_constructor():
+    def fail_constructor(_args):
         raise MissingProviderDependencyError(
             provider="google_gemini",
             package="langchain-google-genai",
             install_extra="google",
         )
 
+    monkeypatch.setattr(entry_mod, "parse_args", lambda: SimpleNamespace())
     monkeypatch.setattr(main_mod, "PSqlomni", fail_constructor)
 
-    exit_code = main_mod.main()
+    exit_code = entry_mod.main()
     output = capsys.readouterr().out
 
     assert exit_code == 1
@@ -343,3 +373,329 @@ def test_main_reports_missing_provider_dependency(monkeypatch, capsys):
     assert "Provider: google_gemini" in output
     assert "Missing package: langchain-google-genai" in output
     assert 'Install with: pip install "psqlomni[google]"' in output
+
+
+def test_process_command_remembers_approved_sql_for_new_threads(monkeypatch):
+    from langchain_core.messages import ToolMessage
+
+    app = _app()
+    app.renderer = SimpleNamespace(
+        start_turn=lambda: None,
+        print_user=lambda _text: None,
+        render_message=lambda _message, _seen: (False, None),
+        print_turn_summary=lambda **_kwargs: None,
+    )
+    remembered = []
+    monkeypatch.setattr(app, "_remember_answer", lambda question, sql: remembered.append((question, sql)))
+    monkeypatch.setattr(app, "_prompt_query_decision", lambda _payload: {"action": "edit", "query": "SELECT 2"})
+
+    class FakeGraph:
+        def __init__(self):
+            self.calls = 0
+
+        def get_state(self, _config):
+            return SimpleNamespace(values={})
+
+        def stream(self, _input, config, stream_mode):
+            self.calls += 1
+            if self.calls == 1:
+                yield {"__interrupt__": [SimpleNamespace(value={"query": "SELECT 1"})]}
+                return
+            yield {"run_query": {"messages": [ToolMessage(content="[(2,)]", name="sql_db_query", tool_call_id="c1")]}}
+
+    app.graph = FakeGraph()
+    app.process_command("count things")
+
+    assert remembered == [("count things", "SELECT 2")]
+
+
+def test_process_command_does_not_remember_cancelled_or_timed_out_sql(monkeypatch):
+    from langchain_core.messages import ToolMessage
+
+    app = _app()
+    app.renderer = SimpleNamespace(
+        start_turn=lambda: None,
+        print_user=lambda _text: None,
+        render_message=lambda _message, _seen: (False, None),
+        print_turn_summary=lambda **_kwargs: None,
+    )
+    remembered = []
+    monkeypatch.setattr(app, "_remember_answer", lambda question, sql: remembered.append((question, sql)))
+    monkeypatch.setattr(app, "_prompt_query_decision", lambda _payload: {"action": "accept"})
+    results = iter(
+        [
+            sql_tools._interrupted_message("cancelled"),
+            sql_tools._interrupted_message("timeout"),
+            "Error: (sqlite3.OperationalError) no such table: things",
+        ]
+    )
+
+    class FakeGraph:
+        def __init__(self):
+            self.calls = 0
+
+        def get_state(self, _config):
+            return SimpleNamespace(values={})
+
+        def stream(self, _input, config, stream_mode):
+            self.calls += 1
+            if self.calls % 2:
+                yield {"__interrupt__": [SimpleNamespace(value={"query": "SELECT count(*) FROM things"})]}
+                return
+            content = next(results)
+            yield {"run_query": {"messages": [ToolMessage(content=content, name="sql_db_query", tool_call_id="c1")]}}
+
+    app.graph = FakeGraph()
+    for _ in range(3):
+        app.process_command("count things")
+
+    assert remembered == []
+
+
+def test_process_command_streams_answer_tokens_from_query_node():
+    from langchain_core.messages import AIMessage, AIMessageChunk
+
+    from psqlomni.ui.renderer import ConsoleRenderer
+
+    app = _app()
+    tokens = []
+    app.renderer = ConsoleRenderer(mode="normal", color_enabled=False)
+    app.renderer.stream_token = lambda message_id, text: tokens.append((message_id, text))
+
+    class FakeGraph:
+        def get_state(self, _config):
+            return SimpleNamespace(values={"messages": ["earlier"]})
+
+        def stream(self, _input, config, stream_mode):
+            assert stream_mode == ["updates", "messages"]
+            yield "messages", (AIMessageChunk(content="users", id="s1"), {"langgraph_node": "select_schema"})
+            yield "messages", (AIMessageChunk(content="Two", id="m1"), {"langgraph_node": "generate_query"})
+            yield "messages", (AIMessageChunk(content=" rows", id="m1"), {"langgraph_node": "generate_query"})
+            yield "updates", {"generate_query": {"messages": [AIMessage(content="Two rows", id="m1")]}}
+
+    app.graph = FakeGraph()
+    app.process_command("how many?")
+
+    assert tokens == [("m1", "Two"), ("m1", " rows")]
+
+
+def test_updated_messages_skips_removals_and_compacted_history():
+    from langchain_core.messages import AIMessage, RemoveMessage, ToolMessage
+
+    step = {
+        "compact_history": {"messages": [ToolMessage(content="short", tool_call_id="c0", id="t0")]},
+        "bootstrap_list_tables": {"messages": [RemoveMessage(id="old"), AIMessage(content="", id="a1")]},
+        "lookup_answer_cache": None,
+    }
+
+    assert [message.id for message in PSqlomni._updated_messages(step)] == ["a1"]
+
+
+def test_stats_command_prints_last_turn_and_session(capsys):
+    from psqlomni.ui.renderer import ConsoleRenderer
+
+    app = _app()
+    app.renderer = ConsoleRenderer(mode="verbose", color_enabled=False)
+    app.tracer.record("db", "run_no_throw", 0.0, 0.25, {"rows": 3, "bytes": 40})
+    app.result_cache = ResultCache()
+    app.result_cache.get("conn", "SELECT 1")
+
+    assert app._handle_slash_or_legacy_command("/stats") is True
+    output = capsys.readouterr().out
+    assert "[STATS]" in output
+    assert output.count("run_no_throw") == 2
+    assert "rows=3  bytes=40" in output
+    assert "result cache: hits=0 misses=1 evictions=0 invalidations=0" in output
+
+
+def test_process_command_waits_for_background_warmup(capsys):
+    import threading
+
+    app = _app()
+    app.graph = None
+    release = threading.Event()
+
+    def warm_up():
+        release.wait(5)
+        app._warmup_error = RuntimeError("catalog unavailable")
+
+    app._warmup = threading.Thread(target=warm_up)
+    app._warmup.start()
+    release.set()
+    app.process_command("count users")
+    output = capsys.readouterr().out
+
+    assert "Startup failed: catalog unavailable" in output
+    assert "No active database connection. Use /connect first." in output
+    assert app._warmup is None
+
+
+def test_async_mode_runs_the_turn_through_astream(monkeypatch, tmp_path):
+    from psqlomni.graph.builder import build_sql_graph
+    from psqlomni.tools.sql_tools import build_sql_tools
+    from tests.test_graph_builder import ScriptedLLM, _sqlite_db
+
+    app = _app()
+    app.config = _config(async_mode=True, stream_tokens=False)
+    llm = ScriptedLLM()
+    app.graph = build_sql_graph(
+        llm, build_sql_tools(_sqlite_db(tmp_path), llm), db_dialect="sqlite", db_name="app", asynchronous=True
+    )
+    rendered = []
+    app.renderer = SimpleNamespace(
+        start_turn=lambda: None,
+        print_user=lambda _text: None,
+        render_message=lambda message, _seen: rendered.append(message) or (False, None),
+        print_turn_summary=lambda **_kwargs: None,
+    )
+
+    app.process_command("how many users?")
+
+    assert [message.name for message in rendered if message.type == "tool"] == ["sql_db_list_tables", "sql_db_schema"]
+    assert rendered[-1].content == "done"
+    assert llm.calls == [["sql_db_schema"], ["sql_db_query"]]
+
+
+def test_async_mode_cancellation_returns_to_the_prompt(capsys):
+    import asyncio
+
+    class HangingGraph:
+        def get_state(self, _config):
+            return SimpleNamespace(values={})
+
+        async def astream(self, _input, config, stream_mode):
+            asyncio.current_task().cancel()
+            await asyncio.sleep(10)
+            yield {}
+
+    app = _app()
+    app.config = _config(async_mode=True, stream_tokens=False)
+    app.graph = HangingGraph()
+    app.renderer = SimpleNamespace(start_turn=lambda: None, print_user=lambda _text: None, end_stream=lambda: None)
+
+    app.process_command("slow question")
+
+    assert "Turn cancelled." in capsys.readouterr().out
+
+
+def test_async_steps_keep_the_query_cancelling_sigint_handler():
+    import signal
+
+    from langchain_core.messages import AIMessage
+
+    class TwoStepGraph:
+        def get_state(self, _config):
+            return SimpleNamespace(values={})
+
+        async def astream(self, _input, config, stream_mode):
+            yield {"generate_query": {"messages": [AIMessage(content="one", id="m1")]}}
+            yield {"generate_query": {"messages": [AIMessage(content="two", id="m2")]}}
+
+    app = _app()
+    app.config = _config(async_mode=True, stream_tokens=False)
+    app.graph = TwoStepGraph()
+    handlers = []
+    app.renderer = SimpleNamespace(
+        start_turn=lambda: None,
+        print_user=lambda _text: None,
+        render_message=lambda _message, _seen: handlers.append(signal.getsignal(signal.SIGINT)) or (False, None),
+        print_turn_summary=lambda **_kwargs: None,
+    )
+
+    app.process_command("two steps")
+
+    assert len(handlers) == 2
+    assert all(handler.__name__ == "on_interrupt" for handler in handlers)
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
+
+
+def test_ctrl_c_during_a_query_cancels_it_and_keeps_the_turn(monkeypatch, capsys):
+    import signal
+
+    app = _app()
+    cancelled = []
+    monkeypatch.setattr(main_mod.ENGINES, "cancel_running", lambda: cancelled.append(True) or 1)
+    monkeypatch.setattr(app, "_run_turn", lambda _cmd: signal.raise_signal(signal.SIGINT), raising=False)
+
+    app.process_command("slow question")
+
+    assert cancelled == [True]
+    assert "Cancelling the running query..." in capsys.readouterr().out
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
+
+
+def test_table_retrieval_applies_only_to_large_catalogs():
+    app = _app()
+    app.config = _config(table_retrieval_top_k=2)
+    app.db = SimpleNamespace(get_usable_table_names=lambda: ["orders", "users", "items", "payments"], _metadata=None)
+    assert app._build_table_retriever() is None
+
+    app.db = SimpleNamespace(get_usable_table_names=lambda: [f"table_{index}" for index in range(5)], _metadata=None)
+    assert app._build_table_retriever() is not None
+
+
+def test_ctrl_c_cancels_a_blocking_query_without_token_streaming(tmp_path, monkeypatch, capsys):
+    import signal
+    import sqlite3
+    import threading
+    import time
+
+    from sqlalchemy import event
+
+    from benchmarks.harness import Recorder, bench_config, build_app
+    from benchmarks.scripted_llm import ScriptedLLM
+    from psqlomni.db import build_sql_database
+
+    path = tmp_path / "app.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+    config = bench_config(path, stream_tokens=False, explain_action="off")
+    db = build_sql_database(config)
+    # Without the progress handler, sqlite3 blocks in C like psycopg2 does:
+    # no Python code, and so no signal handler, runs until the query ends.
+    event.listen(db._engine, "connect", lambda dbapi_connection, _record: dbapi_connection.set_progress_handler(None, 0))
+    db._engine.dispose()
+    runaway = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+    app = build_app(config, db, ScriptedLLM(table_names="users", query=runaway, answer="Stopped."), Recorder())
+    main_thread = threading.main_thread().ident
+
+    def run_with_ctrl_c(function):
+        finished = threading.Event()
+        stuck = []
+
+        def press_ctrl_c():
+            deadline = time.monotonic() + 5
+            while not main_mod.ENGINES._running and time.monotonic() < deadline:
+                time.sleep(0.01)
+            # Give sqlite3 time to start stepping; an interrupt before that is lost.
+            time.sleep(0.2)
+            signal.pthread_kill(main_thread, signal.SIGINT)
+            if not finished.wait(5):
+                # The handler never ran; cancel directly so a failing test does not hang.
+                stuck.append(True)
+                main_mod.ENGINES.cancel_running()
+
+        presser = threading.Thread(target=press_ctrl_c, daemon=True)
+        presser.start()
+        try:
+            result = function()
+        finally:
+            finished.set()
+            presser.join(1)
+        assert not stuck
+        return result
+
+    run_with_ctrl_c(lambda: app.process_command("how many rows?"))
+
+    output = capsys.readouterr().out
+    assert "Cancelling the running query..." in output
+    assert "Query cancelled by the user (ctrl-c)" in output
+
+    # Called on the main thread, as a graph may run a lone tool call inline.
+    monkeypatch.setattr(sql_tools, "interrupt", lambda _request: {"action": "accept"})
+    query_tool = app.tools["sql_db_query"]
+    with app._cancel_queries_on_interrupt():
+        result = run_with_ctrl_c(lambda: query_tool.invoke({"query": runaway}))
+
+    assert result.startswith("Query cancelled by the user (ctrl-c)")
+    main_mod.ENGINES.discard(config.db_uri)
@@ -48,3 +48,62 @@ def test_render_message_tool_result_hidden_in_normal_mode(capsys):
     assert rendered is False
     assert content is None
     assert capsys.readouterr().out == ""
+
+
+def test_cached_query_result_is_flagged_in_normal_mode(capsys):
+    renderer = ConsoleRenderer(mode="normal", color_enabled=False)
+    message = ToolMessage(
+        content="(cached result from 42s ago; rows changed since then are not shown)\n[(1,)]",
+        name="sql_db_query",
+        tool_call_id="c1",
+        id="tool-1",
+    )
+
+    renderer.render_message(message, set())
+
+    output = capsys.readouterr().out
+    assert "[CACHED RESULT]\ncached result from 42s ago" in output
+    assert "[(1,)]" not in output
+
+
+def test_streamed_final_answer_is_not_printed_twice(capsys):
+    renderer = ConsoleRenderer(mode="verbose", color_enabled=False)
+    seen = set()
+
+    renderer.stream_token("msg-1", "Hello")
+    renderer.stream_token("msg-1", " world")
+    rendered, content = renderer.render_message(AIMessage(content="Hello world", id="msg-1"), seen)
+
+    assert rendered is True
+    assert content == "Hello world"
+    output = capsys.readouterr().out
+    assert output == "\n[RESPONSE]\nHello world\n"
+
+
+def test_start_turn_forgets_streamed_messages(capsys):
+    renderer = ConsoleRenderer(mode="verbose", color_enabled=False)
+    renderer.stream_token("msg-1", "Hello")
+    renderer.start_turn()
+    capsys.readouterr()
+
+    renderer.render_message(AIMessage(content="Hello", id="msg-1"), set())
+
+    assert not renderer.streamed_message_ids
+    assert capsys.readouterr().out == "\n[FINAL]\nHello\n"
+
+
+def test_approval_prompt_shows_plan_estimate_and_warnings(capsys):
+    renderer = ConsoleRenderer(mode="verbose", color_enabled=False)
+    plan = {
+        "total_cost": 182034.5,
+        "estimated_rows": 2400000,
+        "seq_scans": [{"table": "events", "rows": 2500000000}],
+        "warnings": ["Sequential scan on events (~2,500,000,000 rows)"],
+    }
+
+    renderer.print_approval_prompt(query="SELECT * FROM events", is_mutating=False, plan=plan)
+    output = capsys.readouterr().out
+
+    assert "estimate: cost=182,034 rows=2,400,000" in output
+    assert "full scans: events (~2,500,000,000 rows)" in output
+    assert "warning: Sequential scan on events" in output
@@ -0,0 +1,64 @@
+from psqlomni.result_cache import ResultCache, normalize_sql, referenced_tables
+
+
+def test_normalize_sql_keeps_literals_and_quoted_identifiers():
+    assert normalize_sql("SELECT  *\n FROM Users WHERE name = 'Ada';") == "select * from users where name = 'Ada'"
+    assert normalize_sql('select "Total" from t') == 'select "Total" from t'
+    assert referenced_tables(normalize_sql('SELECT * FROM public.users u JOIN "Orders" o ON o.uid = u.id')) == {
+        "users",
+        "orders",
+    }
+
+
+def test_hits_misses_and_write_invalidation():
+    cache = ResultCache()
+
+    assert cache.get("db-a", "SELECT * FROM users") is None
+    cache.record("db-a", "SELECT * FROM users", "[(1,)]")
+    cache.record("db-a", "select count(*) from orders", "[(7,)]")
+    cache.record("db-a", "SELECT now()", "[('2024-01-01',)]")
+
+    assert cache.get("db-a", "select *   from USERS;") == "[(1,)]"
+    assert cache.get("db-b", "SELECT * FROM users") is None
+    assert cache.get("db-a", "SELECT now()") is None
+
+    cache.record("db-a", "UPDATE users SET name = 'x'", None)
+
+    assert cache.get("db-a", "SELECT * FROM users") is None
+    assert cache.get("db-a", "select count(*) from orders") == "[(7,)]"
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.invalidations) == (2, 3, 1)
+
+
+def test_ttl_and_memory_bound_evict_entries(monkeypatch):
+    from psqlomni import result_cache
+
+    clock = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: clock[0])
+    cache = ResultCache(ttl_seconds=60, max_bytes=20)
+
+    cache.put("db", "SELECT * FROM a", "x" * 10)
+    cache.put("db", "SELECT * FROM b", "y" * 10)
+    cache.put("db", "SELECT * FROM c", "z" * 10)
+
+    assert cache.get("db", "SELECT * FROM a") is None
+    assert cache.stats.evictions == 1
+    clock[0] += 30
+    assert cache.get_with_age("db", "SELECT * FROM c") == ("z" * 10, 30)
+    clock[0] += 31
+    assert cache.get("db", "SELECT * FROM c") is None
+    assert len(cache) == 1
+
+
+def test_disk_tier_survives_a_new_cache_instance(tmp_path):
+    path = tmp_path / "results.sqlite"
+    first = ResultCache(path=path)
+    first.put("db", "SELECT * FROM users", "[(1,)]")
+    first.put("db", "SELECT * FROM orders", "[(2,)]")
+    first.invalidate("db", "DELETE FROM orders")
+    first.close()
+
+    second = ResultCache(path=path)
+
+    assert second.get("db", "SELECT * FROM users") == "[(1,)]"
+    assert second.get("db", "SELECT * FROM orders") is None
+    second.close()
@@ -0,0 +1,99 @@
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table
+
+from psqlomni.schema.retrieval import (
+    HashingEmbeddings,
+    TableRetrievalIndex,
+    TfidfEmbeddings,
+    build_embeddings,
+    table_documents,
+    tokenize,
+)
+
+
+def _documents():
+    documents = {
+        "users": "users users id name email signup_date",
+        "orders": "orders orders id user_id total created_at users",
+        "regions": "regions regions id name",
+        "invoices": "invoices invoices id amount region_id regions",
+        "products": "products products id name price",
+    }
+    for index in range(40):
+        documents[f"misc_{index}"] = f"misc_{index} id value"
+    return documents
+
+
+def test_tokenize_splits_snake_and_camel_case():
+    assert tokenize("orderItems user_id HTTPServer") == [
+        "order",
+        "items",
+        "orderitems",
+        "user",
+        "id",
+        "http",
+        "server",
+        "httpserver",
+    ]
+
+
+def test_table_documents_include_columns_comments_and_references():
+    metadata = MetaData()
+    Table("users", metadata, Column("id", Integer, primary_key=True), comment="registered people")
+    Table(
+        "orders",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id"), comment="buyer"),
+        Column("status", String),
+    )
+
+    documents = table_documents(["users", "orders", "ghost"], metadata)
+
+    assert "registered people" in documents["users"]
+    assert documents["orders"].split() == ["orders", "orders", "id", "user_id", "buyer", "users", "status"]
+    assert documents["ghost"] == "ghost"
+
+
+def test_search_ranks_relevant_tables_first():
+    index = TableRetrievalIndex()
+    index.refresh(_documents())
+
+    assert index.search("how many users signed up", 3)[0] == "users"
+    assert "products" in index.search("top products by price", 3)
+    assert index.search("anything", 0) == []
+
+
+def test_search_returns_every_table_when_index_is_small():
+    index = TableRetrievalIndex(HashingEmbeddings())
+    index.refresh({"users": "users id", "orders": "orders id"})
+    assert index.search("revenue", 5) == ["orders", "users"]
+
+
+def test_refresh_only_embeds_changed_documents():
+    class CountingEmbeddings(HashingEmbeddings):
+        def __init__(self):
+            super().__init__()
+            self.embedded = []
+
+        def embed_documents(self, texts):
+            self.embedded.extend(texts)
+            return super().embed_documents(texts)
+
+    embeddings = CountingEmbeddings()
+    index = TableRetrievalIndex(embeddings)
+    documents = _documents()
+
+    assert index.refresh(documents) == len(documents)
+    assert index.refresh(documents) == 0
+
+    documents["users"] += " last_login"
+    del documents["misc_0"]
+    embeddings.embedded.clear()
+    assert index.refresh(documents) == 1
+    assert embeddings.embedded == [documents["users"]]
+    assert "misc_0" not in index.table_names()
+
+
+def test_build_embeddings_defaults_to_tfidf():
+    assert isinstance(build_embeddings("hashing"), HashingEmbeddings)
+    assert isinstance(build_embeddings("unknown"), TfidfEmbeddings)
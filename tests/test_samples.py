@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import time
+
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import create_engine, event
+
+from psqlomni.schema import samples
+from psqlomni.schema.samples import SAMPLES_PENDING, SampleRowStore, fetch_sample_rows
+
+
+def _db(tmp_path, rows: int = 50) -> SQLDatabase:
+    path = tmp_path / "app.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT)")
+        conn.executemany("INSERT INTO events (kind) VALUES (?)", [(f"k{index}",) for index in range(rows)])
+    return SQLDatabase(create_engine(f"sqlite:///{path}"), sample_rows_in_table_info=3)
+
+
+def test_sqlite_samples_start_at_a_random_rowid_and_wrap_around(tmp_path):
+    db = _db(tmp_path, rows=3)
+    table = db._metadata.tables["events"]
+    statements = []
+    event.listen(db._engine, "before_cursor_execute", lambda _conn, _cursor, statement, *_: statements.append(statement))
+
+    rows = fetch_sample_rows(db._engine, table, 3)
+
+    assert sorted(rows) == [["1", "k0"], ["2", "k1"], ["3", "k2"]]
+    assert any("rowid >=" in statement for statement in statements)
+
+
+def test_store_serves_cached_samples_and_refreshes_stale_ones_in_the_background(tmp_path, monkeypatch):
+    db = _db(tmp_path)
+    refreshed = []
+    store = SampleRowStore(ttl_seconds=60, on_refresh=lambda connection, table: refreshed.append((connection, table)))
+    store.attach(db, "conn")
+
+    first = db.get_table_info(["events"])
+    assert "3 rows from events table:\nid\tkind\n" in first
+    assert db.get_table_info(["events"]) == first
+    assert refreshed == [("conn", "events")]
+
+    release = threading.Event()
+    fetch = samples.fetch_sample_rows
+    monkeypatch.setattr(samples, "fetch_sample_rows", lambda *args: release.wait(5) and fetch(*args))
+    store._entries["conn", "events"].fetched_at -= 120
+    assert db.get_table_info(["events"]) == first
+    release.set()
+    for _ in range(50):
+        if len(refreshed) == 2:
+            break
+        time.sleep(0.05)
+    assert len(refreshed) == 2
+    store.close()
+
+
+def test_first_fetch_returns_a_placeholder_when_it_runs_long(tmp_path, monkeypatch):
+    db = _db(tmp_path)
+    release = threading.Event()
+    monkeypatch.setattr(samples, "fetch_sample_rows", lambda *args: release.wait(5) and [])
+    store = SampleRowStore(wait_seconds=0.05)
+    store.attach(db, "conn")
+
+    assert SAMPLES_PENDING in db.get_table_info(["events"])
+    release.set()
+    store.close()
+
+
+def test_failed_fetch_does_not_block_later_ones(tmp_path, monkeypatch):
+    db = _db(tmp_path)
+    calls = []
+
+    def fetch(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("driver bug")
+        return [["1", "k0"]]
+
+    monkeypatch.setattr(samples, "fetch_sample_rows", fetch)
+    store = SampleRowStore(wait_seconds=1)
+    store.attach(db, "conn")
+
+    assert SAMPLES_PENDING in db.get_table_info(["events"])
+    assert store._pending == {}
+    assert "1\tk0" in db.get_table_info(["events"])
+    assert len(calls) == 2
+    store.close()
@@ -0,0 +1,59 @@
+import sqlite3
+
+from sqlalchemy import MetaData, create_engine
+
+from psqlomni.schema.cache import (
+    SchemaCatalogCache,
+    catalog_marker,
+    connection_fingerprint,
+)
+
+
+def _sqlite_engine(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_connection_fingerprint_depends_on_uri_and_schema():
+    base = connection_fingerprint("postgresql://a@h/db")
+    assert base == connection_fingerprint("postgresql://a@h/db")
+    assert base != connection_fingerprint("postgresql://a@h/other")
+    assert base != connection_fingerprint("postgresql://a@h/db", schema="sales")
+
+
+def test_catalog_marker_changes_after_ddl(tmp_path):
+    engine = _sqlite_engine(tmp_path / "app.db")
+    before = catalog_marker(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE users ADD COLUMN email TEXT")
+    after = catalog_marker(engine)
+
+    assert before is not None and before.startswith("sqlite:")
+    assert before != after
+
+
+def test_schema_catalog_cache_round_trip_and_marker_mismatch(tmp_path):
+    engine = _sqlite_engine(tmp_path / "app.db")
+    metadata = MetaData()
+    metadata.reflect(bind=engine)
+    cache = SchemaCatalogCache(tmp_path / "cache")
+
+    assert cache.load("fp", "sqlite:1") is None
+    cache.store("fp", "sqlite:1", metadata)
+
+    loaded = cache.load("fp", "sqlite:1")
+    assert loaded is not None
+    assert set(loaded.tables) == {"users"}
+    assert cache.load("fp", "sqlite:2") is None
+
+    cache.invalidate("fp")
+    assert cache.load("fp", "sqlite:1") is None
+
+
+def test_schema_catalog_cache_ignores_corrupt_entries(tmp_path):
+    cache = SchemaCatalogCache(tmp_path)
+    cache.path_for("fp").write_bytes(b"not a pickle")
+    assert cache.load("fp", "sqlite:1") is None
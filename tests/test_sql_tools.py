@@ -73,3 +73,93 @@ def test_edit_accept_and_unknown_actions():
     unknown_result = _invoke_tool(unknown_db, {"action": "maybe"})
     assert unknown_result == "Query execution cancelled: unknown decision."
     assert unknown_db.queries == []
+
+
+def test_async_tool_matches_sync_result(monkeypatch, tmp_path):
+    import asyncio
+
+    from langchain_community.utilities import SQLDatabase
+
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE users (id INTEGER, name TEXT)")
+    db.run("INSERT INTO users VALUES (1, 'ada'), (2, 'bob')")
+    tool = sql_tools._build_interruptible_query_tool(db)
+    monkeypatch.setattr(sql_tools, "interrupt", lambda _: {"action": "accept"})
+    query = {"query": "SELECT id, name FROM users ORDER BY id"}
+
+    assert asyncio.run(tool.ainvoke(query)) == tool.invoke(query) == "[(1, 'ada'), (2, 'bob')]"
+
+
+def test_query_over_the_statement_timeout_reports_cancellation(monkeypatch, tmp_path):
+    from langchain_community.utilities import SQLDatabase
+
+    from psqlomni.engines import ENGINES
+
+    uri = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(ENGINES, "statement_timeout", 0.2)
+    db = SQLDatabase(ENGINES.get(uri))
+
+    result = sql_tools._execute_query(
+        db,
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c",
+        "buffered",
+        20,
+        None,
+    )
+
+    assert result.startswith("Query cancelled: it ran longer than the 0.2s statement timeout.")
+    assert sql_tools._execute_query(db, "SELECT 1", "buffered", 20, None) == "[(1,)]"
+    ENGINES.discard(uri)
+
+
+def test_result_cache_serves_repeated_reads_until_a_write(tmp_path):
+    from langchain_community.utilities import SQLDatabase
+
+    from psqlomni.result_cache import ResultCache
+
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    db.run("INSERT INTO users (name) VALUES ('ada')")
+    cache = ResultCache()
+    tool = sql_tools._build_interruptible_query_tool(db, result_cache=cache)
+    original_interrupt = sql_tools.interrupt
+    try:
+        sql_tools.interrupt = lambda _: {"action": "accept"}
+        first = tool.invoke({"query": "SELECT name FROM users"})
+        db.run("INSERT INTO users (name) VALUES ('bob')")
+        second = tool.invoke({"query": "select name from users;"})
+        tool.invoke({"query": "DELETE FROM users WHERE name = 'ada'"})
+        third = tool.invoke({"query": "SELECT name FROM users"})
+    finally:
+        sql_tools.interrupt = original_interrupt
+
+    assert first == "[('ada',)]"
+    assert second == "(cached result from 0s ago; rows changed since then are not shown)\n[('ada',)]"
+    assert third == "[('bob',)]"
+    assert (cache.stats.hits, cache.stats.invalidations) == (1, 1)
+
+
+def test_schema_tool_reuses_descriptions_until_a_write(tmp_path):
+    from langchain_community.utilities import SQLDatabase
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    from psqlomni.schema.descriptions import TableDescriptionCache
+
+    SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}").run("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    descriptions = TableDescriptionCache()
+    tools = sql_tools.build_sql_tools(db, FakeListChatModel(responses=[]), table_descriptions=descriptions)
+    original_interrupt = sql_tools.interrupt
+    try:
+        sql_tools.interrupt = lambda _: {"action": "accept"}
+        empty = tools["sql_db_schema"].invoke({"table_names": "users"})
+        assert len(descriptions) == 1
+        tools["sql_db_query"].invoke({"query": "INSERT INTO users (name) VALUES ('ada')"})
+        assert len(descriptions) == 0
+        filled = tools["sql_db_schema"].invoke({"table_names": "users"})
+    finally:
+        sql_tools.interrupt = original_interrupt
+
+    assert "CREATE TABLE users" in empty
+    assert "1\tada" not in empty
+    assert "1\tada" in filled
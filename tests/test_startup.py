@@ -0,0 +1,74 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+# Measured on a laptop-class machine: `--help` ~0.2s, first prompt ~1.3s with a
+# local SQLite database (the database, LLM client and graph are still warming
+# up in the background at that point). The budgets leave headroom for slow CI runners while
+# still catching a heavy import creeping back onto these paths.
+HELP_BUDGET_SECONDS = 1.0
+FIRST_PROMPT_BUDGET_SECONDS = 4.0
+HEAVY_MODULES = ("langchain_core", "langchain_community", "langchain_openai", "langgraph", "sqlalchemy")
+ROOT = Path(__file__).resolve().parents[1]
+
+HELP_SCRIPT = """
+import json, runpy, sys, time
+started = time.perf_counter()
+sys.argv = ["psqlomni", "--help"]
+try:
+    runpy.run_module("psqlomni", run_name="__main__")
+except SystemExit:
+    pass
+loaded = sorted({name.split(".")[0] for name in sys.modules})
+print(json.dumps({"seconds": time.perf_counter() - started, "modules": loaded}))
+"""
+
+FIRST_PROMPT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+sys.argv = ["psqlomni"]
+from psqlomni.app import PSqlomni
+from psqlomni.config import parse_args
+app = PSqlomni(parse_args())
+seconds = time.perf_counter() - started
+app._await_warmup()
+print(json.dumps({"seconds": seconds, "ready": app.graph is not None}))
+"""
+
+
+def _run(script: str, tmp_path) -> dict:
+    db_path = tmp_path / "app.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER)")
+    env = {
+        **os.environ,
+        "HOME": str(tmp_path),
+        "XDG_CACHE_HOME": str(tmp_path / "cache"),
+        "PYTHONPATH": str(ROOT),
+        "DB_URI": f"sqlite:///{db_path}",
+        "MODEL_PROVIDER": "openai",
+        "OPENAI_API_KEY": "sk-test",
+        "MODEL": "gpt-4.1-mini",
+        "SAMPLE_ROWS_IN_TABLE_INFO": "3",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, env=env, cwd=tmp_path, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_help_skips_heavy_imports_and_stays_within_budget(tmp_path):
+    result = _run(HELP_SCRIPT, tmp_path)
+
+    assert not set(HEAVY_MODULES) & set(result["modules"])
+    assert result["seconds"] < HELP_BUDGET_SECONDS
+
+
+def test_first_prompt_stays_within_budget(tmp_path):
+    result = _run(FIRST_PROMPT_SCRIPT, tmp_path)
+
+    assert result["ready"]
+    assert result["seconds"] < FIRST_PROMPT_BUDGET_SECONDS
@@ -0,0 +1,53 @@
+import sqlite3
+
+from sqlalchemy import create_engine, event
+
+from psqlomni.schema.stats import TableStats, TableStatsCache, collect_table_stats
+
+
+def _engine(tmp_path):
+    path = tmp_path / "app.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, status TEXT, user_id INTEGER, note TEXT);
+            CREATE INDEX orders_status ON orders (status, user_id);
+            CREATE TABLE notes (body TEXT);
+            """
+        )
+        conn.executemany(
+            "INSERT INTO orders (status, user_id) VALUES (?, ?)",
+            [(f"s{index % 4}", index % 50) for index in range(2000)],
+        )
+        conn.execute("ANALYZE")
+    return create_engine(f"sqlite:///{path}")
+
+
+def test_sqlite_stats_read_sqlite_stat1_and_index_lists(tmp_path):
+    stats = collect_table_stats(_engine(tmp_path), ["orders", "notes", "missing"])
+
+    assert stats["orders"].rows == 2000
+    assert stats["orders"].indexes == ["(id) primary key", "(status, user_id)"]
+    assert stats["orders"].distinct == {"status": 4}
+    assert not stats["notes"].has_hints()
+    assert "missing" not in stats
+
+
+def test_summary_is_compact():
+    stats = TableStats("orders", rows=1_234_567, distinct={"user_id": 40_000, "status": 5}, indexes=["(id) primary key"])
+
+    assert stats.summary() == "orders: ~1.2M rows; indexes: (id) primary key; distinct values: status=5, user_id=40k"
+
+
+def test_stats_cache_reads_the_catalog_once_per_table(tmp_path):
+    engine = _engine(tmp_path)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda _conn, _cursor, statement, *_: statements.append(statement))
+    cache = TableStatsCache()
+
+    first = cache.summaries(engine, "conn", ["orders", "notes"])
+    queries = len(statements)
+    second = cache.summaries(engine, "conn", ["notes", "orders"])
+
+    assert first == second == ["orders: ~2k rows; indexes: (id) primary key, (status, user_id); distinct values: status=4"]
+    assert len(statements) == queries
@@ -0,0 +1,100 @@
+import csv
+import io
+
+from langchain_community.utilities import SQLDatabase
+
+from psqlomni.tools import sql_tools
+from psqlomni.tools.streaming import (
+    ConsoleRowSink,
+    CsvRowSink,
+    DiscardRowSink,
+    StreamedResult,
+    build_row_sink,
+    format_streamed_result,
+    stream_query,
+)
+
+
+def _db(tmp_path, rows=50):
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT)")
+    db.run("INSERT INTO events (id, name) VALUES " + ", ".join(f"({i}, 'e{i}')" for i in range(rows)))
+    return db
+
+
+def test_stream_query_keeps_preview_and_streams_remaining_rows(tmp_path):
+    db = _db(tmp_path)
+    sink = CsvRowSink(tmp_path / "out" / "rows.csv")
+
+    result = stream_query(db, "SELECT id, name FROM events ORDER BY id", preview_rows=5, sink=sink, batch_size=7)
+
+    assert result.columns == ["id", "name"]
+    assert result.preview == [(i, f"e{i}") for i in range(5)]
+    assert result.row_count == 50
+    with (tmp_path / "out" / "rows.csv").open(encoding="utf-8") as handle:
+        rows = list(csv.reader(handle))
+    assert rows[0] == ["id", "name"]
+    assert rows[1] == ["5", "e5"]
+    assert len(rows) == 46
+
+
+def test_stream_query_does_not_create_file_when_preview_holds_everything(tmp_path):
+    db = _db(tmp_path, rows=3)
+    sink = CsvRowSink(tmp_path / "rows.csv")
+
+    result = stream_query(db, "SELECT * FROM events", preview_rows=5, sink=sink)
+
+    assert result.row_count == 3
+    assert not (tmp_path / "rows.csv").exists()
+    assert "remaining rows" not in format_streamed_result(result)
+
+
+def test_stream_query_reports_non_row_statements(tmp_path):
+    db = _db(tmp_path)
+    result = stream_query(db, "UPDATE events SET name = 'x' WHERE id < 4", preview_rows=5)
+    assert result.returns_rows is False
+    assert format_streamed_result(result) == "Query executed successfully. Rows affected: 4."
+
+
+def test_console_sink_and_truncated_preview_message():
+    stream = io.StringIO()
+    sink = ConsoleRowSink(stream)
+    sink.write_header(["id"])
+    sink.write_rows([(1,), (2,)])
+    assert stream.getvalue() == "id\n1\n2\n"
+
+    text = format_streamed_result(StreamedResult(columns=["id"], preview=[(1,)], row_count=10, destination="console"))
+    assert text.startswith("[(1,)]")
+    assert "Showing the first 1 of 10 rows" in text
+    assert "streamed to console" in text
+
+
+def test_build_row_sink_targets(tmp_path):
+    assert isinstance(build_row_sink("console"), ConsoleRowSink)
+    assert isinstance(build_row_sink("discard"), DiscardRowSink)
+    sink = build_row_sink(str(tmp_path))
+    assert isinstance(sink, CsvRowSink)
+    assert sink.path.parent == tmp_path
+
+
+def test_query_tool_streams_in_stream_mode(tmp_path):
+    db = _db(tmp_path)
+    sinks = []
+
+    def sink_factory():
+        sinks.append(DiscardRowSink())
+        return sinks[-1]
+
+    tool = sql_tools._build_interruptible_query_tool(
+        db, execution_mode="stream", preview_rows=2, row_sink_factory=sink_factory
+    )
+    original_interrupt = sql_tools.interrupt
+    try:
+        sql_tools.interrupt = lambda _: {"action": "accept"}
+        result = tool.invoke({"query": "SELECT id FROM events ORDER BY id"})
+    finally:
+        sql_tools.interrupt = original_interrupt
+
+    assert result.startswith("[(0,), (1,)]")
+    assert "Showing the first 2 of 50 rows" in result
+    assert len(sinks) == 1
@@ -0,0 +1,91 @@
+import json
+
+from langchain_community.utilities import SQLDatabase
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from psqlomni.graph.builder import build_sql_graph
+from psqlomni.tools.sql_tools import build_sql_tools
+from psqlomni.tracing import Tracer, TraceWriter, build_tracer, instrument_database
+from tests.test_graph_builder import ScriptedLLM, _sqlite_db
+
+
+class UsageChatModel(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "usage"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(
+            content="ok",
+            usage_metadata={"input_tokens": 120, "output_tokens": 7, "total_tokens": 127},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def test_spans_aggregate_per_turn_and_session():
+    tracer = Tracer()
+    with tracer.span("db", "run_no_throw"):
+        tracer.annotate(rows=2)
+        tracer.annotate(rows=3)
+    tracer.begin_turn()
+    with tracer.span("db", "run_no_throw"):
+        pass
+
+    assert tracer.turn[("db", "run_no_throw")].calls == 1
+    assert tracer.session[("db", "run_no_throw")].calls == 2
+    assert tracer.session[("db", "run_no_throw")].rows == 5
+
+
+def test_instrumented_database_records_rows_and_bytes(tmp_path):
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'app.db'}")
+    db.run("CREATE TABLE users (id INTEGER)")
+    db.run("INSERT INTO users VALUES (1), (2), (3)")
+    tracer = Tracer()
+    instrument_database(db, tracer)
+    instrument_database(db, tracer)
+
+    result = db.run_no_throw("SELECT id FROM users")
+
+    stats = tracer.session[("db", "run_no_throw")]
+    assert stats.calls == 1
+    assert stats.rows == 3
+    assert stats.bytes == len(result)
+
+
+def test_callback_handler_records_nodes_and_llm_tokens(tmp_path):
+    db = _sqlite_db(tmp_path)
+    llm = ScriptedLLM()
+    graph = build_sql_graph(llm, build_sql_tools(db, llm), db_dialect="sqlite", db_name="app")
+    tracer = Tracer()
+    handler = tracer.callback_handler()
+
+    graph.invoke(
+        {"messages": [("user", "how many users?")]},
+        config={"configurable": {"thread_id": "t1"}, "callbacks": [handler]},
+    )
+    UsageChatModel().invoke("hello", config={"callbacks": [handler]})
+
+    nodes = {name for category, name in tracer.session if category == "node"}
+    assert {"select_schema", "get_schema", "generate_query"} <= nodes
+    llm_stats = tracer.session[("llm", "llm")]
+    assert (llm_stats.prompt_tokens, llm_stats.completion_tokens) == (120, 7)
+
+
+def test_trace_writer_formats(tmp_path):
+    jsonl_tracer = build_tracer(str(tmp_path / "trace.jsonl"), "jsonl")
+    with jsonl_tracer.span("node", "select_schema"):
+        pass
+    jsonl_tracer.close()
+    (event,) = [json.loads(line) for line in (tmp_path / "trace.jsonl").read_text().splitlines()]
+    assert (event["category"], event["name"]) == ("node", "select_schema")
+
+    chrome_tracer = Tracer(TraceWriter(tmp_path / "trace.json", "chrome"))
+    with chrome_tracer.span("db", "run_no_throw", sql="SELECT 1"):
+        pass
+    chrome_tracer.close()
+    text = (tmp_path / "trace.json").read_text()
+    (event,) = json.loads(text.rstrip().rstrip(",") + "]")
+    assert event["ph"] == "X"
+    assert event["args"]["sql"] == "SELECT 1"